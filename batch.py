@@ -0,0 +1,216 @@
+"""
+Headless batch processing of multiple courses (no GUI, PySide6 is never imported). The
+courses are specified in a JSON manifest and processed in parallel on a process pool:
+
+    python batch.py courses.json [--workers 4] [--output-dir results]
+
+Example manifest (relative paths are relative to the manifest file):
+
+    {
+        "courses": [
+            {
+                "name": "Python 2 Exercise",
+                "moodle_file": "python2/grades.csv",
+                "kusss_files": ["python2/participants_340.112.csv"],
+                "kusss_encoding": "cp1252",
+                "grader": "Python2ExerciseGrader",
+                "submissions": [
+                    {"file": "python2/Assignment 1-submissions.zip", "tutors": {"Tutor A": 1, "Tutor B": 2}}
+                ]
+            }
+        ]
+    }
+
+For each course, the Moodle file is loaded and merged with the KUSSS participants, the grades
+are created with the specified grader (if any, requires "kusss_files") and stored as
+"<name>_<course ID>_grading.csv" (one KUSSS import file per course ID; the optional entries
+"grading_sep" and "grading_encoding" specify the format), and all specified submission
+archives are split among the tutors. The console output of each course is written to
+"<name>.log", and a summary of all courses to "batch_summary.json". The manifest is validated
+before any course is processed.
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import os.path
+import re
+import sys
+import time
+import traceback
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+GRADERS = {
+    "Python2ExerciseGrader": "graders.python2exercisegrader.Python2ExerciseGrader",
+    "Python2LectureGrader": "graders.python2lecturegrader.Python2LectureGrader",
+}
+
+
+def get_grader(name: str):
+    """
+    Returns a new grader instance. ``name`` is either one of the keys of ``GRADERS`` or a fully
+    qualified class name (e.g., "graders.python2lecturegrader.Python2LectureGrader").
+    """
+    module_name, _, class_name = GRADERS.get(name, name).rpartition(".")
+    if not module_name:
+        raise ValueError(f"unknown grader '{name}' (available: {', '.join(GRADERS)})")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def get_course_file_name(course_name: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", course_name)
+
+
+def validate_manifest(manifest: dict):
+    """
+    Checks the manifest (see module documentation) before any course is processed and raises a
+    ValueError if it is invalid, so that configuration errors are not only detected after the
+    (potentially long) loading in the worker processes.
+    """
+    courses = manifest["courses"]
+    for i, course in enumerate(courses):
+        for key in ["name", "moodle_file"]:
+            if key not in course:
+                raise ValueError(f"course {i} of the manifest has no '{key}' entry")
+        # The grades are exported per KUSSS course ID, which is only available after merging with the KUSSS participants
+        if course.get("grader") and not course.get("kusss_files"):
+            raise ValueError(f"course '{course['name']}' specifies a 'grader' but no 'kusss_files' (the KUSSS "
+                             f"participants are required to export the grades)")
+    names = [course["name"] for course in courses]
+    if len(set(get_course_file_name(n) for n in names)) != len(names):
+        raise ValueError(f"course names must be unique: {names}")
+
+
+def process_course(course: dict, base_dir: str, output_dir: str) -> dict:
+    """
+    Processes a single course of the manifest (see module documentation) and returns a
+    JSON-serializable summary. Exceptions are not raised but reported in the summary, so a
+    single failing course does not abort the entire batch.
+    """
+    # Imported here, so that the parent process (which only distributes the work) stays lightweight
+    import pandas as pd
+    from diagnostics import DiagnosticWarning, Diagnostics, get_tracer
+    from graders.export import write_kusss_gradings
+    from loaders import get_moodle_df, get_kusss_df, merge_moodle_and_kusss_dfs
+    from splitting.split import split_submissions
+    
+    # Same pandas semantics as in the GUI (see widgets.util.import_pandas)
+    pd.options.mode.copy_on_write = True
+    
+    def path(p):
+        return p if os.path.isabs(p) else os.path.join(base_dir, p)
+    
+    name = course["name"]
+    file_name = get_course_file_name(name)
+    log_file = os.path.join(output_dir, f"{file_name}.log")
+    summary = {"name": name, "pid": os.getpid(), "log_file": log_file, "outputs": []}
+    diagnostics = Diagnostics()
+    tracer = get_tracer()
+    tracer.clear()
+    start = time.perf_counter()
+    with open(log_file, "w", encoding="utf8") as log, contextlib.redirect_stdout(log), \
+            warnings.catch_warnings(record=True) as caught_warnings:
+        warnings.simplefilter("always")
+        try:
+            df = get_moodle_df(path(course["moodle_file"]), encoding=course.get("moodle_encoding", "utf8"),
+                               diagnostics=diagnostics)
+            if course.get("kusss_files"):
+                kusss_df = get_kusss_df([path(f) for f in course["kusss_files"]],
+                                        encoding=course.get("kusss_encoding", "ANSI"), diagnostics=diagnostics)
+                df = merge_moodle_and_kusss_dfs(df, kusss_df, diagnostics=diagnostics)
+            summary["students"] = len(df)
+            
+            if course.get("grader"):
+                grader = get_grader(course["grader"])
+                grader.set_df(df)
+                grading_df = grader.create_grading_file()
+                summary["grades"] = grading_df["grade"].value_counts().sort_index().to_dict()
+                summary["outputs"].extend(write_kusss_gradings(
+                    grading_df, output_dir, file_name, sep=course.get("grading_sep", ";"),
+                    encoding=course.get("grading_encoding", "utf8"), diagnostics=diagnostics))
+            
+            for submissions in course.get("submissions", []):
+                tutors = submissions["tutors"]
+                if isinstance(tutors, dict):
+                    tutors_df = pd.DataFrame({"Name": list(tutors.keys()), "Weight": list(tutors.values())})
+                else:
+                    tutors_df = pd.DataFrame({"Name": tutors})
+                split_df = split_submissions(path(submissions["file"]), tutors_df, info_df=df,
+                                             number=submissions.get("number"),
+                                             balance_workload=submissions.get("balance_workload", False))
+                summary["outputs"].extend(split_df["Tutor file"].unique().tolist())
+            summary["status"] = "ok"
+        except Exception as ex:
+            summary["status"] = "failed"
+            summary["error"] = f"{type(ex).__name__}: {ex}"
+            traceback.print_exc(file=log)
+        for issue in diagnostics:
+            print(issue.render())
+        for w in caught_warnings:
+            if isinstance(w.message, DiagnosticWarning):
+                print(f"{w.category.__name__}: {w.message.issue.render(DiagnosticWarning.MAX_ROWS)}")
+            else:
+                print(f"{w.category.__name__}: {w.message}")
+    summary["seconds"] = time.perf_counter() - start
+    summary["issues"] = [{"stage": issue.stage, "message": issue.message, "rows": len(issue)} for issue in diagnostics]
+    summary["stages"] = [{"name": s.name, "depth": s.depth, "seconds": s.duration} for s in tracer.get_spans()
+                         if s.depth <= 1]
+    return summary
+
+
+def run_batch(manifest_file: str, output_dir: str = None, workers: int = None) -> list[dict]:
+    """
+    Processes all courses of the manifest in parallel and returns their summaries (in the
+    order of the manifest).
+
+    :param manifest_file: The path of the JSON manifest (see module documentation).
+    :param output_dir: The directory where all outputs are stored. Default: None = the
+        "output_dir" entry of the manifest or, if missing, the directory of the manifest
+    :param workers: The number of worker processes. Default: None = number of CPUs (at most
+        the number of courses)
+    """
+    with open(manifest_file, "r", encoding="utf8") as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    if output_dir is None:
+        output_dir = os.path.join(base_dir, manifest.get("output_dir", "."))
+    validate_manifest(manifest)
+    os.makedirs(output_dir, exist_ok=True)
+    courses = manifest["courses"]
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(courses))
+    
+    summaries = [None] * len(courses)
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(process_course, course, base_dir, output_dir): i for i, course in enumerate(courses)}
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries[futures[future]] = summary
+            print(f"[{summary['status']}] {summary['name']}: {summary['seconds']:.2f}s, {len(summary['issues'])} "
+                  f"issues{', ' + summary['error'] if 'error' in summary else ''} (log: '{summary['log_file']}')")
+    with open(os.path.join(output_dir, "batch_summary.json"), "w", encoding="utf8") as f:
+        json.dump(summaries, f, indent=2, default=str)
+    return summaries
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Processes (load, merge, grade, split) multiple courses in parallel "
+                                                 "without the GUI.")
+    parser.add_argument("manifest", help="JSON manifest that specifies the courses and their input files.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes. Default: number of CPUs.")
+    parser.add_argument("--output-dir", help="Directory of all outputs. Default: directory of the manifest.")
+    args = parser.parse_args(args)
+    start = time.perf_counter()
+    try:
+        summaries = run_batch(args.manifest, args.output_dir, args.workers)
+    except ValueError as ex:  # Invalid manifest (see validate_manifest)
+        parser.error(str(ex))
+    n_failed = sum(s["status"] != "ok" for s in summaries)
+    print(f"processed {len(summaries)} courses in {time.perf_counter() - start:.2f}s ({n_failed} failed)")
+    return 1 if n_failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
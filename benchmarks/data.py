@@ -0,0 +1,202 @@
+import os
+import os.path
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = [
+    "Anna", "Lukas", "Sophie", "Maximilian", "Lena", "Jakob", "Marie", "Tobias", "Julia", "Florian", "Hannah",
+    "Elias", "Laura", "David", "Katharina", "Simon", "Sarah", "Felix", "Johanna", "Fabian", "Jürgen", "Zoë",
+    "Ana Maria", "Jan Niklas", "Chloé", "Björn", "Mehmet", "Ayşe", "Nikola", "Yuki",
+]
+LAST_NAMES = [
+    "Gruber", "Huber", "Bauer", "Wagner", "Müller", "Pichler", "Steiner", "Moser", "Mayer", "Hofer", "Leitner",
+    "Berger", "Fuchs", "Eder", "Fischer", "Schmid", "Winkler", "Weber", "Schwarz", "Maier", "Schneider", "Reiter",
+    "Mayr", "Schmidt", "Wimmer", "Egger", "Brunner", "Lang", "Baumgartner", "Auer", "Binder", "Lechner", "Wolf",
+    "Wallner", "Aigner", "Ebner", "Koller", "Lehner", "Haas", "Schuster", "Van der Berg", "Özdemir", "Dvořák",
+]
+
+# Columns of the Moodle gradebook export (English and German) that are required by the Python 2 graders. The German
+# export contains non-breaking spaces, which is also reproduced here.
+EXERCISE_ITEMS = [
+    ("Assignment", f"Assignment {i}", 100) for i in range(1, 7)
+] + [
+    ("Assignment", "Assignment 7 (Project)", 400),
+    ("Assignment", "Assignment 8 (Bonus)", 50),
+    ("Quiz", "Exam", 100),
+    ("Quiz", "Retry Exam", 100),
+    ("Quiz", "Retry Exam 2", 100),
+]
+MOODLE_COLUMNS = {
+    "en": {
+        "First name": "First name",
+        "Surname": "Surname",
+        "ID number": "ID number",
+        "Email address": "Email address",
+        "Assignment": "Assignment",
+        "Quiz": "Quiz",
+        "Real": "Real",
+        "Course total": "Course total",
+        "Last downloaded from this course": "Last downloaded from this course",
+    },
+    "de": {
+        "First name": "Vorname",
+        "Surname": "Nachname",
+        "ID number": "ID-Nummer",
+        "Email address": "E-Mail-Adresse",
+        "Assignment": "Aufgabe",
+        "Quiz": "Test",
+        "Real": "Punkte",
+        "Course total": "Kurs gesamt",
+        "Last downloaded from this course": "Zuletzt aus diesem Kurs geladen",
+    },
+}
+
+
+def _unique_suffix(i: int) -> str:
+    # Bijective base-26 representation with lowercase letters ("", "a", ..., "z", "aa", ...), so that combining a name
+    # from a small pool with this suffix always results in a unique name
+    suffix = ""
+    while i > 0:
+        i, r = divmod(i - 1, 26)
+        suffix = chr(ord("a") + r) + suffix
+    return suffix
+
+
+def generate_students(n_students: int, n_staff: int = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns a pd.DataFrame with ``n_students`` synthetic students (and ``n_staff`` additional
+    non-student entries like tutors or lecturers, which have no valid matriculation ID and a
+    non-student e-mail address). All full names are unique. Columns: "First name", "Surname",
+    "ID number" (8-digit string), "Email address", "moodle_id" (7-digit string).
+
+    :param n_students: The number of students.
+    :param n_staff: The number of non-student entries. Default: None = 0.2% of ``n_students``
+        (at least 1)
+    :param seed: The seed of the random number generator. Default: 0
+    """
+    if n_staff is None:
+        n_staff = max(1, n_students // 500)
+    rng = np.random.default_rng(seed)
+    n = n_students + n_staff
+    idx = np.arange(n)
+    first_names = np.array(FIRST_NAMES, dtype=object)[rng.integers(len(FIRST_NAMES), size=n)]
+    last_names = [f"{LAST_NAMES[i % len(LAST_NAMES)]}{_unique_suffix(i // len(LAST_NAMES))}" for i in idx]
+    matr_ids = rng.choice(np.arange(10_000_000, 13_000_000), size=n, replace=False)
+    df = pd.DataFrame({
+        "First name": first_names,
+        "Surname": last_names,
+        "ID number": [f"{m:08d}" for m in matr_ids],
+        "Email address": [f"k{m:08d}@students.jku.at" for m in matr_ids],
+        "moodle_id": [f"{1_000_000 + i}" for i in idx],
+    })
+    staff = idx >= n_students
+    df.loc[staff, "ID number"] = [f"tutor{i}" for i in range(n_staff)]
+    df.loc[staff, "Email address"] = [f"tutor{i}@jku.at" for i in range(n_staff)]
+    return df
+
+
+def generate_gradebook(students_df: pd.DataFrame, language: str = "en", participation: float = 0.85,
+                       seed: int = 0) -> pd.DataFrame:
+    """
+    Returns a synthetic Moodle gradebook (as it is exported by Moodle, i.e., before any
+    translation or preparation) that contains all items required by the Python 2 graders.
+    Missing points are NaN.
+
+    :param students_df: The students as returned by ``generate_students``.
+    :param language: The language of the column headers ("en" or "de"). Default: "en"
+    :param participation: The probability that a student has points for a specific item.
+        Default: 0.85
+    :param seed: The seed of the random number generator. Default: 0
+    """
+    cols = MOODLE_COLUMNS[language]
+    nbsp = "\xa0" if language == "de" else " "
+    rng = np.random.default_rng(seed)
+    n = len(students_df)
+    data = {cols[c]: students_df[c].values for c in ["First name", "Surname", "ID number", "Email address"]}
+    total = np.zeros(n)
+    for kind, name, max_points in EXERCISE_ITEMS:
+        # Skewed towards high points (most students pass), with some non-participation
+        points = np.round(rng.beta(4, 1.5, size=n) * max_points, 2)
+        points[rng.random(n) > participation] = np.nan
+        total += np.nan_to_num(points)
+        data[f"{cols[kind]}:{nbsp}{name} ({cols['Real']})"] = points
+    data[f"{cols['Course total']} ({cols['Real']})"] = np.round(total, 2)
+    data[cols["Last downloaded from this course"]] = 1_700_000_000 + rng.integers(0, 10_000_000, size=n)
+    return pd.DataFrame(data)
+
+
+def write_moodle_gradebook(file: str, students_df: pd.DataFrame, language: str = "en", participation: float = 0.85,
+                           seed: int = 0):
+    """
+    Writes a synthetic Moodle gradebook CSV export (the format expected by ``get_moodle_df``).
+    Missing points are written as "-" (like Moodle does). See ``generate_gradebook`` for the
+    parameters.
+    """
+    df = generate_gradebook(students_df, language, participation, seed)
+    df.to_csv(file, index=False, na_rep="-", encoding="utf8")
+
+
+def write_kusss_participants(directory: str, students_df: pd.DataFrame, course_ids=("340.111", "340.112"),
+                             encoding: str = "cp1252", seed: int = 0) -> list[str]:
+    """
+    Writes one synthetic KUSSS participants CSV export per course ID (the format expected by
+    ``get_kusss_df``). Every student (no staff) is registered for exactly one of the courses.
+    The course ID is part of the file name, since this is where ``get_kusss_df`` extracts it
+    from.
+
+    :param directory: The directory where the files are written.
+    :param students_df: The students as returned by ``generate_students``.
+    :param course_ids: The course IDs (one file per ID). Default: ("340.111", "340.112")
+    :param encoding: The encoding of the files (KUSSS exports are Windows-encoded).
+        Default: "cp1252"
+    :param seed: The seed of the random number generator. Default: 0
+    :return: The paths of the written files.
+    """
+    rng = np.random.default_rng(seed)
+    df = students_df[students_df["ID number"].str.fullmatch(r"\d{8}")]
+    kusss_df = pd.DataFrame({
+        "Matrikelnummer": "k" + df["ID number"],
+        "Nachname": df["Surname"],
+        "Vorname": df["First name"],
+        "SKZ": rng.choice(["521", "033 521", "066 921", "066 926"], size=len(df)),
+        "Semester": "2023W",
+        "E-Mail": df["Email address"],
+    })
+    course_index = rng.integers(len(course_ids), size=len(kusss_df))
+    files = []
+    for i, course_id in enumerate(course_ids):
+        file = os.path.join(directory, f"participants_{course_id}.csv")
+        # Names that cannot be represented in the (Windows) encoding are replaced, just like in the real exports
+        kusss_df[course_index == i].to_csv(file, sep=";", index=False, encoding=encoding, errors="replace")
+        files.append(file)
+    return files
+
+
+def write_submissions_zip(file: str, students_df: pd.DataFrame, submission_rate: float = 0.9,
+                          max_files: int = 3, max_file_size: int = 4096, seed: int = 0):
+    """
+    Writes a synthetic Moodle submissions ZIP file (the format expected by ``split_submissions``),
+    where each submission is a directory named "<full name>_<Moodle ID>_assignsubmission_file_"
+    that contains between 1 and ``max_files`` files.
+
+    :param file: The path of the ZIP file.
+    :param students_df: The students as returned by ``generate_students``.
+    :param submission_rate: The probability that a student (no staff) submitted. Default: 0.9
+    :param max_files: The maximum number of files per submission. Default: 3
+    :param max_file_size: The maximum size of each file in bytes. Default: 4096
+    :param seed: The seed of the random number generator. Default: 0
+    """
+    rng = np.random.default_rng(seed)
+    df = students_df[students_df["ID number"].str.fullmatch(r"\d{8}")]
+    df = df[rng.random(len(df)) < submission_rate]
+    n_files = rng.integers(1, max_files + 1, size=len(df))
+    # Submissions are mostly compressible source code, so simply repeat a short line
+    line = b"print('hello world')  # synthetic submission\n"
+    with zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED) as f:
+        for (first, last, moodle_id), n in zip(df[["First name", "Surname", "moodle_id"]].values, n_files):
+            directory = f"{first} {last}_{moodle_id}_assignsubmission_file_"
+            for k in range(n):
+                size = int(rng.integers(1, max_file_size + 1))
+                f.writestr(f"{directory}/file{k}.py", (line * (size // len(line) + 1))[:size])
@@ -0,0 +1,197 @@
+"""
+Headless benchmarks of the table layer (DataFrameModel, DataFrameTableView and
+FilterableDataFrameTableView) on large synthetic DataFrames. No display is required, since
+the "offscreen" Qt platform is used by default. Run with:
+
+    python -m benchmarks.gui --sizes 5000 50000 --output gui_results.json [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Must be set before the QApplication is created
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, QEvent, QItemSelection, QItemSelectionModel, Qt
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication
+
+from loaders import moodle_df_to_en
+from widgets.views import DataFrameTableView, FilterableDataFrameTableView
+from .data import generate_students, generate_gradebook
+from .pipeline import measure, get_environment, compare
+
+DEFAULT_SIZES = (5_000, 50_000)
+DATA_ROLES = {
+    "DisplayRole": Qt.DisplayRole,
+    "TextAlignmentRole": Qt.TextAlignmentRole,
+    "ForegroundRole": Qt.ForegroundRole,
+}
+
+
+class PaintWaiter(QObject):
+    """Event filter that records when a widget was painted."""
+    
+    def __init__(self, widget):
+        super().__init__()
+        self.widget = widget
+        self.painted = False
+        widget.installEventFilter(self)
+    
+    def eventFilter(self, watched, event):
+        if watched is self.widget and event.type() == QEvent.Paint:
+            self.painted = True
+        return False
+    
+    def wait(self, timeout: float = 10):
+        """Processes events until the widget was painted (at most ``timeout`` seconds)."""
+        self.painted = False
+        self.widget.update()
+        end = time.perf_counter() + timeout
+        while not self.painted and time.perf_counter() < end:
+            QApplication.processEvents()
+
+
+def generate_df(n_students: int, seed: int = 0):
+    """Returns a translated synthetic gradebook (mixed string and float columns, including NaN)."""
+    return moodle_df_to_en(generate_gradebook(generate_students(n_students, seed=seed), seed=seed))
+
+
+def run_benchmarks(n_students: int, repeat: int = 3, trace_memory: bool = False, n_cells: int = 20_000,
+                   n_copy_rows: int = 10_000, filter_text: str = "Hub") -> list[dict]:
+    """
+    Runs all table benchmarks on a synthetic DataFrame with ``n_students`` rows and returns one
+    result dictionary per benchmark (see ``benchmarks.pipeline.measure``).
+
+    :param n_students: The number of rows of the DataFrame.
+    :param repeat: The number of timed repetitions per benchmark. Default: 3
+    :param trace_memory: Whether to additionally measure the peak memory. Default: False
+    :param n_cells: The number of (random) cells that are queried per role in the ``data()``
+        throughput benchmark. Default: 20000
+    :param n_copy_rows: The number of rows of the selection that is copied to the clipboard
+        (all columns are selected). Default: 10000
+    :param filter_text: The text that is typed (character by character) into the filter.
+        Default: "Hub"
+    """
+    df = generate_df(n_students)
+    results = []
+    
+    def run(name: str, func, per_item: int = None, **info):
+        print(f"[{n_students} rows] {name}...", end=" ", flush=True)
+        result = {"benchmark": name, "students": n_students, "rows": len(df), **info,
+                  **measure(func, repeat, trace_memory)}
+        if per_item is not None:
+            result["items_per_second"] = per_item / result["min_seconds"]
+        results.append(result)
+        print(f"{result['min_seconds']:.4f}s")
+    
+    table = DataFrameTableView(df)
+    widget = FilterableDataFrameTableView(table)
+    widget.resize(1200, 800)
+    widget.show()
+    waiter = PaintWaiter(table.viewport())
+    waiter.wait()
+    model = table.model
+    
+    # data() throughput per role (source model, i.e., no proxy overhead)
+    rng = np.random.default_rng(0)
+    indexes = [model.index(int(r), int(c)) for r, c in zip(rng.integers(len(df), size=n_cells),
+                                                           rng.integers(len(df.columns), size=n_cells))]
+    for role_name, role in DATA_ROLES.items():
+        run(f"DataFrameModel.data ({role_name})", lambda: [model.data(index, role) for index in indexes],
+            per_item=n_cells, cells=n_cells)
+    
+    # Time until the view is painted after setting a new DataFrame
+    def set_df_and_paint():
+        table.set_df(df)
+        waiter.wait()
+    
+    run("DataFrameTableView.set_df (first paint)", set_df_and_paint)
+    
+    # Same, but only 1% of the rows changed (granular model update instead of a reset)
+    changed_df = df.copy()
+    changed_rows = rng.choice(len(df), size=max(1, len(df) // 100), replace=False)
+    changed_df.iloc[changed_rows, changed_df.columns.get_loc("Surname")] += " (changed)"
+    
+    def update_df_and_paint():
+        table.update_df(changed_df)
+        waiter.wait()
+        table.update_df(df)
+        waiter.wait()
+    
+    run("DataFrameTableView.update_df (1% changed, first paint)", update_df_and_paint, changed_rows=len(changed_rows))
+    
+    # Sort latency per column (until the view is painted again)
+    for col_index, col in enumerate(df.columns):
+        def sort_and_paint():
+            table.sortByColumn(col_index, Qt.AscendingOrder)
+            waiter.wait()
+            table.sortByColumn(col_index, Qt.DescendingOrder)
+            waiter.wait()
+        
+        run(f"DataFrameTableView.sortByColumn ({col})", sort_and_paint, dtype=str(df[col].dtype))
+    
+    # Latency per keystroke when typing into the filter (global regex and column-specific filter)
+    for prefix in ["", "Surname:"]:
+        widget.search_edit.setText(prefix)
+        waiter.wait()
+        
+        def type_filter():
+            for char in filter_text:
+                QTest.keyClick(widget.search_edit, char)
+                waiter.wait()
+            for _ in filter_text:
+                QTest.keyClick(widget.search_edit, Qt.Key_Backspace)
+                waiter.wait()
+        
+        run(f"FilterableDataFrameTableView filter keystroke ('{prefix}{filter_text}')", type_filter,
+            per_item=2 * len(filter_text), keystrokes=2 * len(filter_text))
+    widget.search_edit.setText("")
+    waiter.wait()
+    
+    # Clipboard export of a large rectangular selection
+    n_rows = min(n_copy_rows, len(df))
+    proxy = table.proxy_model
+    selection = QItemSelection(proxy.index(0, 0), proxy.index(n_rows - 1, len(df.columns) - 1))
+    table.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+    run("DataFrameTableView.handle_copy_shortcut", table.handle_copy_shortcut,
+        per_item=n_rows * len(df.columns), cells=n_rows * len(df.columns))
+    
+    widget.close()
+    widget.deleteLater()
+    QApplication.processEvents()
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the table models and views on synthetic data "
+                                                 "(headless, via the offscreen Qt platform).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of rows (students).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per benchmark.")
+    parser.add_argument("--memory", action="store_true", help="Additionally measure the peak memory.")
+    parser.add_argument("--output", help="JSON file where the results are stored.")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare the results with.")
+    args = parser.parse_args(args)
+    # Same pandas semantics as the application (see widgets.util.import_pandas)
+    pd.options.mode.copy_on_write = True
+    
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = []
+    for n_students in args.sizes:
+        results.extend(run_benchmarks(n_students, args.repeat, args.memory))
+    run_results = {"environment": {**get_environment(), "qt_platform": app.platformName()}, "results": results}
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(run_results, f, indent=2)
+        print(f"results written to '{args.output}'")
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf8") as f:
+            compare(json.load(f), run_results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
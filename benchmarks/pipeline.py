@@ -0,0 +1,223 @@
+"""
+Benchmarks of the load -> merge -> grade -> split pipeline on synthetic data. Run with:
+
+    python -m benchmarks.pipeline --sizes 500 5000 50000 --output results.json [--compare baseline.json]
+
+The results (timings and peak memory per benchmark and size) are stored as JSON, so
+different runs (e.g., before and after a change) can be compared.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import os.path
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from graders.python2exercisegrader import Python2ExerciseGrader
+from graders.python2lecturegrader import Python2LectureGrader
+from graders.sweep import sweep_thresholds
+from loaders import get_moodle_df, get_kusss_df, merge_moodle_and_kusss_dfs
+from splitting.split import split_submissions
+from .data import generate_students, write_moodle_gradebook, write_kusss_participants, write_submissions_zip
+
+DEFAULT_SIZES = (500, 5_000, 50_000)
+KUSSS_ENCODING = "cp1252"
+# Threshold combinations of the what-if analysis benchmark (5 * 5 * 5 * 3 = 375 combinations)
+SWEEP_GRID = {
+    "threshold_exam": [0.4, 0.45, 0.5, 0.55, 0.6],
+    "threshold_individual_a": [0.15, 0.2, 0.25, 0.3, 0.35],
+    "threshold_all_a": [0.4, 0.45, 0.5, 0.55, 0.6],
+    "grade_4": [0.45, 0.5, 0.55],
+}
+
+
+def measure(func, repeat: int = 3, trace_memory: bool = True) -> dict:
+    """
+    Calls ``func`` ``repeat`` times and measures the wall-clock time of each call. If
+    ``trace_memory`` is True, ``func`` is called one additional time with ``tracemalloc``
+    enabled to determine the peak memory (tracing slows down the execution, so this call is
+    not part of the timings). All console output and warnings of ``func`` are suppressed.
+
+    :return: A dictionary with the keys "times", "min_seconds", "mean_seconds" and
+        "peak_memory_bytes" (None if ``trace_memory`` is False).
+    """
+    times = []
+    peak = None
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        if trace_memory:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return {"times": times, "min_seconds": min(times), "mean_seconds": float(np.mean(times)),
+            "peak_memory_bytes": peak}
+
+
+def prepare_data(directory: str, n_students: int, seed: int = 0) -> dict:
+    """
+    Generates all synthetic input files for ``n_students`` in ``directory`` (existing files are
+    reused, since the generation itself is not benchmarked).
+
+    :return: A dictionary with the paths of the generated files.
+    """
+    directory = os.path.join(directory, f"students_{n_students}")
+    os.makedirs(directory, exist_ok=True)
+    students_df = generate_students(n_students, seed=seed)
+    files = {"moodle_en": os.path.join(directory, "gradebook_en.csv"),
+             "moodle_de": os.path.join(directory, "gradebook_de.csv"),
+             "submissions": os.path.join(directory, "Assignment 1-submissions.zip")}
+    if not os.path.isfile(files["moodle_en"]):
+        write_moodle_gradebook(files["moodle_en"], students_df, "en", seed=seed)
+    if not os.path.isfile(files["moodle_de"]):
+        write_moodle_gradebook(files["moodle_de"], students_df, "de", seed=seed)
+    if not os.path.isfile(files["submissions"]):
+        write_submissions_zip(files["submissions"], students_df, seed=seed)
+    files["kusss"] = write_kusss_participants(directory, students_df, encoding=KUSSS_ENCODING, seed=seed)
+    return files
+
+
+def run_benchmarks(n_students: int, data_dir: str, repeat: int = 3, split_repeat: int = 1,
+                   trace_memory: bool = True) -> list[dict]:
+    """
+    Runs all pipeline benchmarks for ``n_students`` and returns one result dictionary per
+    benchmark (see ``measure``), additionally containing the benchmark name, the number of
+    students and the number of result rows.
+    """
+    files = prepare_data(data_dir, n_students)
+    results = []
+    
+    def run(name: str, func, n_repeat: int = repeat, **info):
+        print(f"[{n_students} students] {name}...", end=" ", flush=True)
+        output = {}
+        
+        def call():
+            output["result"] = func()
+        
+        result = measure(call, n_repeat, trace_memory)
+        result = {"benchmark": name, "students": n_students, "rows": len(output["result"]), **info, **result}
+        results.append(result)
+        print(f"{result['min_seconds']:.3f}s")
+        return output["result"]
+    
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        moodle_df = get_moodle_df(files["moodle_en"])
+        kusss_df = get_kusss_df(files["kusss"], encoding=KUSSS_ENCODING)
+    run("get_moodle_df", lambda: get_moodle_df(files["moodle_en"]), language="en")
+    run("get_moodle_df", lambda: get_moodle_df(files["moodle_de"]), language="de")
+    run("get_kusss_df", lambda: get_kusss_df(files["kusss"], encoding=KUSSS_ENCODING), files=len(files["kusss"]))
+    students_df = run("merge_moodle_and_kusss_dfs", lambda: merge_moodle_and_kusss_dfs(moodle_df, kusss_df))
+    for grader in [Python2ExerciseGrader(), Python2LectureGrader()]:
+        grader.set_df(students_df)
+        run(f"{type(grader).__name__}.create_grading_file", grader.create_grading_file)
+    sweep_grader = Python2ExerciseGrader()
+    sweep_grader.set_df(students_df)
+    run("sweep_thresholds", lambda: sweep_thresholds(sweep_grader, SWEEP_GRID))
+    
+    # The tutor ZIP files are written next to the submissions file, so work on a copy in a temporary directory
+    tutors_df = pd.DataFrame({"Name": [f"Tutor {i}" for i in range(8)], "Weight": [1, 1, 1, 1, 2, 2, 2, 3]})
+    split_dir = tempfile.mkdtemp(dir=data_dir)
+    try:
+        submissions_file = os.path.join(split_dir, os.path.basename(files["submissions"]))
+        shutil.copyfile(files["submissions"], submissions_file)
+        run("split_submissions", lambda: split_submissions(submissions_file, tutors_df.copy(), info_df=students_df),
+            n_repeat=split_repeat, tutors=len(tutors_df))
+    finally:
+        shutil.rmtree(split_dir, ignore_errors=True)
+    return results
+
+
+def get_environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(baseline: dict, current: dict):
+    """Prints the speedup and memory change of each benchmark in ``current`` compared to ``baseline``."""
+    
+    def key(r):
+        return r["benchmark"], r["students"], r.get("language")
+    
+    baseline_results = {key(r): r for r in baseline["results"]}
+    print(f"{'benchmark':<50} {'students':>8} {'baseline':>10} {'current':>10} {'speedup':>8} {'memory':>8}")
+    for r in current["results"]:
+        b = baseline_results.get(key(r))
+        if b is None:
+            continue
+        name = r["benchmark"] + (f" ({r['language']})" if r.get("language") else "")
+        memory = ""
+        if r["peak_memory_bytes"] and b["peak_memory_bytes"]:
+            memory = f"{r['peak_memory_bytes'] / b['peak_memory_bytes']:.2f}x"
+        print(f"{name:<50} {r['students']:>8} {b['min_seconds']:>9.3f}s {r['min_seconds']:>9.3f}s "
+              f"{b['min_seconds'] / r['min_seconds']:>7.2f}x {memory:>8}")
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the load -> merge -> grade -> split pipeline on "
+                                                 "synthetic Moodle/KUSSS data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of students.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per benchmark (except splitting).")
+    parser.add_argument("--split-repeat", type=int, default=1, help="Timed repetitions of the splitting benchmark.")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory.")
+    parser.add_argument("--data-dir", help="Directory of the generated input files (reused across runs). "
+                                           "Default: temporary directory that is removed afterwards.")
+    parser.add_argument("--output", help="JSON file where the results are stored.")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare the results with.")
+    args = parser.parse_args(args)
+    # Same pandas semantics as the application (see widgets.util.import_pandas)
+    pd.options.mode.copy_on_write = True
+    
+    data_dir = args.data_dir if args.data_dir is not None else tempfile.mkdtemp(prefix="jku-students-manager-bench")
+    try:
+        results = []
+        for n_students in args.sizes:
+            results.extend(run_benchmarks(n_students, data_dir, args.repeat, args.split_repeat, not args.no_memory))
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    run_results = {"environment": get_environment(), "results": results}
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(run_results, f, indent=2)
+        print(f"results written to '{args.output}'")
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf8") as f:
+            compare(json.load(f), run_results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
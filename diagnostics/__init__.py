@@ -0,0 +1,2 @@
+from .issues import DiagnosticWarning, Diagnostics, Issue, report
+from .tracing import Span, Tracer, annotate, get_tracer, record, span, traced
@@ -0,0 +1,160 @@
+import os
+import sys
+import warnings
+
+_PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class Issue:
+    """
+    A single problem that was detected while processing data (e.g., students that were dropped
+    due to invalid matriculation IDs). The affected rows are only stored by their index labels
+    (together with a reference to the DataFrame they belong to), not copied or rendered, so
+    creating an issue is cheap regardless of how many rows are affected. The rows are only
+    selected and rendered as text if the issue is actually displayed.
+    """
+    
+    def __init__(self, message: str, source=None, index=None, stage: str = None, level: str = "warning",
+                 columns: list = None):
+        """
+        :param message: A short description of the issue (without any data).
+        :param source: An optional pd.DataFrame that contains the affected rows. It must not be
+            modified in place afterward. Default: None
+        :param index: The index labels of the affected rows of ``source``. Default: None = all
+            rows of ``source``
+        :param stage: The name of the processing stage where the issue was detected (e.g.,
+            "get_moodle_df"). Default: None
+        :param level: The severity ("info" or "warning"). Default: "warning"
+        :param columns: The columns of ``source`` that are relevant for the issue. Default:
+            None = all columns
+        """
+        self.message = message
+        self.source = source
+        self._index = index
+        self.stage = stage
+        self.level = level
+        self.columns = columns
+    
+    @property
+    def index(self):
+        """The index labels of the affected rows (None if there are no rows)."""
+        if self.source is None:
+            return None
+        return self.source.index if self._index is None else self._index
+    
+    @property
+    def rows(self):
+        """The affected rows (selected from the source DataFrame on each access, None if there are no rows)."""
+        return self.get_rows()
+    
+    def get_rows(self, max_rows: int = None):
+        """Returns the first ``max_rows`` affected rows (all if None, None if there are no rows)."""
+        if self.source is None:
+            return None
+        index = self.index if max_rows is None else self.index[:max_rows]
+        return self.source.loc[index, self.source.columns if self.columns is None else self.columns]
+    
+    def __len__(self):
+        return 0 if self.source is None else len(self.index)
+    
+    def summary(self) -> str:
+        """Returns the message and the number of affected rows (without any data)."""
+        return self.message if self.source is None else f"{self.message} ({len(self)} rows)"
+    
+    def render(self, max_rows: int = None) -> str:
+        """
+        Returns the message together with the affected rows as text. Only the first
+        ``max_rows`` rows are rendered (all if None).
+        """
+        if self.source is None:
+            return self.message
+        rows = self.get_rows(max_rows)
+        text = f"{self.summary()}:\n{rows.to_string()}"
+        if len(rows) < len(self):
+            text += f"\n... ({len(self) - len(rows)} more rows)"
+        return text
+    
+    def __str__(self):
+        return self.render(max_rows=DiagnosticWarning.MAX_ROWS)
+    
+    def __repr__(self):
+        return f"Issue({self.message!r}, rows={len(self)}, stage={self.stage!r})"
+
+
+class DiagnosticWarning(UserWarning):
+    """
+    Warning that wraps an ``Issue``. Its text only contains the message and the number of
+    affected rows, since ``warnings.warn`` creates it even if the warning is ignored. Where the
+    warnings are displayed in detail (e.g., in the batch logs), the rows can be rendered via
+    ``issue.render(DiagnosticWarning.MAX_ROWS)``.
+    """
+    MAX_ROWS = 20
+    
+    def __init__(self, issue: Issue):
+        super().__init__(issue)
+        self.issue = issue
+    
+    def __str__(self):
+        return self.issue.summary()
+
+
+class Diagnostics:
+    """
+    Collection of issues that were detected while processing data. Functions that accept a
+    ``diagnostics`` object add their issues to it instead of issuing warnings, so the caller
+    can decide if and when the (potentially large) affected rows are displayed.
+    """
+    
+    def __init__(self):
+        self.issues = []
+    
+    def add(self, message: str, source=None, index=None, stage: str = None, level: str = "warning",
+            columns: list = None) -> Issue:
+        """Adds a new issue (see ``Issue``) and returns it."""
+        issue = Issue(message, source, index, stage, level, columns)
+        self.issues.append(issue)
+        return issue
+    
+    def extend(self, other: "Diagnostics"):
+        self.issues.extend(other.issues)
+    
+    def clear(self):
+        self.issues.clear()
+    
+    def __len__(self):
+        return len(self.issues)
+    
+    def __iter__(self):
+        return iter(self.issues)
+    
+    def __repr__(self):
+        return f"Diagnostics({self.issues})"
+    
+    def summary(self) -> str:
+        """Returns one line per issue (only the messages and numbers of affected rows, no data)."""
+        return "\n".join(f"[{issue.stage}] {issue.summary()}" for issue in self.issues)
+
+
+def _get_stacklevel() -> int:
+    # The stack level (see warnings.warn in report) of the caller of the function that reported the issue, where
+    # frames of this package (e.g., the wrappers of traced functions) are skipped
+    level = 3
+    frame = sys._getframe(3)
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _PACKAGE_DIRECTORY:
+        frame = frame.f_back
+        level += 1
+    return level
+
+
+def report(diagnostics: Diagnostics, message: str, source=None, index=None, stage: str = None,
+           level: str = "warning", columns: list = None):
+    """
+    Adds an issue (see ``Issue``) to ``diagnostics``. If ``diagnostics`` is None, a
+    ``DiagnosticWarning`` is issued instead, which refers to the code that called the function
+    that reported the issue.
+    """
+    issue = Issue(message, source, index, stage, level, columns)
+    if diagnostics is not None:
+        diagnostics.issues.append(issue)
+    else:
+        warnings.warn(DiagnosticWarning(issue), stacklevel=_get_stacklevel())
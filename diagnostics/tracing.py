@@ -0,0 +1,224 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+class Span:
+    """
+    A single timed stage (e.g., parsing a CSV file), which is used as a context manager.
+    Additional information like row or byte counts can be attached via ``set`` at any time
+    before the span is finished.
+    """
+    
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+        self.duration = None
+        self.depth = 0
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+    
+    def set(self, **args) -> "Span":
+        self.args.update(args)
+        return self
+    
+    def __enter__(self):
+        self.depth = self.tracer._push(self)
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._pop(self)
+        return False
+    
+    def __repr__(self):
+        duration = "running" if self.duration is None else f"{self.duration * 1000:.3f}ms"
+        return f"Span({self.name!r}, {duration}, {self.args})"
+
+
+class Tracer:
+    """
+    Collects timed spans of the different pipeline stages. The most recent spans are kept in
+    memory (bounded), so tracing is cheap enough to be always on. Spans can be nested (per
+    thread) and exported in the Chrome trace format (load the file via chrome://tracing or
+    https://ui.perfetto.dev) for offline analysis.
+    """
+    
+    def __init__(self, max_spans: int = 10_000, enabled: bool = True):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._listeners = []
+    
+    def span(self, name: str, category: str = "pipeline", **args) -> Span:
+        """
+        Returns a new span that measures the time of the ``with`` block it is used in.
+
+        :param name: The name of the stage.
+        :param category: The category of the stage (e.g., "load", "grade", "split").
+            Default: "pipeline"
+        :param args: Additional information that is stored with the span (e.g., rows=100).
+        """
+        return Span(self, name, category, args)
+    
+    def traced(self, name: str = None, category: str = "pipeline") -> Callable:
+        """
+        Decorator that wraps each call of the decorated function in a span. If the function
+        returns something with a length (e.g., a pd.DataFrame) and no "rows" were set
+        explicitly, the length is stored as "rows".
+
+        :param name: The name of the span. Default: None = the name of the function
+        :param category: See ``span``. Default: "pipeline"
+        """
+        
+        def decorator(func):
+            span_name = func.__name__ if name is None else name
+            
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, category) as s:
+                    result = func(*args, **kwargs)
+                    if "rows" not in s.args and hasattr(result, "__len__"):
+                        s.set(rows=len(result))
+                    return result
+            
+            return wrapper
+        
+        return decorator
+    
+    def record(self, name: str, start: float, end: float = None, category: str = "pipeline", **args) -> Span:
+        """
+        Stores a span that was measured without a ``with`` block, e.g., a stage that ends in a later call of the
+        event loop. The span is not nested in any running span.
+
+        :param name: The name of the stage.
+        :param start: The start time (a ``time.perf_counter()`` value).
+        :param end: The end time. Default: None = now
+        :param category: See ``span``. Default: "pipeline"
+        :param args: See ``span``.
+        """
+        span = Span(self, name, category, args)
+        span.start = start
+        span.duration = (time.perf_counter() if end is None else end) - start
+        self._finish(span)
+        return span
+    
+    def current_span(self) -> Span:
+        """Returns the innermost running span of the current thread (or None)."""
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+    
+    def annotate(self, **args):
+        """Attaches additional information to the innermost running span of the current thread (if any)."""
+        span = self.current_span()
+        if span is not None:
+            span.set(**args)
+    
+    def add_listener(self, listener: Callable[[Span], None]):
+        """
+        Registers a function that is called with each finished span. Note that the function is
+        called in the thread where the span was finished.
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[Span], None]):
+        self._listeners.remove(listener)
+    
+    def get_spans(self) -> list[Span]:
+        """Returns all stored (finished) spans, ordered by the time they were finished."""
+        with self._lock:
+            return list(self._spans)
+    
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+    
+    def _push(self, span: Span) -> int:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        return len(stack) - 1
+    
+    def _pop(self, span: Span):
+        stack = self._local.stack
+        # Spans are context managers, so they are always finished in reverse order
+        assert stack and stack[-1] is span
+        stack.pop()
+        self._finish(span)
+    
+    def _finish(self, span: Span):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._spans.append(span)
+        for listener in list(self._listeners):
+            listener(span)
+    
+    def to_chrome_trace(self) -> dict:
+        """Returns all stored spans as Chrome trace ("Trace Event Format") dictionary."""
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for span in self.get_spans():
+            thread_names[span.thread_id] = span.thread_name
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",  # Complete event (with duration)
+                "ts": (span.start - self.origin) * 1e6,  # Microseconds
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                         for k, v in span.args.items()},
+            })
+        for thread_id, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+    
+    def export_chrome_trace(self, file: str):
+        """Writes all stored spans as Chrome trace JSON file (see ``to_chrome_trace``)."""
+        with open(file, "w", encoding="utf8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Returns the global tracer that is used for all pipeline stages."""
+    return _tracer
+
+
+def span(name: str, category: str = "pipeline", **args) -> Span:
+    """Shortcut for ``get_tracer().span(...)``."""
+    return _tracer.span(name, category, **args)
+
+
+def traced(name: str = None, category: str = "pipeline") -> Callable:
+    """Shortcut for ``get_tracer().traced(...)``."""
+    return _tracer.traced(name, category)
+
+
+def record(name: str, start: float, end: float = None, category: str = "pipeline", **args) -> Span:
+    """Shortcut for ``get_tracer().record(...)``."""
+    return _tracer.record(name, start, end, category, **args)
+
+
+def annotate(**args):
+    """Shortcut for ``get_tracer().annotate(...)``."""
+    _tracer.annotate(**args)
@@ -0,0 +1,134 @@
+import os
+import os.path
+import re
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import Diagnostics, report, traced
+
+VALID_GRADES = [1, 2, 3, 4, 5]
+
+
+def validate_kusss_grading(df: pd.DataFrame, matr_id_col: str = "ID number", study_id_col: str = "Study ID",
+                           grade_col: str = "grade", skip_ungraded: bool = True,
+                           diagnostics: Diagnostics = None) -> pd.DataFrame:
+    """
+    Checks (vectorized) that all entries can be imported into KUSSS and returns the entries that
+    should be exported. Entries with a grade that is not one of ``VALID_GRADES`` (e.g., -1 if
+    there was no data to create a grade) are skipped if ``skip_ungraded`` is True. A ValueError
+    is raised if there are invalid matriculation IDs (8 digits), missing study IDs, invalid
+    grades (if not skipped) or duplicate (matriculation ID, study ID) combinations.
+
+    :return: The entries of ``df`` that should be exported.
+    """
+    invalid_msgs = []
+    
+    def check(mask: pd.Series, message: str):
+        if mask.any():
+            rows = df.loc[mask, [matr_id_col, study_id_col, grade_col]].head(10)
+            invalid_msgs.append(f"{mask.sum()} {message}:\n{rows}")
+    
+    grades = pd.to_numeric(df[grade_col], errors="coerce")
+    ungraded = ~grades.isin(VALID_GRADES)
+    if skip_ungraded and ungraded.any():
+        report(diagnostics, "entries without a valid grade were not exported", df, df.index[ungraded], "export")
+        df = df[~ungraded]
+        grades = grades[~ungraded]
+        ungraded = ungraded[~ungraded]
+    matr_ids = df[matr_id_col].astype(str)
+    study_ids = df[study_id_col]
+    check(~matr_ids.str.fullmatch(r"\d{8}"), "entries with invalid matriculation IDs (must be 8 digits)")
+    check(study_ids.isna() | (study_ids.astype(str).str.strip() == ""), "entries without study ID")
+    check(ungraded, f"entries with invalid grades (must be one of {VALID_GRADES})")
+    check(df.duplicated(subset=[matr_id_col, study_id_col], keep=False), "duplicate entries")
+    if invalid_msgs:
+        raise ValueError("cannot export KUSSS grading:\n" + "\n".join(invalid_msgs))
+    return df.assign(**{grade_col: grades.astype(np.int64)})
+
+
+def _sanitize(s: pd.Series, sep: str) -> pd.Series:
+    # The KUSSS format does not support quoting, so neither the separator nor line breaks may appear in the text
+    return s.fillna("").astype(str).str.replace(rf"[{re.escape(sep)}\r\n]+", " ", regex=True)
+
+
+@traced(category="export")
+def write_kusss_grading(df: pd.DataFrame, grading_file: str, sep: str = ";", encoding: str = "utf8",
+                        errors: str = "strict", header: bool = False, matr_id_col: str = "ID number",
+                        study_id_col: str = "Study ID", grade_col: str = "grade",
+                        grade_reason_col: str = "grade_reason", internal_info_col: str = None,
+                        skip_ungraded: bool = True, chunk_size: int = 10_000,
+                        diagnostics: Diagnostics = None) -> int:
+    """
+    Writes a grading CSV file that can be imported into KUSSS, i.e., with the format
+    "matriculationID;studyID;grade;externalInfo;internalInfo" (the official KUSSS documentation
+    only mentions the first three columns, but the last two are also automatically recognized
+    without an explicit header). All entries are validated (see ``validate_kusss_grading``)
+    before anything is written, and the file is then written in a single streaming pass
+    (``chunk_size`` lines at a time).
+
+    :param df: The grading DataFrame (as created by ``Grader.create_grading_file``).
+    :param grading_file: The path of the grading CSV output file.
+    :param sep: The separator character. Default: ";"
+    :param encoding: The encoding of the output file. Default: "utf8"
+    :param errors: How characters that cannot be encoded are handled (see ``open``).
+        Default: "strict"
+    :param header: Whether to write a header line. Default: False
+    :param matr_id_col: The column that contains the matriculation IDs. Default: "ID number"
+    :param study_id_col: The column that contains the study IDs. Default: "Study ID"
+    :param grade_col: The column that contains the grades. Default: "grade"
+    :param grade_reason_col: The column that contains the reasons for the grades, which is
+        exported as external info. Default: "grade_reason"
+    :param internal_info_col: The column that is exported as internal info. Default: None =
+        same as ``grade_reason_col``
+    :param skip_ungraded: Whether to skip entries without a valid grade (see
+        ``validate_kusss_grading``). Default: True
+    :param chunk_size: The number of lines that are written at once. Default: 10000
+    :param diagnostics: If not None, skipped entries are reported to this object instead of
+        issuing a warning. Default: None
+    :return: The number of exported grades.
+    """
+    if internal_info_col is None:
+        internal_info_col = grade_reason_col
+    df = validate_kusss_grading(df, matr_id_col, study_id_col, grade_col, skip_ungraded, diagnostics)
+    os.makedirs(os.path.dirname(os.path.abspath(grading_file)), exist_ok=True)
+    with open(grading_file, "w", encoding=encoding, errors=errors, newline="") as f:
+        if header:
+            f.write(sep.join(["matriculationID", "studyID", "grade", "externalInfo", "internalInfo"]) + "\n")
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            lines = (chunk[matr_id_col].astype(str)
+                     .str.cat([_sanitize(chunk[study_id_col], sep), chunk[grade_col].astype(str),
+                               _sanitize(chunk[grade_reason_col], sep), _sanitize(chunk[internal_info_col], sep)],
+                              sep=sep))
+            f.write("\n".join(lines) + "\n")
+    print(f"KUSSS grading file ({len(df)} grades) written to: '{grading_file}'")
+    return len(df)
+
+
+def write_kusss_gradings(df: pd.DataFrame, directory: str, name: str, course_id_col: str = "Course ID",
+                         diagnostics: Diagnostics = None, **kwargs) -> list[str]:
+    """
+    Writes one KUSSS grading file per course ID (each KUSSS course requires its own import),
+    named "<name>_<course ID>_grading.csv". Entries without a course ID (i.e., students who are
+    not part of any KUSSS course) are not exported.
+
+    :param df: The grading DataFrame (as created by ``Grader.create_grading_file``).
+    :param directory: The directory where the files are stored.
+    :param name: The prefix of the file names (e.g., the course name).
+    :param course_id_col: The column that contains the KUSSS course IDs. Default: "Course ID"
+    :param diagnostics: See ``write_kusss_grading``. Default: None
+    :param kwargs: Additional keyword arguments that are passed to ``write_kusss_grading``.
+    :return: The paths of the written files.
+    """
+    name = re.sub(r"[^\w\-]+", "_", name)
+    no_course = df[course_id_col].isna()
+    if no_course.any():
+        report(diagnostics, "entries without a KUSSS course ID were not exported", df, df.index[no_course],
+               "export")
+    files = []
+    for course_id, course_df in df[~no_course].groupby(course_id_col, sort=True):
+        file = os.path.join(directory, f"{name}_{course_id}_grading.csv")
+        write_kusss_grading(course_df, file, diagnostics=diagnostics, **kwargs)
+        files.append(file)
+    return files
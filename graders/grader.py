@@ -6,7 +6,9 @@ from typing import Iterable, Union, Sequence, Callable
 import numpy as np
 import pandas as pd
 
+from diagnostics import span, traced
 from graders import util
+from graders.export import write_kusss_grading
 
 MOODLE_DE_TO_EN_FULL = {
     "Vorname": "First name",
@@ -156,14 +158,15 @@ class Grader:
         return new_df
     
     # TODO: lots of unused/unnecessary code
+    @traced(category="grade")
     def create_grading_file(self, kdf: pd.DataFrame = None,
                             row_filter: Callable[[pd.Series], bool] = None,
                             warn_if_not_found_in_kusss_participants: bool = False,
-                            input_sep: str = ";", matr_id_col: str = "ID number", study_id_col: str = "Course ID",
+                            input_sep: str = ";", matr_id_col: str = "ID number", study_id_col: str = "Study ID",
                             output_sep: str = ";", header: bool = False, grading_file: str = None,
                             grade_col: str = "grade", grade_reason_col: str = "grade_reason",
                             cols_to_export: Sequence = None, input_encoding: str = "ANSI",
-                            output_encoding: str = "utf8") -> pd.DataFrame:
+                            output_encoding: str = "utf8", processes: int = 1) -> pd.DataFrame:
         """
         Creates a grading CSV file that can be uploaded to KUSSS based on the CSV input
         file(s) that contain the participants/students of some course(s) (exported via KUSSS).
@@ -185,16 +188,14 @@ class Grader:
         :param matr_id_col: The column name of the participants CSV input file(s) that
             contains the matriculation ID. Default: "Matrikelnummer"
         :param study_id_col: The column name of the participants CSV input file(s) that
-            contains the study ID. Default: "SKZ"
+            contains the study ID. Default: "Study ID"
         :param output_sep: The separator character of the grading CSV output file.
             Default: ";"
         :param header: Whether to add a header to the grading CSV output file.
             Default: False
         :param grading_file: If not None, specifies the path where the grading CSV output
-            will be stored. Otherwise, the grading file will be stored at the same location
-            as the input file (or as the first input file if multiple files were specified).
-            Moreover, the default file name will be the same as the (first) input file with
-            "_grading.csv" as the new file name ending. Default: None
+            will be stored (see ``graders.export.write_kusss_grading``). Otherwise, no file
+            is written. Default: None
         :param grade_col: The column name of the grading CSV output file that contains the
             grade (np.int64). Default: "grade"
         :param grade_reason_col: The column name of the grading CSV output file that contains
@@ -204,6 +205,9 @@ class Grader:
         :param input_encoding: The encoding to use when reading each file specified by
             ``kusss_participants_files``. Default: "ANSI"
         :param output_encoding: The encoding to use when writing ``grading_file``. Default: "utf8"
+        :param processes: The number of worker processes that create the grades in parallel (see
+            ``graders.parallel``), which only pays off for expensive ``self._create_grade_row``
+            implementations. Default: 1, i.e., the grades are created in this process
         :return: A tuple containing (as first entry) the final pd.DataFrame that contains all
             information including grades and the reasons for these grades, and as second entry,
             the path of the grading CSV output file, i.e., ``grading_file``.
@@ -229,7 +233,9 @@ class Grader:
         df = self.df.copy()
         
         # apply general processing (changes, filtering)
-        df = self._process_entries(df)
+        with span(f"{type(self).__name__}._process_entries", "grade", rows=len(df)) as s:
+            df = self._process_entries(df)
+            s.set(remaining_rows=len(df))
         self._print(f"size after processing: {df.shape}")
         if len(df) == 0:
             raise ValueError("no entries remain after processing")
@@ -237,7 +243,8 @@ class Grader:
         # apply optional, row-based filtering to only create grades for certain entries
         if row_filter is not None:
             # row_filter yields true if the entry should be kept, so invert the boolean mask
-            exclude = df[~df.apply(row_filter, axis=1)]
+            with span("row filter", "grade", rows=len(df)):
+                exclude = df[~df.apply(row_filter, axis=1)]
             if len(exclude) > 0:
                 df.drop(exclude.index, inplace=True)
                 if len(df) == 0:
@@ -245,27 +252,63 @@ class Grader:
             self._print(f"size after applying row filter: {df.shape}")
         
         # apply the actual grading logic (implemented in concrete course subclasses)
-        df[[grade_col, grade_reason_col]] = df.apply(self._create_grade_row, axis=1)
+        with span(f"{type(self).__name__}._create_grade_row", "grade", rows=len(df), processes=processes):
+            if processes > 1:
+                from graders.parallel import apply_create_grade_row
+                df[[grade_col, grade_reason_col]] = apply_create_grade_row(self, df, processes)
+            else:
+                df[[grade_col, grade_reason_col]] = df.apply(self._create_grade_row, axis=1)
         # TODO: sorting irrelevant for viewing in tables (automatically sorted)
         # # sort according to matriculation ID and study ID to always get the same output order, which
         # # makes a (potential) manual inspection more convenient
         # df.sort_values([matr_id_col, study_id_col], inplace=True)
         
-        # if grading_file is None:
-        #     filename, file_extension = os.path.splitext(kusss_participants_files[0])
-        #     grading_file = filename + "_grading.csv"
-        # # default CSV format for KUSSS grading import: "matriculationID;studyID;grade;externalInfo;internalInfo"
-        # # in the official KUSSS documentation, only "matriculationID;studyID;grade" is actually mentioned, but the last
-        # # two columns "externalInfo" and "internalInfo" are also automatically recognized without an explicit header
-        # if cols_to_export is None:
-        #     # use the same reason for both the external and internal info
-        #     cols_to_export = [matr_id_col, study_id_col, grade_col, grade_reason_col, grade_reason_col]
-        # export_df = df[cols_to_export].copy()
-        # export_df.to_csv(grading_file, sep=output_sep, index=False, header=header, encoding=output_encoding)
-        # self._print(f"KUSSS grading file ({len(df)} grades) written to: '{grading_file}'")
+        if grading_file is not None:
+            write_kusss_grading(df, grading_file, sep=output_sep, encoding=output_encoding, header=header,
+                                matr_id_col=matr_id_col, study_id_col=study_id_col, grade_col=grade_col,
+                                grade_reason_col=grade_reason_col)
         
         return df  #, grading_file
     
+    def get_item_thresholds(self, columns: Sequence[str]) -> dict[str, float]:
+        """
+        Returns the minimum points that are required to pass the individual grading items (e.g., assignments), which
+        are used for the pass rates in the grade statistics (see ``graders.statistics.GradeStatistics``). Only the
+        items that are part of ``columns`` are returned. By default, no item has a threshold.
+        
+        Subclasses are encouraged to change this behavior, if their grading has per-item thresholds.
+        
+        :param columns: The columns of the grading data.
+        :return: A dictionary that maps item columns to their minimum points.
+        """
+        return {}
+    
+    def get_sweep_parameters(self) -> dict[str, float]:
+        """
+        Returns the grading thresholds (names and current values) that can be varied with
+        ``graders.sweep.sweep_thresholds`` and that are expected by ``self._create_grades_vectorized``.
+        By default, there are no such parameters.
+        
+        Subclasses are encouraged to change this behavior together with ``self._create_grades_vectorized``.
+        
+        :return: A dictionary that maps parameter names to their current values.
+        """
+        return {}
+    
+    def _create_grades_vectorized(self, df: pd.DataFrame, params: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Vectorized version of ``self._create_grade_row`` that creates the grades of all rows of the
+        processed pd.DataFrame (see ``self._process_entries``) for multiple threshold scenarios at
+        once. Reasons are not created. With the current parameter values (``self.get_sweep_parameters``),
+        the grades must be the same as the ones of ``self._create_grade_row``.
+        
+        :param df: The processed pd.DataFrame (n rows).
+        :param params: A dictionary that maps each parameter of ``self.get_sweep_parameters`` to an
+            array of shape (k, 1) that contains its values in each of the k scenarios.
+        :return: An integer array of shape (k, n) that contains the grades of each scenario and row.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support vectorized grading")
+    
     def _process_entries(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         This method is called in ``self.create_grading_file`` before creating the grades with
@@ -0,0 +1,218 @@
+import hashlib
+import linecache
+import marshal
+import os
+import re
+import sys
+import threading
+import traceback
+import warnings
+from collections import OrderedDict
+from types import CodeType
+
+from graders.grader import Grader
+
+SOURCE_EXTENSION = ".py"
+CACHE_DIRECTORY = "__pycache__"
+NEW_GRADER_TEMPLATE = '''from graders import util
+from graders.grader import Grader
+
+
+class CustomGrader(Grader):
+    
+    def _create_grade_row(self, row):
+        return util.create_grade(row["Quiz: Exam (Real)"], 100)
+'''
+
+# (Source hash, grader name) -> code object of the most recently compiled sources (shared by all libraries). Graders
+# are also compiled in worker threads, so the cache is only accessed while holding the lock
+_code_cache = OrderedDict()
+_code_cache_lock = threading.Lock()
+_MAX_CACHED_CODES = 128
+
+
+class GraderSourceError(ValueError):
+    """Error in the source code of a grader, including its location (if known) so it can be shown inline."""
+    
+    def __init__(self, msg: str, line: int = None, column: int = None):
+        super().__init__(msg if line is None else f"line {line}: {msg}")
+        self.msg = msg
+        self.line = line
+        self.column = column
+
+
+def _get_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf8")).hexdigest()
+
+
+def _get_filename(name: str) -> str:
+    # Shown in tracebacks (see compile_grader_source)
+    return f"<grader {name}>"
+
+
+def compile_grader_source(source: str, name: str) -> CodeType:
+    """
+    Compiles the source code of a grader. The code objects are cached by the hash of the source (and
+    the name, which is part of the code object), so compiling the same source again (e.g., when
+    switching back to a previous version) is free. Can be called from multiple threads.
+
+    :param source: The source code of a module that defines a ``Grader`` subclass.
+    :param name: The name of the grader (only used in error messages and tracebacks).
+    :return: The compiled code object.
+    :raises GraderSourceError: If the source contains a syntax error.
+    """
+    key = (_get_hash(source), name)
+    with _code_cache_lock:
+        code = _code_cache.get(key)
+        if code is not None:
+            _code_cache.move_to_end(key)
+    if code is None:
+        # Compiled without holding the lock (the same source might then be compiled twice, which is harmless)
+        try:
+            code = compile(source, _get_filename(name), "exec")
+        except SyntaxError as ex:
+            raise GraderSourceError(ex.msg, ex.lineno, ex.offset) from ex
+        _cache_code(key, code)
+    _register_source(source, name)
+    return code
+
+
+def _cache_code(key: tuple[str, str], code: CodeType):
+    with _code_cache_lock:
+        _code_cache[key] = code
+        if len(_code_cache) > _MAX_CACHED_CODES:
+            _code_cache.popitem(last=False)
+
+
+def _register_source(source: str, name: str):
+    # Allows tracebacks of errors in the grader to show the affected source lines
+    filename = _get_filename(name)
+    linecache.cache[filename] = (len(source), None, source.splitlines(keepends=True), filename)
+
+
+def create_grader(code: CodeType, name: str, source: str = None) -> Grader:
+    """
+    Executes the compiled source code of a grader (see ``compile_grader_source``) and returns an
+    instance of the (single) ``Grader`` subclass that it defines. The ``source`` is stored in the
+    grader, so it can be recreated in other processes (see ``graders.parallel``).
+
+    :raises GraderSourceError: If executing the code fails or if it does not define exactly one
+        ``Grader`` subclass.
+    """
+    module_name = "graders.library." + re.sub(r"\W", "_", name)
+    namespace = {"__name__": module_name, "__builtins__": __builtins__}
+    try:
+        exec(code, namespace)
+    except Exception as ex:
+        # Report the innermost location within the grader source
+        lines = [frame.lineno for frame in traceback.extract_tb(ex.__traceback__)
+                 if frame.filename == code.co_filename]
+        raise GraderSourceError(f"{type(ex).__name__}: {ex}", lines[-1] if lines else None) from ex
+    classes = [v for v in namespace.values() if isinstance(v, type) and issubclass(v, Grader)
+               and v.__module__ == module_name]
+    if len(classes) != 1:
+        raise GraderSourceError(f"the source must define exactly one Grader subclass, found {len(classes)}")
+    try:
+        grader = classes[0]()
+    except Exception as ex:
+        raise GraderSourceError(f"could not create {classes[0].__name__}: {type(ex).__name__}: {ex}") from ex
+    grader.source = source
+    grader.name = name
+    return grader
+
+
+def build_grader(source: str, name: str) -> Grader:
+    """Compiles (see ``compile_grader_source``) and instantiates (see ``create_grader``) a grader."""
+    return create_grader(compile_grader_source(source, name), name, source)
+
+
+class GraderLibrary:
+    """
+    On-disk collection of user-defined graders. Each grader is stored as a source file
+    ("<name>.py") in ``directory``, together with its marshalled code object (in "__pycache__"),
+    so loading the library (e.g., at startup) does not compile any sources that did not change.
+    """
+    
+    def __init__(self, directory: str):
+        """
+        :param directory: The directory of the grader source files (created when saving a grader).
+        """
+        self.directory = directory
+    
+    def _get_source_file(self, name: str) -> str:
+        if not name or re.search(r"[\\/:*?\"<>|]", name) or name.startswith("."):
+            raise ValueError(f"invalid grader name '{name}'")
+        return os.path.join(self.directory, name + SOURCE_EXTENSION)
+    
+    def _get_cache_file(self, name: str) -> str:
+        # Code objects are specific to the Python version
+        return os.path.join(self.directory, CACHE_DIRECTORY, f"{name}.{sys.implementation.cache_tag}.code")
+    
+    def get_names(self) -> list[str]:
+        """Returns the names of all graders in the library."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(f[:-len(SOURCE_EXTENSION)] for f in os.listdir(self.directory) if f.endswith(SOURCE_EXTENSION))
+    
+    def get_source(self, name: str) -> str:
+        with open(self._get_source_file(name), "r", encoding="utf8") as f:
+            return f.read()
+    
+    def _get_code(self, name: str, source: str) -> CodeType:
+        # The cached code object if it was compiled from the same source, otherwise, the source is compiled again
+        source_hash = _get_hash(source).encode("ascii")
+        cache_file = self._get_cache_file(name)
+        try:
+            with open(cache_file, "rb") as f:
+                if f.read(len(source_hash)) == source_hash:
+                    code = marshal.load(f)
+                    _cache_code((source_hash.decode("ascii"), name), code)
+                    _register_source(source, name)
+                    return code
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        code = compile_grader_source(source, name)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, "wb") as f:
+                f.write(source_hash)
+                marshal.dump(code, f)
+        except OSError as ex:
+            warnings.warn(f"could not cache the code of grader '{name}': {ex}")
+        return code
+    
+    def load(self, name: str) -> Grader:
+        """Loads the grader with the specified name (see ``create_grader``)."""
+        source = self.get_source(name)
+        return create_grader(self._get_code(name, source), name, source)
+    
+    def load_all(self) -> dict[str, Grader]:
+        """Loads all graders of the library. Graders that cannot be loaded are skipped with a warning."""
+        graders = {}
+        for name in self.get_names():
+            try:
+                graders[name] = self.load(name)
+            except (OSError, GraderSourceError) as ex:
+                warnings.warn(f"could not load grader '{name}': {ex}")
+        return graders
+    
+    def save(self, name: str, source: str) -> Grader:
+        """
+        Stores the source code of a grader in the library (after checking that it can be created).
+
+        :return: The created grader.
+        :raises GraderSourceError: If the grader cannot be created from the source code.
+        """
+        source_file = self._get_source_file(name)
+        grader = build_grader(source, name)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(source_file, "w", encoding="utf8") as f:
+            f.write(source)
+        self._get_code(name, source)
+        return grader
+    
+    def remove(self, name: str):
+        """Removes the grader with the specified name from the library (if it exists)."""
+        for file in [self._get_source_file(name), self._get_cache_file(name)]:
+            if os.path.isfile(file):
+                os.remove(file)
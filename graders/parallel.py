@@ -0,0 +1,144 @@
+"""
+Parallel execution of ``Grader._create_grade_row`` on a process pool. Row functions hold the GIL,
+so a heavy (e.g., custom) grader only uses a single core when it is applied with
+``pd.DataFrame.apply``. Here, the rows are split into shards that are graded by worker processes.
+The numeric columns are copied once into a ``multiprocessing.shared_memory`` block that all
+workers read from, so only the remaining (non-numeric) columns of each shard are pickled.
+"""
+import hashlib
+import multiprocessing
+import os
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from graders.grader import Grader
+
+# Number of shards per worker process (more shards than processes balance uneven row costs)
+SHARDS_PER_PROCESS = 4
+# Alignment of the columns within the shared memory block (in bytes)
+_ALIGNMENT = 64
+
+_pool = None
+_pool_key = None
+# Worker process state: hash of the grader specification (which contains the source code of custom graders) -> grader
+# of the most recently used specifications (so each worker only creates every grader once, but does not keep every
+# edited version of a custom grader)
+_worker_graders = OrderedDict()
+_MAX_WORKER_GRADERS = 4
+
+
+def _init_worker(copy_on_write: bool):
+    # Graders must behave the same as in the calling process (e.g., the GUI, which uses copy-on-write)
+    pd.options.mode.copy_on_write = copy_on_write
+
+
+def get_pool(processes: int) -> ProcessPoolExecutor:
+    """
+    Returns the process pool (created on first use and reused afterward, unless the number of
+    processes or pandas' copy-on-write mode changes). Processes are spawned instead of forked,
+    since forking a process with running threads (e.g., the GUI or background jobs) is unsafe.
+    """
+    global _pool, _pool_key
+    key = (processes, pd.options.mode.copy_on_write)
+    if _pool is None or _pool_key != key:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                    initializer=_init_worker, initargs=(key[1],))
+        _pool_key = key
+    return _pool
+
+
+def _is_shareable(dtype) -> bool:
+    # Plain NumPy booleans, integers and floats (extension types, e.g., "Int64", are pickled instead)
+    return isinstance(dtype, np.dtype) and dtype.kind in "biuf"
+
+
+def _get_grader_spec(grader: Grader) -> bytes:
+    # Graders created from source code (see graders.library) cannot be pickled by reference, since
+    # their classes only exist in this process, so they are recreated from their source instead
+    state = {k: v for k, v in vars(grader).items() if k not in ("df", "source")}
+    source = getattr(grader, "source", None)
+    if source is not None:
+        return pickle.dumps(("source", source, grader.name, state))
+    return pickle.dumps(("class", type(grader), None, state))
+
+
+def _get_worker_grader(spec: bytes) -> Grader:
+    key = hashlib.sha256(spec).digest()
+    grader = _worker_graders.get(key)
+    if grader is not None:
+        _worker_graders.move_to_end(key)
+    else:
+        kind, cls_or_source, name, state = pickle.loads(spec)
+        if kind == "source":
+            from graders.library import build_grader
+            grader = build_grader(cls_or_source, name)
+        else:
+            grader = cls_or_source.__new__(cls_or_source)
+        grader.__dict__.update(state)
+        _worker_graders[key] = grader
+        if len(_worker_graders) > _MAX_WORKER_GRADERS:
+            _worker_graders.popitem(last=False)
+    return grader
+
+
+def _grade_shard(spec: bytes, shm_name: str, n_rows: int, layout: list, start: int, stop: int,
+                 other: pd.DataFrame, columns: list) -> pd.DataFrame:
+    # Executed in the worker processes: grades the rows [start, stop) of the shared numeric columns
+    # (see apply_create_grade_row) together with the pickled remaining columns of these rows
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Copies of the shard rows (views of the shared memory must not outlive it)
+        data = {col: np.ndarray((n_rows,), dtype=dtype, buffer=shm.buf, offset=offset)[start:stop].copy()
+                for col, dtype, offset in layout}
+    finally:
+        shm.close()
+    df = pd.concat([pd.DataFrame(data, index=other.index), other], axis=1)[columns]
+    return df.apply(_get_worker_grader(spec)._create_grade_row, axis=1)
+
+
+def apply_create_grade_row(grader: Grader, df: pd.DataFrame, processes: int = None) -> pd.DataFrame:
+    """
+    Parallel version of ``df.apply(grader._create_grade_row, axis=1)`` (see module docstring).
+
+    :param grader: The grader. Built-in graders must be importable, and graders created from source
+        code (see ``graders.library``) are recreated from their source in the worker processes.
+    :param df: The processed pd.DataFrame to grade.
+    :param processes: The number of worker processes. Default: None = number of CPUs
+    :return: The same pd.DataFrame as ``df.apply(grader._create_grade_row, axis=1)``, i.e., the grades
+        (column 0) and the reasons (column 1) in the same order as the rows of ``df``.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    shared_cols = [c for c in df.columns if _is_shareable(df[c].dtype)]
+    other_df = df.drop(columns=shared_cols)
+    n_rows = len(df)
+    
+    # Copy all shareable columns into a single shared memory block (one aligned array per column)
+    layout, size = [], 0
+    for col in shared_cols:
+        dtype = df[col].dtype
+        layout.append((col, dtype.str, size))
+        size += -(-n_rows * dtype.itemsize // _ALIGNMENT) * _ALIGNMENT
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        for col, dtype, offset in layout:
+            np.ndarray((n_rows,), dtype=dtype, buffer=shm.buf, offset=offset)[:] = df[col].to_numpy()
+        spec = _get_grader_spec(grader)
+        n_shards = max(1, min(n_rows, processes * SHARDS_PER_PROCESS))
+        bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+        pool = get_pool(processes)
+        futures = [pool.submit(_grade_shard, spec, shm.name, n_rows, layout, int(start), int(stop),
+                               other_df.iloc[start:stop], list(df.columns))
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        results = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.concat(results)
@@ -1,3 +1,5 @@
+from collections.abc import Sequence
+
 import numpy as np
 import pandas as pd
 
@@ -22,6 +24,22 @@ THRESHOLD_ALL_A = 0.5
 
 class Python2ExerciseGrader(Grader):
     
+    def get_item_thresholds(self, columns: Sequence[str]) -> dict[str, float]:
+        thresholds = {f"Assignment: Assignment {i + 1} (Real)": MAX_POINTS_A * THRESHOLD_INDIVIDUAL_A
+                      for i in range(N_ASSIGNMENTS)}
+        thresholds["Assignment: Assignment 7 (Project) (Real)"] = MAX_POINTS_PROJECT * THRESHOLD_INDIVIDUAL_A
+        for c in ["Quiz: Exam (Real)", "Quiz: Retry Exam (Real)", "Quiz: Retry Exam 2 (Real)"]:
+            thresholds[c] = MAX_POINTS_EXAM * THRESHOLD_EXAM
+        return {c: t for c, t in thresholds.items() if c in columns}
+    
+    def get_sweep_parameters(self) -> dict[str, float]:
+        return {
+            "threshold_exam": THRESHOLD_EXAM,
+            "threshold_individual_a": THRESHOLD_INDIVIDUAL_A,
+            "threshold_all_a": THRESHOLD_ALL_A,
+            **util.get_grading_parameters(),
+        }
+    
     # TODO: see comment in Python2LectureGrader: maybe instead of filtering them already here, add an option to filter
     #  afterward?
     def _process_entries(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -80,3 +98,25 @@ class Python2ExerciseGrader(Grader):
             a_points += bonus_points
         
         return util.create_grade(e_points + a_points, MAX_POINTS)
+    
+    def _create_grades_vectorized(self, df: pd.DataFrame, params: dict[str, np.ndarray]) -> np.ndarray:
+        # same rules as in _create_grade_row, but for all rows (n) and scenarios (k) at once; since all failed
+        # requirements result in a 5, their order does not matter here
+        assignments = df[[f"Assignment: Assignment {i + 1} (Real)" for i in range(N_ASSIGNMENTS)]]
+        assignments = np.nan_to_num(assignments.to_numpy(dtype=float))  # (n, N_ASSIGNMENTS)
+        project = np.nan_to_num(df["Assignment: Assignment 7 (Project) (Real)"].to_numpy(dtype=float))  # (n,)
+        threshold_individual_a = params["threshold_individual_a"]  # (k, 1)
+        n_failed = (assignments[np.newaxis] < (MAX_POINTS_A * threshold_individual_a)[..., np.newaxis]).sum(axis=2)
+        n_failed += project < MAX_POINTS_PROJECT * threshold_individual_a  # (k, n)
+        a_points = assignments.sum(axis=1) + project
+        
+        # most recent exam takes precedence
+        e1, e2, e3 = [df[c].to_numpy(dtype=float) for c in ["Quiz: Exam (Real)", "Quiz: Retry Exam (Real)",
+                                                             "Quiz: Retry Exam 2 (Real)"]]
+        e_points = np.where(~np.isnan(e3), e3, np.where(~np.isnan(e2), e2, e1))
+        
+        failed = ((n_failed > MAX_N_ASSIGNMENTS_FAILED) | (a_points < MAX_POINTS_ALL_A * params["threshold_all_a"])
+                  | np.isnan(e_points) | (e_points < MAX_POINTS_EXAM * params["threshold_exam"]))
+        bonus_points = np.nan_to_num(df["Assignment: Assignment 8 (Bonus) (Real)"].to_numpy(dtype=float))
+        grades = util.create_grades(e_points + (a_points + bonus_points), MAX_POINTS, util.get_grading(params))
+        return np.where(failed, 5, grades)
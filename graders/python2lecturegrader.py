@@ -1,3 +1,5 @@
+from collections.abc import Sequence
+
 import numpy as np
 import pandas as pd
 
@@ -5,10 +7,19 @@ from graders import util
 from graders.grader import Grader
 
 MAX_POINTS = 100
+THRESHOLD_EXAM = 0.5
 
 
 class Python2LectureGrader(Grader):
     
+    def get_item_thresholds(self, columns: Sequence[str]) -> dict[str, float]:
+        # The lowest positive grade of util.create_grade
+        return {c: MAX_POINTS * THRESHOLD_EXAM for c in ["Quiz: Exam (Real)", "Quiz: Retry Exam (Real)",
+                                                         "Quiz: Retry Exam 2 (Real)"] if c in columns}
+    
+    def get_sweep_parameters(self) -> dict[str, float]:
+        return util.get_grading_parameters()
+    
     def _create_grade_row(self, row: pd.Series) -> pd.Series:
         e1 = row["Quiz: Exam (Real)"]
         e2 = row["Quiz: Retry Exam (Real)"]
@@ -25,3 +36,10 @@ class Python2LectureGrader(Grader):
             # TODO: maybe add option in view (or before export) to filter -1 values?
             return pd.Series([-1, "no data to create grade"])
         return util.create_grade(points, MAX_POINTS)
+    
+    def _create_grades_vectorized(self, df: pd.DataFrame, params: dict[str, np.ndarray]) -> np.ndarray:
+        e1, e2, e3 = [df[c].to_numpy(dtype=float) for c in ["Quiz: Exam (Real)", "Quiz: Retry Exam (Real)",
+                                                             "Quiz: Retry Exam 2 (Real)"]]
+        points = np.where(~np.isnan(e3), e3, np.where(~np.isnan(e2), e2, e1))
+        grades = util.create_grades(points, MAX_POINTS, util.get_grading(params))
+        return np.where(np.isnan(points), -1, grades)
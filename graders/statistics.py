@@ -0,0 +1,171 @@
+import copy
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import traced
+from graders.export import VALID_GRADES
+
+# Prefixes of the columns that contain the points of individual grading items (see loaders.get_moodle_df)
+ITEM_PREFIXES = ("Assignment:", "Quiz:")
+
+
+def get_item_columns(df: pd.DataFrame) -> list[str]:
+    """Returns the columns of ``df`` that contain the points of grading items (assignments and quizzes)."""
+    return [c for c in df.columns if isinstance(c, str) and c.startswith(ITEM_PREFIXES)]
+
+
+def _get_values(df: pd.DataFrame, item_cols: list[str]) -> np.ndarray:
+    # The points of the specified items as float array (missing or invalid points = NaN)
+    values = df[item_cols]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in values.dtypes):
+        values = values.apply(pd.to_numeric, errors="coerce")
+    return values.to_numpy(dtype=float, na_value=np.nan)
+
+
+class GradeStatistics:
+    """
+    Statistics of a grading table (see ``Grader.create_grading_file``): the grade distribution, the participation,
+    average points and pass rate of each grading item (assignments and quizzes), and overall participation counts.
+
+    All statistics are derived from additive aggregates (counts and sums). When a new version of the grading table is
+    passed to ``update`` (e.g., after new grading data was loaded), only the contributions of the removed, changed and
+    added rows are subtracted/added, and only for the items whose values actually changed. Instances are never
+    modified (``update`` returns a new instance), so they can be updated in background jobs.
+    """
+    
+    def __init__(self, thresholds: dict[str, float] = None, key: str = "ID number", grade_col: str = "grade"):
+        """
+        :param thresholds: The minimum points required to pass each item (items without threshold have no pass rate).
+            See ``Grader.get_item_thresholds``. Default: None = no thresholds
+        :param key: The column that uniquely identifies each row. Default: "ID number"
+        :param grade_col: The column that contains the grades. Default: "grade"
+        """
+        self.thresholds = {} if thresholds is None else dict(thresholds)
+        self.key = key
+        self.grade_col = grade_col
+        # The grading table the statistics were computed for
+        self.df = None
+        self.item_cols = []
+        self.n_students = 0
+        # Students who participated in at least one item
+        self.n_participants = 0
+        # Grade -> number of students
+        self.grade_counts = Counter()
+        # Number of participants, sum of points and number of passes per item (same order as "item_cols")
+        self.participants = np.zeros(0)
+        self.points = np.zeros(0)
+        self.passed = np.zeros(0)
+        # The number of rows and items whose contributions were recomputed by the most recent update
+        self.recomputed = (0, 0)
+        # The item values, grades and key uniqueness of "df", so the next update does not have to read them again
+        self._values = None
+        self._grades = None
+        self._unique = False
+    
+    def _apply(self, values: np.ndarray, grades: np.ndarray, items: np.ndarray, sign: int):
+        # Adds (sign = 1) or subtracts (sign = -1) the contributions of the rows with the specified item values and
+        # grades, but only to the aggregates of the specified items (boolean mask)
+        self.n_students += sign * len(values)
+        participated = ~np.isnan(values)
+        self.n_participants += sign * int(participated.any(axis=1).sum())
+        if grades is not None:
+            counts = pd.Series(grades, dtype=object).value_counts()
+            self.grade_counts.update({g: sign * int(n) for g, n in counts.items()})
+            self.grade_counts = +self.grade_counts  # Removes zero counts
+        values, participated = values[:, items], participated[:, items]
+        thresholds = np.array([self.thresholds.get(c, np.nan) for c, x in zip(self.item_cols, items) if x])
+        with np.errstate(invalid="ignore"):
+            passed = participated & (values >= thresholds)
+        self.participants[items] += sign * participated.sum(axis=0)
+        self.points[items] += sign * np.where(participated, values, 0).sum(axis=0)
+        self.passed[items] += sign * passed.sum(axis=0)
+    
+    def _set_df(self, df: pd.DataFrame, values: np.ndarray, grades: np.ndarray, unique: bool):
+        self.df = df
+        self._values = values
+        self._grades = grades
+        self._unique = unique
+    
+    @traced(category="grade")
+    def update(self, df: pd.DataFrame, thresholds: dict[str, float] = None) -> "GradeStatistics":
+        """
+        Returns the statistics of ``df``, which is usually a newer version of the grading table these statistics were
+        computed for. If the items, the thresholds or the key column changed, all statistics are computed again.
+
+        :param df: The (new) grading table.
+        :param thresholds: The new item thresholds. Default: None = the current thresholds
+        """
+        thresholds = self.thresholds if thresholds is None else dict(thresholds)
+        item_cols = get_item_columns(df)
+        values = _get_values(df, item_cols)
+        grades = df[self.grade_col].to_numpy(dtype=object) if self.grade_col in df.columns else None
+        unique = self.key in df.columns and not df[self.key].duplicated().any()
+        if (self.df is None or not unique or not self._unique or thresholds != self.thresholds
+                or item_cols != self.item_cols or (grades is None) != (self._grades is None)):
+            result = GradeStatistics(thresholds, self.key, self.grade_col)
+            result.item_cols = item_cols
+            result.participants, result.points, result.passed = np.zeros((3, len(item_cols)))
+            result._apply(values, grades, np.ones(len(item_cols), dtype=bool), 1)
+            result._set_df(df, values, grades, unique)
+            result.recomputed = (len(df), len(item_cols))
+            return result
+        
+        # Align the rows on the key (position of each old row in the new table, -1 = removed) and find the cells that
+        # changed (missing values are considered equal). The values of the old table are cached (see _set_df).
+        old_keys, new_keys = self.df[self.key].to_numpy(), df[self.key].to_numpy()
+        if len(old_keys) == len(new_keys) and (old_keys == new_keys).all():
+            positions = np.arange(len(new_keys))
+        else:
+            positions = pd.Index(new_keys).get_indexer(old_keys)
+        in_new = positions >= 0
+        in_old = np.zeros(len(df), dtype=bool)
+        in_old[positions[in_new]] = True
+        old_values = self._values[in_new]
+        new_values = values[positions[in_new]]
+        changed = (old_values != new_values) & ~(np.isnan(old_values) & np.isnan(new_values))
+        changed_rows = changed.any(axis=1)
+        if grades is not None:
+            old_grades = self._grades[in_new]
+            new_grades = grades[positions[in_new]]
+            changed_rows |= (old_grades != new_grades) & ~(pd.isna(old_grades) & pd.isna(new_grades))
+        
+        result = copy.copy(self)
+        result.grade_counts = Counter(self.grade_counts)
+        result.participants, result.points, result.passed = (self.participants.copy(), self.points.copy(),
+                                                              self.passed.copy())
+        result._set_df(df, values, grades, unique)
+        # Removed and added rows contribute to all items, otherwise, only the changed items are affected
+        items = changed.any(axis=0) if in_new.all() and in_old.all() else np.ones(len(item_cols), dtype=bool)
+        changed_positions = np.flatnonzero(in_new)[changed_rows]
+        old_rows = np.concatenate([np.flatnonzero(~in_new), changed_positions])
+        new_rows = np.concatenate([np.flatnonzero(~in_old), positions[changed_positions]])
+        result._apply(self._values[old_rows], None if grades is None else self._grades[old_rows], items, -1)
+        result._apply(values[new_rows], None if grades is None else grades[new_rows], items, 1)
+        result.recomputed = (len(old_rows) + len(new_rows), int(items.sum()))
+        return result
+    
+    def get_items_df(self) -> pd.DataFrame:
+        """Returns the participation, average points and pass rate (if there is a threshold) of each item."""
+        participants = pd.Series(self.participants).replace(0, np.nan)
+        thresholds = pd.Series([self.thresholds.get(c, np.nan) for c in self.item_cols], dtype=float)
+        passed = pd.Series(self.passed).where(thresholds.notna())
+        return pd.DataFrame({
+            "Item": self.item_cols,
+            "Participants": self.participants.astype(np.int64),
+            "Average points": (pd.Series(self.points) / participants).round(2),
+            "Threshold": thresholds,
+            "Passed": passed,
+            "Pass rate": (passed / participants).round(3),
+        })
+    
+    def get_grade_counts(self) -> pd.Series:
+        """Returns the number of students per grade (all valid grades, followed by any other values)."""
+        others = sorted([g for g in self.grade_counts if g not in VALID_GRADES], key=str)
+        return pd.Series({g: self.grade_counts.get(g, 0) for g in VALID_GRADES + others}, dtype=np.int64)
+    
+    def get_participation(self) -> dict[str, int]:
+        """Returns the number of "students", "participants" (at least one item) and "graded" students."""
+        graded = sum(n for g, n in self.grade_counts.items() if g in VALID_GRADES)
+        return {"students": self.n_students, "participants": self.n_participants, "graded": graded}
@@ -0,0 +1,67 @@
+import itertools
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import span, traced
+from graders.export import VALID_GRADES
+from graders.grader import Grader
+
+
+@traced(category="grade")
+def sweep_thresholds(grader: Grader, grid: dict[str, Iterable[float]], df: pd.DataFrame = None,
+                     max_cells: int = 10_000_000) -> pd.DataFrame:
+    """
+    What-if analysis of the grading thresholds: creates the grades for every combination of the
+    specified threshold values (Cartesian product of ``grid``) and summarizes each combination by
+    its grade distribution and the number of grades that differ from the current grades. All
+    combinations are evaluated at once (see ``Grader._create_grades_vectorized``) instead of
+    grading every row of every combination separately.
+
+    :param grader: The grader whose thresholds are varied (see ``Grader.get_sweep_parameters``).
+    :param grid: A dictionary that maps parameter names to the values to evaluate. Parameters that
+        are not part of ``grid`` keep their current value.
+    :param df: The grading data. Default: None = ``grader.df``
+    :param max_cells: The maximum number of (combination, row) pairs that are graded at once, which
+        bounds the required memory. Default: 10_000_000
+    :return: A pd.DataFrame with one row per combination that contains the parameter values, the
+        number of students per grade (columns "1" to "5" and "other", e.g., -1 if there is no data),
+        the number of "changed" grades and the "pass rate" (grades 1 to 4).
+    """
+    current = grader.get_sweep_parameters()
+    if not current:
+        raise ValueError(f"{type(grader).__name__} does not have any parameters to sweep")
+    unknown = [p for p in grid if p not in current]
+    if unknown:
+        raise ValueError(f"unknown parameters {unknown}, expected any of {list(current)}")
+    df = (grader.df if df is None else df).copy()
+    with span(f"{type(grader).__name__}._process_entries", "grade", rows=len(df)):
+        df = grader._process_entries(df)
+    if len(df) == 0:
+        raise ValueError("no entries remain after processing")
+    
+    names = list(current)
+    combinations = np.array(list(itertools.product(*[grid.get(p, [current[p]]) for p in names])), dtype=float)
+    if len(combinations) == 0:
+        raise ValueError("the grid does not contain any values")
+    baseline = grader._create_grades_vectorized(df, {p: np.array([[v]], dtype=float) for p, v in current.items()})[0]
+    
+    counts = {str(g): [] for g in VALID_GRADES}
+    other, changed = [], []
+    chunk_size = max(1, max_cells // len(df))
+    for start in range(0, len(combinations), chunk_size):
+        chunk = combinations[start:start + chunk_size]
+        grades = grader._create_grades_vectorized(df, {p: chunk[:, [i]] for i, p in enumerate(names)})
+        for g in VALID_GRADES:
+            counts[str(g)].append((grades == g).sum(axis=1))
+        other.append((~np.isin(grades, VALID_GRADES)).sum(axis=1))
+        changed.append((grades != baseline).sum(axis=1))
+    
+    result = pd.DataFrame(combinations, columns=names)
+    for g, c in counts.items():
+        result[g] = np.concatenate(c)
+    result["other"] = np.concatenate(other)
+    result["changed"] = np.concatenate(changed)
+    result["pass rate"] = (result[[str(g) for g in VALID_GRADES if g != 5]].sum(axis=1) / len(df)).round(3)
+    return result
@@ -1,8 +1,12 @@
 import re
 
+import numpy as np
 import pandas as pd
 
 
+DEFAULT_GRADING = {1: 0.875, 2: 0.75, 3: 0.625, 4: 0.50}
+
+
 def create_grade(points, max_points, grading: dict = None) -> pd.Series:
     """
     Creates a grade object based on the percentage of achieved points, given the
@@ -48,7 +52,7 @@ def create_grade(points, max_points, grading: dict = None) -> pd.Series:
     #  this sequence is then simply checked sequentially (possibly with a parameterized
     #  default value if none of "grading" match, or, raising some exception)
     if grading is None:
-        grading = {1: 0.875, 2: 0.75, 3: 0.625, 4: 0.50}
+        grading = DEFAULT_GRADING
     total = points / max_points
     if total >= grading[1]:
         return pd.Series([1, ""])
@@ -61,6 +65,44 @@ def create_grade(points, max_points, grading: dict = None) -> pd.Series:
     return pd.Series([5, "total threshold not reached"])
 
 
+def create_grades(points: np.ndarray, max_points, grading: dict = None) -> np.ndarray:
+    """
+    Vectorized version of ``create_grade`` that only returns the grades (without reasons).
+    The grading percentages can also be arrays, which are broadcast against ``points``
+    (e.g., percentages of shape (k, 1) and points of shape (n,) yield grades of shape
+    (k, n), i.e., the grades of all n students for k different grading schemes).
+    
+    :param points: The absolute points that were achieved.
+    :param max_points: The absolute maximum points that can be achieved.
+    :param grading: See ``create_grade``. Default: {1: 0.875, 2: 0.75, 3: 0.625, 4: 0.50}
+    :return: An integer array of grades (1 to 5).
+    """
+    if grading is None:
+        grading = DEFAULT_GRADING
+    total = np.asarray(points) / max_points
+    shape = np.broadcast_shapes(total.shape, *[np.shape(grading[g]) for g in range(1, 5)])
+    grades = np.full(shape, 5, dtype=np.int64)
+    # Check from worst to best grade, so that the best matching grade is the one that remains
+    for g in range(4, 0, -1):
+        grades[np.broadcast_to(total >= grading[g], shape)] = g
+    return grades
+
+
+def get_grading_parameters(grading: dict = None) -> dict[str, float]:
+    """
+    Returns the grading percentages of ``grading`` (default: ``DEFAULT_GRADING``) as
+    parameters "grade_1" to "grade_4" (e.g., for ``graders.sweep.sweep_thresholds``).
+    """
+    if grading is None:
+        grading = DEFAULT_GRADING
+    return {f"grade_{g}": grading[g] for g in range(1, 5)}
+
+
+def get_grading(params: dict) -> dict:
+    """Inverse of ``get_grading_parameters``."""
+    return {g: params[f"grade_{g}"] for g in range(1, 5)}
+
+
 def check_matr_id_format(s: pd.Series):
     """
     Checks if the specified pd.Series object contains matriculation IDs in the
@@ -0,0 +1,3 @@
+from .incremental import DownloadsWatcher, get_export_base_name, update_changed_rows, update_kusss_rows
+from .kusss import get_kusss_course_id, get_kusss_df, merge_moodle_and_kusss_dfs
+from .moodle import get_moodle_df, moodle_df_to_en
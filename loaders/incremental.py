@@ -0,0 +1,175 @@
+import os
+import re
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import Diagnostics, traced
+from .kusss import get_kusss_course_id, merge_moodle_and_kusss_dfs
+
+
+def get_export_base_name(file: str) -> str:
+    """
+    Returns the name of an exported file without extension, browser copy suffix (e.g., "Grades (1).csv") and trailing
+    timestamp (e.g., "Grades-20240131_1200.csv"), i.e., the part of the name that is the same for all exports of the
+    same data.
+    """
+    name = os.path.splitext(os.path.basename(file))[0]
+    name = re.sub(r" \(\d+\)$", "", name)
+    return re.sub(r"[-_ ]\d[\d_\-]*$", "", name)
+
+
+class DownloadsWatcher:
+    """
+    Detects new exports in a directory (usually the downloads folder) by polling. KUSSS participant exports are
+    recognized by the course ID in their name (see ``get_kusss_course_id``), Moodle exports by their base name (see
+    ``get_export_base_name``). A file is only reported once its size and modification time did not change between two
+    polls, so partially downloaded files are never reported. Files that already exist when the watcher is created are
+    ignored.
+    """
+    MOODLE = "moodle"
+    KUSSS = "kusss"
+    
+    def __init__(self, directory: str, kusss_course_ids: Iterable[str] = (), moodle_base_names: Iterable[str] = ()):
+        """
+        :param directory: The directory to watch.
+        :param kusss_course_ids: The course IDs (without dot, e.g., "340111") of KUSSS participant exports that
+            should be reported. Can be changed at any time via the attribute of the same name.
+        :param moodle_base_names: The base names of Moodle exports that should be reported. Can be changed at any
+            time via the attribute of the same name.
+        """
+        self.directory = directory
+        self.kusss_course_ids = set(kusss_course_ids)
+        self.moodle_base_names = set(moodle_base_names)
+        # File -> (size, modification time) of all files that were already reported (or ignored)
+        self._seen = self._scan()
+        # File -> (size, modification time) of new or changed files that might still be written
+        self._pending = {}
+    
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return {}
+        with entries:
+            stats = {}
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(".csv"):
+                    stat = entry.stat()
+                    stats[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            return stats
+    
+    def classify(self, file: str) -> str:
+        """Returns ``DownloadsWatcher.KUSSS``, ``DownloadsWatcher.MOODLE`` or None (not a watched export)."""
+        if get_kusss_course_id(file) in self.kusss_course_ids:
+            return DownloadsWatcher.KUSSS
+        if get_export_base_name(file) in self.moodle_base_names:
+            return DownloadsWatcher.MOODLE
+        return None
+    
+    def poll(self) -> list[tuple[str, str]]:
+        """
+        Returns all watched exports that were completely written since the last poll as (kind, file) tuples (see
+        ``classify``). Moodle exports are returned first (so that KUSSS participants can be merged into new Moodle
+        entries), otherwise, the exports are ordered by their modification time.
+        """
+        current = self._scan()
+        new = []
+        for file, stat in current.items():
+            if self._seen.get(file) == stat:
+                continue
+            if self._pending.get(file) != stat:
+                # New or still changing, so wait for the next poll
+                self._pending[file] = stat
+                continue
+            del self._pending[file]
+            self._seen[file] = stat
+            kind = self.classify(file)
+            if kind is not None:
+                new.append((kind, file))
+        self._pending = {file: stat for file, stat in self._pending.items() if file in current}
+        return sorted(new, key=lambda x: (x[0] != DownloadsWatcher.MOODLE, current[x[1]][1]))
+
+
+def _changed(old: pd.DataFrame, new: pd.DataFrame) -> pd.Series:
+    # Element-wise comparison where missing values are considered equal
+    return (~((old == new) | (old.isna() & new.isna()))).any(axis=1)
+
+
+@traced(category="merge")
+def update_changed_rows(df: pd.DataFrame, new_df: pd.DataFrame, key: str = "ID number", add_columns: bool = True,
+                        remove_missing: bool = True) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Updates ``df`` with a newer export of the same data (e.g., a new Moodle export). The rows are aligned on ``key``:
+    rows whose values changed are overwritten, new rows are appended, and rows that are no longer part of the export
+    are removed (if ``remove_missing`` is True). Unchanged rows stay as they are, and columns of ``df`` that are not
+    part of ``new_df`` (e.g., merged KUSSS information) are kept.
+
+    :param df: The current DataFrame.
+    :param new_df: The new export.
+    :param key: The column that uniquely identifies each row in both DataFrames. Default: "ID number"
+    :param add_columns: Whether columns of ``new_df`` that are not part of ``df`` (e.g., a new assignment) are added.
+        Otherwise, only the existing columns are updated. Default: True
+    :param remove_missing: Whether rows that are not part of ``new_df`` are removed. Default: True
+    :return: A tuple containing the updated DataFrame (with a new, consecutive index) and the numbers of "changed",
+        "added" and "removed" rows.
+    """
+    if new_df[key].duplicated().any():
+        raise ValueError(f"the new data contains duplicate '{key}' entries")
+    cols = [c for c in new_df.columns if c != key and (add_columns or c in df.columns)]
+    new = new_df.set_index(key)
+    in_new = df[key].isin(new.index)
+    result = df[in_new].copy() if remove_missing else df.copy()
+    for c in cols:
+        if c not in result.columns:
+            result[c] = pd.Series(np.nan, index=result.index, dtype=object)
+    
+    matched = result[key].isin(new.index)
+    old_values = result.loc[matched, cols].astype(object)
+    new_values = new.loc[result.loc[matched, key], cols].astype(object).set_axis(old_values.index)
+    changed = _changed(old_values, new_values)
+    if changed.any():
+        # Temporarily object columns, so values of a different type do not raise warnings (the final dtypes are
+        # inferred again below)
+        result = result.astype({c: object for c in cols})
+        result.loc[changed[changed].index, cols] = new_values[changed]
+    
+    added = new_df[~new_df[key].isin(df[key])]
+    result = pd.concat([result, added[[key] + cols]], ignore_index=True).infer_objects()
+    removed = int((~in_new).sum()) if remove_missing else 0
+    counts = {"changed": int(changed.sum()), "added": len(added), "removed": removed}
+    return result, counts
+
+
+@traced(category="merge")
+def update_kusss_rows(df: pd.DataFrame, kusss_df: pd.DataFrame, matr_id_col: str = "ID number",
+                      study_id_col: str = "Study ID", course_id_col: str = "Course ID",
+                      diagnostics: Diagnostics = None) -> tuple[pd.DataFrame, dict[str, int]]:
+    """
+    Updates ``df`` with a newer KUSSS participants export (see ``get_kusss_df``): students who are part of the export
+    get its study and course ID, and students who were assigned to one of the exported courses but are no longer part
+    of the export (e.g., unregistered students) are unassigned. In contrast to ``merge_moodle_and_kusss_dfs``, the
+    same course can be updated repeatedly. If ``df`` was never merged with KUSSS participants before, the two
+    DataFrames are simply merged.
+
+    :return: A tuple containing the updated DataFrame and the numbers of "changed", "added" (always 0) and "removed"
+        (always 0) rows.
+    """
+    if study_id_col not in df.columns or course_id_col not in df.columns:
+        result = merge_moodle_and_kusss_dfs(df, kusss_df, matr_id_col, study_id_col, course_id_col,
+                                            diagnostics=diagnostics)
+        return result, {"changed": int(result[course_id_col].notna().sum()), "added": 0, "removed": 0}
+    
+    cols = [study_id_col, course_id_col]
+    lookup = kusss_df.drop_duplicates(matr_id_col, keep="last").set_index(matr_id_col)[cols]
+    old_values = df[cols].astype(object)
+    new_values = old_values.copy()
+    in_export = df[matr_id_col].isin(lookup.index)
+    new_values.loc[in_export, cols] = lookup.loc[df.loc[in_export, matr_id_col], cols].to_numpy()
+    unregistered = ~in_export & df[course_id_col].isin(kusss_df[course_id_col].unique())
+    new_values.loc[unregistered, cols] = np.nan
+    changed = _changed(old_values, new_values)
+    result = df.astype({c: object for c in cols})
+    result.loc[changed, cols] = new_values[changed]
+    return result, {"changed": int(changed.sum()), "added": 0, "removed": 0}
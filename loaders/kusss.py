@@ -0,0 +1,150 @@
+import os.path
+import re
+from collections.abc import Iterable
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import Diagnostics, report, span, traced
+from util import RowIndex
+
+# TODO: hard-coded assumption
+KUSSS_COURSE_ID_PATTERN = r"\d{3}\.\d{3}|\d{6}"
+
+
+def get_kusss_course_id(kusss_participants_file: str) -> Union[str, None]:
+    """
+    Returns the course ID (without dot, e.g., "340111") that is part of the name of a KUSSS participants export, or
+    None if the name does not contain a course ID.
+    """
+    match = re.search(KUSSS_COURSE_ID_PATTERN, os.path.basename(kusss_participants_file))
+    return None if match is None else match.group().replace(".", "")
+
+
+@traced(category="load")
+def get_kusss_df(
+        kusss_participants_files: Union[str, Iterable[str]],
+        sep: str = ";",
+        matr_id_col: str = "Matrikelnummer",
+        study_id_col: str = "SKZ",
+        encoding: str = "ANSI",
+        course_id_col: str = "Course ID",
+        diagnostics: Diagnostics = None,
+):
+    # TODO: hard-coded parameters should be from config file
+    if isinstance(kusss_participants_files, str):
+        kusss_participants_files = [kusss_participants_files]
+    dfs = []
+    for f in kusss_participants_files:
+        with span("read KUSSS CSV", "load", bytes=os.path.getsize(f)) as s:
+            df = pd.read_csv(f, sep=sep, usecols=[matr_id_col, study_id_col], encoding=encoding, dtype=str)
+            s.set(rows=len(df))
+        course_id = get_kusss_course_id(f)
+        if course_id is None:
+            raise ValueError(f"file name does not contain a KUSSS course ID: '{f}'")
+        df[course_id_col] = course_id
+        dfs.append(df)
+    
+    # Check duplicate entries (students who are found multiple times)
+    full_df = pd.concat(dfs, ignore_index=True)
+    ids = full_df[matr_id_col]
+    if ids.dtype != object or ids.apply(lambda x: re.match(r"k\d{8}$", x) is None).any():
+        raise ValueError(f"series does not contain valid ('k<8-digit-matr-id>') matriculation IDs: {ids}")
+    full_df[matr_id_col] = ids.str.slice(start=1)
+    df = full_df.copy().drop_duplicates()
+    diff = full_df.index[full_df.duplicated()]
+    if len(diff) > 0:
+        report(diagnostics, "duplicate entries were dropped (might be OK, e.g., if a student was unregistered from "
+                            "one course but the export still contains an entry)", full_df, diff, "get_kusss_df")
+    
+    # TODO: hard-coded
+    return df.rename(columns={
+        matr_id_col: "ID number",
+        study_id_col: "Study ID"
+    })
+
+
+@traced(category="merge")
+def merge_moodle_and_kusss_dfs(
+        moodle_df: pd.DataFrame,
+        kusss_df: pd.DataFrame,
+        matr_id_col: str = "ID number",
+        study_id_col: str = "Study ID",
+        course_id_col: str = "Course ID",
+        warn_if_not_found_in_kusss_participants: bool = False,
+        moodle_index: RowIndex = None,
+        diagnostics: Diagnostics = None,
+) -> pd.DataFrame:
+    """
+    Merges KUSSS participants (see ``get_kusss_df``) into Moodle participants. If the Moodle participants already
+    contain study or course IDs (e.g., from previously merged KUSSS participants of another course), the study and
+    course IDs of the matching students are set instead.
+
+    :param moodle_index: A ``RowIndex`` of ``moodle_df`` on ``matr_id_col`` (e.g., the one maintained by the students
+        model), which is used to match the students. Default: None = a new index is built
+    """
+    # Remove duplicate columns after merging, but special treatment for existing course ID column, where we need to keep
+    # the original and merge the new data into it
+    if study_id_col in moodle_df.columns or course_id_col in moodle_df.columns:
+        df = moodle_df.copy()
+        if study_id_col not in moodle_df.columns:
+            df[study_id_col] = np.nan
+        if course_id_col not in moodle_df.columns:
+            df[course_id_col] = np.nan
+        if moodle_index is None:
+            moodle_index = RowIndex(moodle_df, matr_id_col)
+        moodle_index.check(moodle_df)
+        # Row position of each KUSSS entry in the Moodle DataFrame (-1 in case there is a KUSSS entry but no Moodle
+        # entry, e.g., due to drop out)
+        positions = moodle_index.get_positions(kusss_df[matr_id_col])
+        found = positions >= 0
+        multiple = found & moodle_index.is_duplicated(kusss_df[matr_id_col])
+        if multiple.any():
+            matr_id = kusss_df[matr_id_col].iloc[np.flatnonzero(multiple)[0]]
+            raise ValueError(f"multiple matches for single matriculation ID {matr_id}:\n"
+                             f"{df[df[matr_id_col] == matr_id]}")
+        kusss_found = kusss_df[found]
+        moodle_found = df.iloc[positions[found]]
+        old_study_ids = moodle_found[study_id_col].to_numpy()
+        different = ~pd.isna(old_study_ids) & (old_study_ids != kusss_found[study_id_col].to_numpy())
+        if different.any():
+            i = np.flatnonzero(different)[0]
+            # TODO: this case is in fact possible (e.g., lecture with study ID 123 and exercise with study ID
+            #  456) --> should support this (need to make separate "Study ID" columns for each course_id_col)
+            raise ValueError(f"student with different study IDs:\n{moodle_found.iloc[i]}\n{kusss_found.iloc[i]}")
+        # A student who is part of multiple KUSSS entries is already assigned by the first of them
+        assigned = ~pd.isna(moodle_found[course_id_col].to_numpy()) | kusss_found[matr_id_col].duplicated().to_numpy()
+        if assigned.any():
+            i = np.flatnonzero(assigned)[0]
+            # TODO: this can theoretically happen (students is registered for multiple exercise classes), but
+            #  this is then actually an error that should be corrected in KUSSS
+            raise ValueError(f"student already has an assigned '{course_id_col}':\n"
+                             f"{moodle_found.iloc[i]}\n{kusss_found.iloc[i]}")
+        df = df.astype({study_id_col: object, course_id_col: object})
+        cols = [df.columns.get_loc(study_id_col), df.columns.get_loc(course_id_col)]
+        df.iloc[positions[found], cols] = kusss_found[[study_id_col, course_id_col]].to_numpy()
+    else:
+        df = moodle_df.merge(kusss_df, on=matr_id_col, how="left", suffixes=("", "_y"))
+        df.drop(df.filter(regex="_y$").columns, axis=1, inplace=True)
+    
+    print(f"size after merging with KUSSS participants {kusss_df.shape}: {df.shape}")
+    diff = kusss_df.index[~kusss_df[matr_id_col].isin(df[matr_id_col])]
+    if len(diff) > 0:
+        report(diagnostics, "KUSSS participants were not part of the main Moodle participants (might be OK, e.g., if "
+                            "students dropped out/are no longer active)", kusss_df, diff,
+               "merge_moodle_and_kusss_dfs")
+    # TODO: not really necessary since the following are just the nan-entries after merging "left"
+    if warn_if_not_found_in_kusss_participants:
+        diff = moodle_df.index[~moodle_df[matr_id_col].isin(kusss_df[matr_id_col])]
+        if len(diff) > 0:
+            report(diagnostics, "entries were not part of the KUSSS participants, so they cannot be graded (might be "
+                                "OK, e.g., if there is both a lecture and exercise, or multiple mutually exclusive "
+                                "exercise groups, with a joint Moodle page, and these students deliberately only "
+                                "registered for one of the two)", moodle_df, diff,
+                   "merge_moodle_and_kusss_dfs")
+    # Reorder columns
+    df.insert(4, study_id_col, df.pop(study_id_col))  # TODO: hard-coded insertion index
+    df.insert(5, course_id_col, df.pop(course_id_col))  # TODO: hard-coded insertion index
+    # TODO: what about "Lecture course ID" and "Exercise course ID" columns? they are dynamic...
+    return df
@@ -0,0 +1,157 @@
+import os.path
+import re
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import Diagnostics, report, span, traced
+
+# TODO: everything below is copied from the "grading" project
+
+
+# TODO: currently just prints to the console
+@traced(category="load")
+def get_moodle_df(
+        moodle_file: str,
+        encoding: str = "utf8",
+        cols_to_keep: Iterable[str] = None,
+        ignore_assignment_words: Iterable[str] = None,
+        ignore_quiz_words: Iterable[str] = None,
+        diagnostics: Diagnostics = None,
+) -> pd.DataFrame:
+    """
+    Returns a prepared and translated Moodle DataFrame.
+
+    :param moodle_file: The path to the CSV input file that contains the grading
+        information, i.e., the points for assignments and quizzes (exported via Moodle).
+    :param encoding: The encoding to use when reading ``moodle_file``. Default: "utf8"
+    :param cols_to_keep: A collection of columns to keep in addition to the three mandatory
+        ID columns ("First name", "Surname", "ID number") and in addition to the assignment
+        and quiz columns (see `ignore_assignment_words` and ``ignore_quiz_words`` for more
+        control over these two kinds of columns). Default: None = [], i.e., no column is
+        kept in addition to the three ID columns and the assignment and quiz columns
+    :param ignore_assignment_words: A collection of case-insensitive words that indicate
+        to drop an assignment column if any word of this collection is contained within
+        this column. Default: None = [], i.e., every assignment column is kept
+    :param ignore_quiz_words: A collection of case-insensitive words that indicate to drop
+        a quiz column if any word of this collection is contained within this column.
+        Default: None = ["dummy"], i.e., every quiz column is dropped which contains
+        "dummy" (case-insensitive)
+    :param diagnostics: If not None, all detected issues (e.g., dropped entries) are added to
+        this object instead of issuing warnings. Default: None
+    :return: A prepared and translated Moodle DataFrame.
+    """
+    if cols_to_keep is None:
+        cols_to_keep = []
+    if ignore_assignment_words is None:
+        ignore_assignment_words = []
+    ignore_assignment_words = [w.lower() for w in ignore_assignment_words]
+    if ignore_quiz_words is None:
+        ignore_quiz_words = ["dummy"]
+    ignore_quiz_words = [w.lower() for w in ignore_quiz_words]
+    
+    with span("read Moodle CSV", "load", bytes=os.path.getsize(moodle_file)) as s:
+        df = pd.read_csv(moodle_file, na_values="-", encoding=encoding)
+        s.set(rows=len(df), columns=len(df.columns))
+    print(f"original size: {df.shape}")
+    df = moodle_df_to_en(df)
+    
+    # TODO: parameterize
+    # TODO: assignment cols and quiz cols unused
+    id_cols = ["First name", "Surname", "ID number", "Email address"]
+    with span("filter columns", "load") as s:
+        assignment_cols = [c for c in df.columns if c.startswith("Assignment:") and
+                           all([w not in c.lower() for w in ignore_assignment_words])]
+        quiz_cols = [c for c in df.columns if c.startswith("Quiz:") and
+                     all([w not in c.lower() for w in ignore_quiz_words])]
+        cols_to_keep = id_cols + assignment_cols + quiz_cols + cols_to_keep
+        dropped_cols = set(df.columns) - set(cols_to_keep)
+        df = df[cols_to_keep]
+        s.set(rows=len(df), columns=len(df.columns), dropped_columns=len(dropped_cols))
+    print(f"size after filtering columns: {df.shape}, dropped columns: {dropped_cols}")
+    print(f"identified {len(assignment_cols)} assignment columns: {assignment_cols}")
+    print(f"identified {len(quiz_cols)} quiz columns: {quiz_cols}")
+    
+    # Check if there are invalid matriculation ID numbers (e.g., due to having manually added a student to Moodle who is
+    # not a registered KUSSS student). If there are, then pandas could not convert them to np.int64 (should then be str,
+    # i.e., pandas object). Also check for non-student e-mail addresses to filter out any lecturers, tutors, etc.
+    with span("validate IDs", "load") as s:
+        if df["ID number"].dtype != np.int64:
+            invalid = df.index[df["ID number"].str.contains(r"\D", regex=True)]
+            if len(invalid) > 0:
+                # Not dropped in place, since the issue refers to the rows of the unfiltered DataFrame
+                report(diagnostics, "entries were dropped due to invalid matriculation IDs", df, invalid,
+                       "get_moodle_df", columns=id_cols)
+                df = df.drop(invalid)
+                df["ID number"] = df["ID number"].astype(np.int64)  # Should now work
+                print(f"dropped {len(invalid)} entries due to invalid matriculation IDs; new size: {df.shape}")
+            # TODO: does not exclude tutors that still registered via their student account
+            non_students = df.index[~df["Email address"].str.contains("@students.jku.at")]
+            if len(non_students) > 0:
+                report(diagnostics, "entries were dropped due to non-student e-mail addresses", df, non_students,
+                       "get_moodle_df", columns=id_cols)
+                df = df.drop(non_students)
+        
+        # Transform the integer ID to a string with exactly 8 characters (with leading zeros)
+        df["ID number"] = df["ID number"].apply(lambda x: f"{x:08d}")
+        s.set(rows=len(df))
+    
+    # Basic DataFrame is now finished at this point
+    return df
+
+
+# TODO: hard-coded (should probably be in config file)
+MOODLE_DE_TO_EN_FULL = {
+    "Vorname": "First name",
+    "Nachname": "Surname",
+    "ID-Nummer": "ID number",
+    "E-Mail-Adresse": "Email address",
+    "Zuletzt aus diesem Kurs geladen": "Last downloaded from this course"
+}
+
+MOODLE_DE_TO_EN_START = {
+    "Aufgabe": "Assignment",
+    "Test": "Quiz",
+    "Kurs gesamt": "Course total",
+}
+
+MOODLE_DE_TO_EN_END = {
+    "Punkte": "Real",
+    "Prozentsatz": "Percentage",
+}
+
+
+@traced(category="load")
+def moodle_df_to_en(df: pd.DataFrame):
+    # Quick check if it is already English
+    for c in df.columns:
+        if c in MOODLE_DE_TO_EN_FULL.values():
+            return df
+    
+    new_columns = []
+    for c in df.columns:
+        # For whatever reason, Moodle inserts non-breaking spaces when exporting in German
+        c = c.replace("\xa0", " ")
+        original_c = c
+        
+        if c in MOODLE_DE_TO_EN_FULL:
+            # Direct replacement
+            c = MOODLE_DE_TO_EN_FULL[c]
+        else:
+            # Partial replacement
+            for start_de, start_en in MOODLE_DE_TO_EN_START.items():
+                if c.startswith(start_de):
+                    c = c.replace(start_de, start_en, 1)
+            for end_de, end_en in MOODLE_DE_TO_EN_END.items():
+                c = re.sub(rf"\({end_de}\)$", f"({end_en})", c)
+        
+        if c == original_c:
+            raise ValueError(f"could not translate column '{c}' into English")
+        else:
+            new_columns.append(c)
+    
+    assert len(df.columns) == len(new_columns)
+    new_df = df.copy()
+    new_df.columns = new_columns
+    return new_df
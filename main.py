@@ -1,11 +1,21 @@
 import sys
+import time
 
-from PySide6.QtWidgets import QApplication
+from diagnostics import record, span
 
-from widgets.windows import MainWindow
+# Import time of the GUI (pandas and the other heavy modules are only imported later on, see CourseTab)
+with span("imports", "app") as imports:
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    
+    from widgets.windows import MainWindow
 
 if __name__ == "__main__":
+    start = time.perf_counter()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    # Startup time (shown in the status bar and the diagnostics panel, next to the import time) until the window is
+    # shown and the visible course tab is built, i.e., until the event loop ran the calls that were queued meanwhile
+    QTimer.singleShot(0, lambda: record("startup", start, category="app", imports_seconds=round(imports.duration, 3)))
     app.exec()
@@ -1 +1,3 @@
-from .models import DataFrameModel
+from .models import DataFrameModel, StudentsModel, snapshot_df
+from .arrow import ArrowTableModel
+from .query import Query, QueryError, compile_query, is_query, match_regex, strip_query_prefix
@@ -0,0 +1,238 @@
+from collections import OrderedDict
+from typing import Union
+
+import numpy as np
+from PySide6 import QtGui
+from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
+
+
+def _buffer_view(array) -> np.ndarray:
+    # Zero-copy view of the values buffer of a fixed-width pyarrow array (the values of null entries are undefined)
+    dtype = np.dtype(array.type.to_pandas_dtype())
+    return np.frombuffer(array.buffers()[1], dtype=dtype, count=array.offset + len(array))[array.offset:]
+
+
+class _ArrowColumn:
+    """
+    Cell access to a single (chunked) column of a pyarrow table. Integer, floating point and dictionary-encoded
+    columns are read directly from (zero-copy) views of their buffers, and the dictionary values are only converted
+    to Python objects once. All other columns are converted in blocks of rows, and only the most recently used blocks
+    are kept, so only the rows that are actually displayed are ever converted to Python objects.
+    """
+    
+    def __init__(self, column, block_size: int, max_blocks: int):
+        import pyarrow as pa
+        
+        self.column = column
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.starts = np.cumsum([0] + [len(chunk) for chunk in column.chunks])[:-1]
+        t = column.type
+        self.is_dictionary = pa.types.is_dictionary(t)
+        self.is_numeric = pa.types.is_integer(t) or pa.types.is_floating(t) or pa.types.is_decimal(t)
+        self.is_primitive = pa.types.is_integer(t) or pa.types.is_floating(t)
+        self._dictionary = None
+        self._accessors = {}
+        self._blocks = OrderedDict()
+    
+    def get_dictionary(self) -> list:
+        # All chunks share the same dictionary (see ArrowTableModel.set_table)
+        if self._dictionary is None:
+            self._dictionary = self.column.chunks[0].dictionary.to_pylist() if self.column.num_chunks > 0 else []
+        return self._dictionary
+    
+    def _create_accessor(self, chunk_index: int):
+        chunk = self.column.chunks[chunk_index]
+        nulls = np.asarray(chunk.is_null()) if chunk.null_count > 0 else None
+        if self.is_dictionary:
+            indices, dictionary = _buffer_view(chunk.indices), self.get_dictionary()
+            return lambda i: None if nulls is not None and nulls[i] else dictionary[indices[i]]
+        if self.is_primitive:
+            values = _buffer_view(chunk)
+            return lambda i: None if nulls is not None and nulls[i] else values[i].item()
+        
+        def get_from_block(i: int):
+            key = (chunk_index, i // self.block_size)
+            block = self._blocks.get(key)
+            if block is None:
+                block = chunk.slice(key[1] * self.block_size, self.block_size).to_pylist()
+                self._blocks[key] = block
+                if len(self._blocks) > self.max_blocks:
+                    self._blocks.popitem(last=False)
+            else:
+                self._blocks.move_to_end(key)
+            return block[i % self.block_size]
+        
+        return get_from_block
+    
+    def get_value(self, row: int):
+        chunk_index = int(np.searchsorted(self.starts, row, side="right")) - 1
+        accessor = self._accessors.get(chunk_index)
+        if accessor is None:
+            accessor = self._accessors[chunk_index] = self._create_accessor(chunk_index)
+        return accessor(row - int(self.starts[chunk_index]))
+    
+    def get_sort_positions(self, ascending: bool) -> np.ndarray:
+        import pyarrow.compute as pc
+        
+        if not self.is_dictionary:
+            order = "ascending" if ascending else "descending"
+            return pc.array_sort_indices(self.column, order=order, null_placement="at_end").to_numpy()
+        # Sorting dictionary arrays is not supported by pyarrow, so only the (small) dictionary is sorted, and the rows
+        # are then sorted by the ranks of their dictionary indices (nulls last)
+        n = len(self.get_dictionary())
+        ranks = np.empty(n + 1, dtype=np.int64)
+        if n > 0:
+            dictionary_positions = pc.array_sort_indices(self.column.chunks[0].dictionary).to_numpy()
+            ranks[dictionary_positions] = np.arange(n) if ascending else np.arange(n - 1, -1, -1)
+        ranks[n] = n
+        keys = []
+        for chunk in self.column.chunks:
+            indices = _buffer_view(chunk.indices).astype(np.int64)
+            if chunk.null_count > 0:
+                indices[np.asarray(chunk.is_null())] = n
+            keys.append(ranks[indices])
+        return np.argsort(np.concatenate(keys), kind="stable") if keys else np.empty(0, dtype=np.int64)
+
+
+class ArrowTableModel(QAbstractTableModel):
+    """
+    Read-only table model that is backed by a ``pyarrow.Table`` instead of a pd.DataFrame, which is intended for very
+    large tables (e.g., histories over many semesters). String columns are dictionary-encoded, and cells are read
+    from zero-copy views of the column buffers (see ``_ArrowColumn``), so neither loading nor displaying the table
+    converts entire columns to Python objects. Tables can be memory-mapped from (uncompressed) Feather/Arrow IPC files
+    (e.g., the tables of a stored session, see ``models.session``). Requires the optional dependency ``pyarrow``.
+    """
+    
+    def __init__(self, table=None, dictionary_encode: bool = True, block_size: int = 1024, max_blocks: int = 256,
+                 parent=None):
+        """
+        :param table: The ``pyarrow.Table`` to display. Default: None = empty table
+        :param dictionary_encode: Whether to dictionary-encode all string columns (see ``set_table``). Default: True
+        :param block_size: The number of rows that are converted at once for columns that cannot be read from their
+            buffers directly (e.g., booleans or timestamps). Default: 1024
+        :param max_blocks: The maximum number of converted blocks that are kept per column. Default: 256
+        """
+        super().__init__(parent)
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self._table = None
+        self._columns = []
+        # The table row of each model row (None = not sorted, i.e., the same)
+        self._order = None
+        self.set_table(table, dictionary_encode)
+    
+    @classmethod
+    def from_file(cls, file: str, dictionary_encode: bool = True, **kwargs) -> "ArrowTableModel":
+        """
+        Creates a model of a Feather (version 2)/Arrow IPC file, which is memory-mapped, i.e., only the parts of the
+        file that are actually accessed are read (zero-copy if the file is uncompressed).
+
+        :param file: The path of the file.
+        :param dictionary_encode: See ``set_table``. Default: True
+        :param kwargs: Additional keyword arguments that are passed to ``ArrowTableModel.__init__``.
+        """
+        from pyarrow import feather
+        
+        return cls(feather.read_table(file, memory_map=True), dictionary_encode, **kwargs)
+    
+    def set_table(self, table, dictionary_encode: bool = True):
+        """
+        Sets the displayed table.
+
+        :param table: The ``pyarrow.Table`` to display (None = empty table).
+        :param dictionary_encode: Whether to dictionary-encode all string columns (and unify the dictionaries of all
+            chunks). This takes a single pass over the string data (without creating Python objects), after which the
+            strings of each column only exist once. Default: True
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        if table is None:
+            table = pa.table({})
+        if dictionary_encode:
+            for i, field in enumerate(table.schema):
+                if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+                    table = table.set_column(i, field.name, pc.dictionary_encode(table.column(i)))
+        table = table.unify_dictionaries()
+        self.beginResetModel()
+        self._table = table
+        self._columns = [_ArrowColumn(table.column(i), self.block_size, self.max_blocks)
+                         for i in range(table.num_columns)]
+        self._order = None
+        self.endResetModel()
+    
+    def get_table(self):
+        """Returns the table in the current (sorted) row order."""
+        return self._table if self._order is None else self._table.take(self._order)
+    
+    def get_df(self, copy: bool = True):
+        # Always a new DataFrame (``copy`` only exists for compatibility with DataFrameModel.get_df)
+        return self.get_table().to_pandas()
+    
+    def get_raw_data(self, row: Union[int, slice, None] = None, col: Union[int, slice, None] = None):
+        """Same as ``DataFrameModel.get_raw_data`` (only the selected rows and columns are converted)."""
+        rows = np.arange(self._table.num_rows) if self._order is None else self._order
+        rows = rows[[row] if isinstance(row, int) else slice(None) if row is None else row]
+        cols = list(range(self._table.num_columns))
+        cols = cols[col:col + 1] if isinstance(col, int) else cols if col is None else cols[col]
+        df = self._table.take(rows).select(cols).to_pandas()
+        if isinstance(row, int) and isinstance(col, int):
+            return df.iat[0, 0]
+        if isinstance(row, int):
+            return df.iloc[0]
+        if isinstance(col, int):
+            return df.iloc[:, 0]
+        return df
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._table.num_rows
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._table.num_columns
+    
+    def data(self, index: QModelIndex, role: Qt.ItemDataRole = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        column = self._columns[index.column()]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignTop | Qt.AlignRight if column.is_numeric else None
+        
+        if role == Qt.DisplayRole or role == Qt.ForegroundRole:
+            row = index.row() if self._order is None else int(self._order[index.row()])
+            value = column.get_value(row)
+            if role == Qt.DisplayRole:
+                return "" if value is None else str(value)
+            if value is None or isinstance(value, float) and np.isnan(value):
+                return QtGui.QColor(255, 0, 0)
+        
+        return None
+    
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self._table.column_names[section]
+            
+            if orientation == Qt.Vertical:
+                return str(section if self._order is None else self._order[section])
+        
+        return None
+    
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        if self._table.num_rows > 1:
+            self.layoutAboutToBeChanged.emit()
+            old_order = np.arange(self._table.num_rows) if self._order is None else self._order
+            self._order = self._columns[column].get_sort_positions(order == Qt.AscendingOrder)
+            # Move persistent indexes (e.g., the selection) along with their rows
+            new_positions = np.empty_like(self._order)
+            new_positions[self._order] = np.arange(len(self._order))
+            persistent = self.persistentIndexList()
+            if persistent:
+                self.changePersistentIndexList(
+                    persistent, [self.index(int(new_positions[old_order[i.row()]]), i.column()) for i in persistent])
+            self.layoutChanged.emit()
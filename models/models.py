@@ -5,31 +5,147 @@ import pandas as pd
 from PySide6 import QtGui
 from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
 
+from util import RowIndex
+
+
+def snapshot_df(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns a copy of ``df`` that is independent of ``df``, i.e., modifying either of them never affects the other.
+    In pandas' copy-on-write mode (enabled by the GUI, see ``widgets.util.import_pandas``, and batch.py), this is a
+    shallow copy that only copies the data that is actually modified later on, so it is cheap regardless of the size of
+    ``df``. Otherwise, it is a deep copy.
+    """
+    return df.copy(deep=not pd.options.mode.copy_on_write)
+
 
 class DataFrameModel(QAbstractTableModel):
+    # Maximum number of separate dataChanged signals per update_df call (see there)
+    MAX_CHANGED_BLOCKS = 64
     
     # TODO: empty DataFrame as default
     def __init__(self, df: pd.DataFrame = None, parent=None):
         super().__init__(parent)
-        self._df = df if df is not None else pd.DataFrame()
+        self._df = snapshot_df(df) if df is not None else pd.DataFrame()
+        # The (column, order) of the most recent sort, so the order can be restored after updates
+        self._sort = None
+        # Incremented whenever the data changes, so the results of background jobs that worked on an older snapshot can
+        # be detected (see get_snapshot). Sorting only reorders the rows, so it keeps the version (results are aligned
+        # on key columns, e.g., by update_df, instead of row positions)
+        self.version = 0
     
-    def get_df(self, copy: bool = True):
-        return self._df.copy() if copy else self._df
+    def get_df(self, copy: bool = True) -> pd.DataFrame:
+        """
+        Returns the current data.
+        
+        :param copy: Whether to return a snapshot (see ``snapshot_df``) that can be modified without affecting the
+            model. Otherwise, the model's own DataFrame is returned, which must never be modified (it is never
+            modified by the model either, i.e., a new DataFrame is created for each change). Default: True
+        """
+        return snapshot_df(self._df) if copy else self._df
+    
+    def get_snapshot(self) -> tuple[int, pd.DataFrame]:
+        """
+        Returns the current version together with a snapshot of the data (see ``get_df``), e.g., for background jobs
+        that must discard their results if the data changed in the meantime (i.e., if ``version`` changed).
+        """
+        return self.version, self.get_df()
     
     def set_df(self, df: pd.DataFrame):
         # TODO: which one to choose?
         # self.layoutAboutToBeChanged.emit()
         # self.modelAboutToBeReset.emit()
         self.beginResetModel()
-        self._df = df
+        # Snapshot, so later modifications of "df" by the caller do not affect the displayed data
+        self._df = snapshot_df(df)
+        self.version += 1
         # self.layoutChanged.emit()
         # self.modelReset.emit()
         self.endResetModel()
     
+    def update_df(self, df: pd.DataFrame, key: str = "ID number") -> bool:
+        """
+        Replaces the data with ``df`` (like ``set_df``), but only notifies the views about the rows and cells that
+        actually changed. The rows are aligned on ``key``: removed rows emit ``rowsRemoved``, changed cells emit
+        ``dataChanged`` and new rows are appended and emit ``rowsInserted``. In contrast to a reset, the views keep
+        their selection and scroll position, and they (as well as proxy models) only have to process the changed rows.
+        Rows keep their position (and index label) unless the model was sorted and the sort column changed or rows
+        were added, in which case the previous sort is applied again.
+        
+        If the columns differ or ``key`` is not a unique column of both DataFrames, the rows cannot be aligned, so
+        nothing is changed and the caller has to replace the data instead (e.g., via ``set_df``).
+        
+        :param df: The new data.
+        :param key: The column that identifies the rows. Default: "ID number"
+        :return: True if the model was updated, False if the data could not be updated (model unchanged).
+        """
+        old_df = self._df
+        if (key not in df.columns or key not in old_df.columns or set(df.columns) != set(old_df.columns)
+                or len(df.columns) != len(old_df.columns) or df[key].duplicated().any()
+                or old_df[key].duplicated().any()):
+            return False
+        new_df = df[old_df.columns].set_index(key, drop=False)
+        # Never modify the current DataFrame in place, since others might still use it (see get_df(copy=False))
+        result = old_df
+        
+        # Remove rows from last to first, so that the positions of the remaining blocks stay valid
+        removed = np.flatnonzero(~old_df[key].isin(new_df.index).to_numpy())
+        for first, last in reversed(DataFrameModel._get_blocks(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            keep = np.ones(len(result), dtype=bool)
+            keep[first:last + 1] = False
+            self._df = result = result[keep]
+            self.endRemoveRows()
+        
+        # Compare all cells of the remaining rows (missing values are considered equal)
+        aligned = new_df.loc[result[key]]
+        old_values = result.to_numpy(dtype=object)
+        new_values = aligned.to_numpy(dtype=object)
+        changed = old_values != new_values
+        # NaN != NaN, so only the (few) unequal cells have to be checked for missing values
+        changed[changed] = ~(pd.isna(old_values[changed]) & pd.isna(new_values[changed]))
+        # Columns with a different dtype are replaced entirely (e.g., 1.0 would now be displayed as 1)
+        retyped = [i for i, c in enumerate(result.columns) if result[c].dtype != aligned[c].dtype]
+        changed[:, retyped] = True
+        changed_cols = np.flatnonzero(changed.any(axis=0))
+        if len(changed_cols) > 0:
+            result = snapshot_df(result)
+            for i in changed_cols:
+                result.isetitem(i, aligned.iloc[:, i].to_numpy())
+            self._df = result
+            blocks = DataFrameModel._get_blocks(np.flatnonzero(changed.any(axis=1)))
+            if len(blocks) > DataFrameModel.MAX_CHANGED_BLOCKS:
+                # Emitting many signals from Python is slower than letting the views update a larger range once
+                blocks = [(blocks[0][0], blocks[-1][1])]
+            for first, last in blocks:
+                cols = np.flatnonzero(changed[first:last + 1].any(axis=0))
+                self.dataChanged.emit(self.index(first, int(cols[0])), self.index(last, int(cols[-1])))
+        
+        added = df[~df[key].isin(old_df[key])][old_df.columns]
+        if len(added) > 0:
+            if pd.api.types.is_integer_dtype(result.index) and len(result) > 0:
+                added = added.set_axis(pd.RangeIndex(result.index.max() + 1, result.index.max() + 1 + len(added)))
+            self.beginInsertRows(QModelIndex(), len(result), len(result) + len(added) - 1)
+            self._df = pd.concat([result, added])
+            self.endInsertRows()
+        
+        if self._df is not old_df:
+            self.version += 1
+        if self._sort is not None and (len(added) > 0 or self._sort[0] in changed_cols):
+            self.sort(*self._sort)
+        return True
+    
+    @staticmethod
+    def _get_blocks(positions: np.ndarray) -> list[tuple[int, int]]:
+        # Returns the (first, last) positions of all consecutive blocks of the (sorted) positions
+        if len(positions) == 0:
+            return []
+        splits = np.flatnonzero(np.diff(positions) != 1) + 1
+        return [(int(block[0]), int(block[-1])) for block in np.split(positions, splits)]
+    
     # TODO: very similar to method "data", but unfortunately, there is no Qt.RawDataRole entry in the Qt.ItemDataRole
     #  enum
     def get_raw_data(self, row: Union[int, slice, None] = None, col: Union[int, slice, None] = None):
-        copy = self._df.copy()
+        copy = snapshot_df(self._df)
         if row is not None and col is not None:
             return copy.iloc[row, col]
         if row is not None:
@@ -80,13 +196,21 @@ class DataFrameModel(QAbstractTableModel):
         return None
     
     def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        self._sort = (column, order)
         if len(self._df) > 1:
             self.layoutAboutToBeChanged.emit()
-            self._df.sort_values(
-                by=self._df.columns[column],
-                ascending=order == Qt.AscendingOrder,
-                inplace=True
-            )
+            # The old positions of all rows in their new order (sorting a single column is much faster than the
+            # whole DataFrame, and a new DataFrame is created, since others might still use the current one)
+            positions = self._df.iloc[:, column].reset_index(drop=True).sort_values(
+                ascending=order == Qt.AscendingOrder).index.to_numpy()
+            self._df = self._df.iloc[positions]
+            # Move persistent indexes (e.g., the selection) along with their rows
+            new_positions = np.empty_like(positions)
+            new_positions[positions] = np.arange(len(positions))
+            persistent = self.persistentIndexList()
+            if persistent:
+                self.changePersistentIndexList(
+                    persistent, [self.index(int(new_positions[i.row()]), i.column()) for i in persistent])
             self.layoutChanged.emit()
     
     # def mimeTypes(self):
@@ -105,3 +229,50 @@ class DataFrameModel(QAbstractTableModel):
     #
     # def supportedDragActions(self) -> Qt.DropAction:
     #     return Qt.DropAction.CopyAction | Qt.DropAction.MoveAction
+
+
+class StudentsModel(DataFrameModel):
+    """
+    Model of the students of a course (shared by all tabs of the course), which maintains hash indexes (see
+    ``RowIndex``) on its key columns (e.g., the matriculation ID), so single students (and batches of students, e.g.,
+    when merging) can be looked up in constant time. Since the DataFrame is never modified in place,
+    an index is simply rebuilt on the first lookup after the DataFrame was replaced (by ``set_df``, ``update_df`` or
+    ``sort``), and an index together with its DataFrame (see ``get_index``) is a consistent snapshot that can also be
+    used by background jobs.
+    """
+    
+    def __init__(self, df: pd.DataFrame = None, matr_id_col: str = "ID number", parent=None):
+        super().__init__(df, parent)
+        self.matr_id_col = matr_id_col
+        self._indexes = {}
+    
+    def get_index(self, col: str = None) -> Union[RowIndex, None]:
+        """
+        Returns the index of the current DataFrame on ``col`` (None if there is no such column). The indexed DataFrame
+        is available as ``RowIndex.df`` (read-only, see ``get_df(copy=False)``).
+        
+        :param col: The key column. Default: None = ``matr_id_col``
+        """
+        if col is None:
+            col = self.matr_id_col
+        if col not in self._df.columns:
+            return None
+        index = self._indexes.get(col)
+        if index is None or index.df is not self._df:
+            index = self._indexes[col] = RowIndex(self._df, col)
+        return index
+    
+    def find_student(self, student_id: str) -> Union[int, None]:
+        """
+        Returns the row of a student given the matriculation ID (with or without the leading "k"), or None if there is
+        no such student.
+        """
+        key = student_id.strip().removeprefix("k")
+        index = self.get_index()
+        if index is None:
+            return None
+        if pd.api.types.is_integer_dtype(self._df[self.matr_id_col]):
+            if not key.isdigit():
+                return None
+            key = int(key)
+        return index.get_position(key)
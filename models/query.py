@@ -0,0 +1,426 @@
+"""
+Small query language to filter the rows of a DataFrame, e.g.:
+
+    grade == 5
+    `Quiz: Exam (Real)` < 50 and `Course ID` = 123456
+    points between 50 and 100 or not (name ~ "^ma" and email is missing)
+
+A query consists of comparisons that can be combined with "and", "or", "not" and parentheses:
+
+    column == value      (also "=", "!=", "<", "<=", ">", ">=")
+    column between low and high      (inclusive)
+    column in (value, value, ...)
+    column ~ regex       (also "contains"; case-insensitive search within the cell text)
+    column is nan        (also "missing"/"null"; "is not nan" for the opposite)
+
+Column names can be written as-is (if they do not contain special characters), in backticks, or as
+any unique (case-insensitive) part of the name. Values are numbers, words or quoted strings. Each
+query is parsed once and compiled against the column types of the DataFrame (e.g., "<" requires a
+numeric column and a numeric value), and the compiled query evaluates to a boolean NumPy mask with
+vectorized operations only. In the filter of the table views, queries start with "?" (see is_query).
+"""
+import re
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+_TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<name>`[^`]*`)
+    |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    |(?P<op>==|!=|<=|>=|=|<|>|~|\(|\)|,)
+    |(?P<word>[^\s()<>=!~,"'`]+)
+)""", re.VERBOSE)
+_KEYWORDS = {"and", "or", "not", "between", "in", "is", "contains"}
+_MISSING_WORDS = {"nan", "missing", "null", "none"}
+_COMPARISONS = {"==", "=", "!=", "<", "<=", ">", ">="}
+# Marks filter text as a query instead of a plain "[column name:]regex" filter (see is_query). No regular expression
+# can start with "?", so this never changes the meaning of a valid regex filter.
+QUERY_PREFIX = "?"
+
+# Cache sizes of parsed and compiled queries (the same queries are typically evaluated repeatedly)
+_MAX_CACHED_QUERIES = 128
+# Factorized text columns of the most recently queried DataFrames: id(df) -> (weak reference to df, {key: result})
+# (see _factorize_text and _factorize_display)
+_factorized = OrderedDict()
+_MAX_FACTORIZED_DFS = 4
+
+
+class QueryError(ValueError):
+    """Syntax or type error in a query, including the (character) position of the error if known."""
+    
+    def __init__(self, msg: str, position: int = None):
+        super().__init__(msg if position is None else f"{msg} (at position {position + 1})")
+        self.position = position
+
+
+def is_query(text: str) -> bool:
+    """Returns whether the filter ``text`` is a query, i.e., starts with ``QUERY_PREFIX`` (e.g., "? grade == 5")."""
+    return text.lstrip().startswith(QUERY_PREFIX)
+
+
+def strip_query_prefix(text: str) -> str:
+    """Returns the actual query of the filter ``text`` (see ``is_query``)."""
+    return text.lstrip()[len(QUERY_PREFIX):]
+
+
+def _tokenize(text: str) -> list[tuple[str, str, int]]:
+    # Returns (kind, text, position) tuples (kind: "name", "string", "op", "word" or "end")
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_PATTERN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise QueryError(f"unexpected character '{text[pos:].lstrip()[:1]}'", pos)
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        pos = match.end()
+    tokens.append(("end", "", len(text)))
+    return tokens
+
+
+class _Parser:
+    # Recursive descent parser that creates a tuple-based syntax tree:
+    # ("or", a, b), ("and", a, b), ("not", a), ("compare", column, op, value), ("between", column, low, high),
+    # ("in", column, values), ("contains", column, value), ("missing", column, negate)
+    # Columns and values are (kind, text, position) tokens.
+    
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.i = 0
+    
+    def peek(self) -> tuple[str, str, int]:
+        return self.tokens[self.i]
+    
+    def next(self) -> tuple[str, str, int]:
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+    
+    def is_keyword(self, *words: str) -> bool:
+        kind, text, _ = self.peek()
+        return kind == "word" and text.lower() in words
+    
+    def expect(self, kind: str, text: str = None) -> tuple[str, str, int]:
+        token = self.next()
+        if token[0] != kind or text is not None and token[1].lower() != text:
+            expected = f"'{text}'" if text is not None else kind
+            found = "end of query" if token[0] == "end" else f"'{token[1]}'"
+            raise QueryError(f"expected {expected}, but found {found}", token[2])
+        return token
+    
+    def parse(self):
+        node = self.parse_or()
+        kind, text, pos = self.peek()
+        if kind != "end":
+            raise QueryError(f"unexpected '{text}'", pos)
+        return node
+    
+    def parse_or(self):
+        node = self.parse_and()
+        while self.is_keyword("or"):
+            self.next()
+            node = ("or", node, self.parse_and())
+        return node
+    
+    def parse_and(self):
+        node = self.parse_not()
+        while self.is_keyword("and"):
+            self.next()
+            node = ("and", node, self.parse_not())
+        return node
+    
+    def parse_not(self):
+        if self.is_keyword("not"):
+            self.next()
+            return "not", self.parse_not()
+        if self.peek()[:2] == ("op", "("):
+            self.next()
+            node = self.parse_or()
+            self.expect("op", ")")
+            return node
+        return self.parse_condition()
+    
+    def parse_column(self) -> tuple[str, str, int]:
+        kind, text, pos = self.peek()
+        if kind == "name":
+            self.next()
+            return "name", text[1:-1], pos
+        # Unquoted column names consist of all words up to the operator
+        words = []
+        while self.peek()[0] == "word" and not self.is_keyword(*_KEYWORDS):
+            words.append(self.next()[1])
+        if not words:
+            found = "end of query" if kind == "end" else f"'{text}'"
+            raise QueryError(f"expected a column, but found {found}", pos)
+        return "word", " ".join(words), pos
+    
+    def parse_value(self) -> tuple[str, str, int]:
+        kind, text, pos = self.next()
+        if kind == "string":
+            return "string", re.sub(r"\\(.)", r"\1", text[1:-1]), pos
+        if kind == "word" and text.lower() not in ("and", "or"):
+            return "word", text, pos
+        found = "end of query" if kind == "end" else f"'{text}'"
+        raise QueryError(f"expected a value, but found {found}", pos)
+    
+    def parse_condition(self):
+        column = self.parse_column()
+        kind, text, pos = self.next()
+        lower = text.lower()
+        if kind == "op" and text in _COMPARISONS:
+            return "compare", column, "==" if text == "=" else text, self.parse_value()
+        if kind == "op" and text == "~" or kind == "word" and lower == "contains":
+            return "contains", column, self.parse_value()
+        if kind == "word" and lower == "between":
+            low = self.parse_value()
+            self.expect("word", "and")
+            return "between", column, low, self.parse_value()
+        if kind == "word" and lower == "in":
+            self.expect("op", "(")
+            values = [self.parse_value()]
+            while self.peek()[:2] == ("op", ","):
+                self.next()
+                values.append(self.parse_value())
+            self.expect("op", ")")
+            return "in", column, values
+        if kind == "word" and lower == "is":
+            negate = self.is_keyword("not")
+            if negate:
+                self.next()
+            word = self.expect("word")
+            if word[1].lower() not in _MISSING_WORDS:
+                raise QueryError(f"expected 'nan', 'missing' or 'null', but found '{word[1]}'", word[2])
+            return "missing", column, negate
+        found = "end of query" if kind == "end" else f"'{text}'"
+        raise QueryError(f"expected an operator after column '{column[1]}', but found {found}", pos)
+
+
+@lru_cache(maxsize=_MAX_CACHED_QUERIES)
+def parse_query(text: str) -> tuple:
+    """Parses a query (see module docstring) into a syntax tree. The results are cached."""
+    if not text.strip():
+        raise QueryError("empty query")
+    return _Parser(text).parse()
+
+
+def _resolve_column(column: tuple[str, str, int], columns: tuple) -> object:
+    kind, name, pos = column
+    names = [str(c) for c in columns]
+    if name in names:
+        return columns[names.index(name)]
+    lower = name.lower()
+    candidates = [c for c, n in zip(columns, names) if n.lower() == lower]
+    if not candidates and kind == "word":
+        candidates = [c for c, n in zip(columns, names) if lower in n.lower()]
+    if len(candidates) == 1:
+        return candidates[0]
+    if candidates:
+        raise QueryError(f"column '{name}' is ambiguous: {', '.join(repr(str(c)) for c in candidates)}", pos)
+    raise QueryError(f"unknown column '{name}'", pos)
+
+
+def _get_kind(dtype) -> str:
+    # The type of a column as far as queries are concerned: "bool", "number" or "text"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "number"
+    return "text"
+
+
+def _to_number(value: tuple[str, str, int], column) -> float:
+    try:
+        return float(value[1])
+    except ValueError:
+        raise QueryError(f"column '{column}' is numeric, but '{value[1]}' is not a number", value[2]) from None
+
+
+def _to_bool(value: tuple[str, str, int], column) -> bool:
+    lower = value[1].lower()
+    if lower not in ("true", "false", "1", "0"):
+        raise QueryError(f"column '{column}' is boolean, but '{value[1]}' is neither true nor false", value[2])
+    return lower in ("true", "1")
+
+
+def _get_values(df: pd.DataFrame, column, kind: str) -> np.ndarray:
+    # The values of a column in the representation that the compiled comparisons expect
+    series = df[column]
+    if kind == "number":
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    if kind == "bool":
+        return series.to_numpy(dtype=bool, na_value=False)
+    return series.to_numpy(dtype=object)
+
+
+def _get_factorized(df: pd.DataFrame) -> dict:
+    # The factorized columns of df, which are only computed once per DataFrame (the unique texts of a column are
+    # typically far fewer than its rows, e.g., course IDs or names)
+    key = id(df)
+    entry = _factorized.get(key)
+    if entry is None or entry[0]() is not df:
+        entry = _factorized[key] = (weakref.ref(df), {})
+        if len(_factorized) > _MAX_FACTORIZED_DFS:
+            _factorized.popitem(last=False)
+    else:
+        _factorized.move_to_end(key)
+    return entry[1]
+
+
+def _factorize_text(df: pd.DataFrame, column) -> tuple[np.ndarray, pd.Series]:
+    # The codes (-1 = missing) and unique cell texts of a column
+    factorized = _get_factorized(df)
+    result = factorized.get(column)
+    if result is None:
+        codes, uniques = pd.factorize(df[column])
+        result = factorized[column] = codes, pd.Series(uniques, dtype=object).astype(str)
+    return result
+
+
+def _factorize_display(df: pd.DataFrame, position: int) -> tuple[np.ndarray, pd.Series]:
+    # The codes and unique displayed texts (including missing values, e.g., "nan") of the column at the position
+    factorized = _get_factorized(df)
+    key = ("display", position)
+    result = factorized.get(key)
+    if result is None:
+        column = df.iloc[:, position]
+        if column.dtype == object:
+            # Missing values of object columns can be displayed differently (e.g., "None" and "nan")
+            column = column.astype(str)
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        result = factorized[key] = codes, pd.Series(uniques, dtype=object).astype(str)
+    return result
+
+
+def _match_text(df: pd.DataFrame, column, predicate: Callable[[pd.Series], pd.Series]) -> np.ndarray:
+    # Evaluates the predicate only on the unique cell texts of the column (missing values never match)
+    codes, texts = _factorize_text(df, column)
+    return np.append(np.asarray(predicate(texts), dtype=bool), False)[codes]
+
+
+_OPERATORS = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _compile(node: tuple, columns: tuple, kinds: dict) -> Callable[[pd.DataFrame], np.ndarray]:
+    # Returns a function that evaluates the (sub-)query to a boolean mask of all rows of a DataFrame
+    op = node[0]
+    if op in ("and", "or"):
+        left, right = _compile(node[1], columns, kinds), _compile(node[2], columns, kinds)
+        if op == "and":
+            return lambda df: left(df) & right(df)
+        return lambda df: left(df) | right(df)
+    if op == "not":
+        inner = _compile(node[1], columns, kinds)
+        return lambda df: ~inner(df)
+    
+    column = _resolve_column(node[1], columns)
+    kind = kinds[column]
+    if op == "missing":
+        negate = node[2]
+        return lambda df: df[column].notna().to_numpy() if negate else df[column].isna().to_numpy()
+    if op == "contains":
+        try:
+            pattern = re.compile(node[2][1], re.IGNORECASE)
+        except re.error as ex:
+            raise QueryError(f"invalid regex '{node[2][1]}': {ex}", node[2][2]) from None
+        return lambda df: _match_text(df, column, lambda texts: texts.str.contains(pattern))
+    
+    if op == "compare":
+        comparison, value = node[2], node[3]
+        if kind == "text":
+            if comparison not in ("==", "!="):
+                raise QueryError(f"'{comparison}' requires a numeric column, but '{column}' contains text",
+                                 node[1][2])
+            text = value[1]
+            if comparison == "==":
+                return lambda df: _match_text(df, column, lambda texts: texts == text)
+            return lambda df: ~_match_text(df, column, lambda texts: texts == text)
+        if kind == "bool":
+            if comparison not in ("==", "!="):
+                raise QueryError(f"'{comparison}' requires a numeric column, but '{column}' is boolean", node[1][2])
+            target = _to_bool(value, column)
+        else:
+            target = _to_number(value, column)
+        func = _OPERATORS[comparison]
+        return lambda df: func(_get_values(df, column, kind), target)
+    
+    if op == "between":
+        if kind != "number":
+            raise QueryError(f"'between' requires a numeric column, but '{column}' is not numeric", node[1][2])
+        low, high = _to_number(node[2], column), _to_number(node[3], column)
+        
+        def between(df: pd.DataFrame) -> np.ndarray:
+            values = _get_values(df, column, kind)
+            return (values >= low) & (values <= high)
+        
+        return between
+    
+    if op == "in":
+        if kind == "text":
+            texts = [v[1] for v in node[2]]
+            return lambda df: _match_text(df, column, lambda values: values.isin(texts))
+        targets = [_to_bool(v, column) if kind == "bool" else _to_number(v, column) for v in node[2]]
+        return lambda df: np.isin(_get_values(df, column, kind), targets)
+    
+    raise AssertionError(f"unknown query node {op}")
+
+
+class Query:
+    """A query that was compiled for DataFrames with specific columns and column types (see ``compile_query``)."""
+    
+    def __init__(self, text: str, func: Callable[[pd.DataFrame], np.ndarray]):
+        self.text = text
+        self._func = func
+    
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Returns a boolean mask of all rows of ``df`` that match the query. Text columns are only factorized on the
+        first evaluation for ``df``, so ``df`` must not be modified in place afterward (like the DataFrames of the
+        table models, see ``DataFrameModel.get_df``).
+        """
+        return np.asarray(self._func(df), dtype=bool)
+
+
+@lru_cache(maxsize=_MAX_CACHED_QUERIES)
+def _compile_query(text: str, columns: tuple, kinds: tuple) -> Query:
+    return Query(text, _compile(parse_query(text), columns, dict(zip(columns, kinds))))
+
+
+def compile_query(text: str, df: pd.DataFrame) -> Query:
+    """
+    Compiles a query (see module docstring) for the columns and column types of ``df``. The compiled
+    queries are cached, so compiling the same query for DataFrames with the same columns is free.
+
+    :raises QueryError: If the query contains a syntax error, an unknown or ambiguous column, or a
+        value that does not match the type of its column.
+    """
+    return _compile_query(text, tuple(df.columns), tuple(_get_kind(dtype) for dtype in df.dtypes))
+
+
+def match_regex(df: pd.DataFrame, pattern: str, column: int = -1, ignore_case: bool = False) -> np.ndarray:
+    """
+    Returns a boolean mask of all rows of ``df`` where the displayed text (``str(value)``, see
+    ``DataFrameModel.data``) of a cell contains a match of the regular expression ``pattern``,
+    i.e., the rows that the regex filter of QSortFilterProxyModel accepts. The pattern is only
+    evaluated once per unique text of each column (see ``Query.evaluate``).
+
+    :param column: The position of the column to search (-1 = all columns). Default: -1
+    :raises re.error: If the pattern is not a valid (Python) regular expression.
+    """
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    mask = np.zeros(len(df), dtype=bool)
+    for position in range(len(df.columns)) if column < 0 else [column]:
+        codes, texts = _factorize_display(df, position)
+        mask |= np.fromiter((regex.search(text) is not None for text in texts), dtype=bool, count=len(texts))[codes]
+    return mask
@@ -0,0 +1,69 @@
+import json
+import os
+import os.path
+import time
+
+import pandas as pd
+
+METADATA_FILE = "session.json"
+
+
+def save_session(directory: str, dfs: dict[str, pd.DataFrame], metadata: dict = None):
+    """
+    Stores the specified DataFrames as uncompressed Feather (Arrow IPC) files in ``directory``
+    (one file per DataFrame), together with a JSON metadata file. Uncompressed files can be
+    memory-mapped when loading, so restoring a session does not require any CSV parsing.
+    DataFrames that are None or empty are not stored. Requires the optional dependency ``pyarrow``.
+
+    :param directory: The directory where the session files are stored (created if necessary).
+    :param dfs: A dictionary that maps names (used as file names) to DataFrames.
+    :param metadata: An optional JSON-serializable dictionary with additional information about
+        the session (e.g., which files were loaded). Default: None
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+    
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for name, df in dfs.items():
+        file = os.path.join(directory, f"{name}.feather")
+        if df is None or df.empty:
+            if os.path.isfile(file):
+                os.remove(file)
+            continue
+        # Feather requires a default index and string column names
+        df = df.reset_index(drop=True)
+        df.columns = [str(c) for c in df.columns]
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(table, file, compression="uncompressed")
+        tables[name] = {"file": os.path.basename(file), "rows": len(df), "columns": len(df.columns)}
+    with open(os.path.join(directory, METADATA_FILE), "w", encoding="utf8") as f:
+        json.dump({"saved": time.time(), "tables": tables, "metadata": metadata or {}}, f, indent=2)
+
+
+def load_session(directory: str) -> tuple[dict[str, pd.DataFrame], dict]:
+    """
+    Loads a session that was previously stored with ``save_session``. The Feather files are
+    memory-mapped, i.e., no CSV parsing, translation, validation or merging is repeated. Note that
+    the conversion to pandas still copies the data, and string columns become regular ``object``
+    columns of Python strings (the rest of the application expects NumPy-backed dtypes).
+    Requires the optional dependency ``pyarrow``.
+
+    :param directory: The directory where the session files are stored.
+    :return: A tuple containing (as first entry) a dictionary that maps the names to the loaded
+        DataFrames, and (as second entry) the metadata dictionary. If there is no session in
+        ``directory``, both dictionaries are empty.
+    """
+    metadata_file = os.path.join(directory, METADATA_FILE)
+    if not os.path.isfile(metadata_file):
+        return {}, {}
+    from pyarrow import feather
+    
+    with open(metadata_file, "r", encoding="utf8") as f:
+        session = json.load(f)
+    dfs = {}
+    for name, info in session["tables"].items():
+        file = os.path.join(directory, info["file"])
+        if os.path.isfile(file):
+            dfs[name] = feather.read_table(file, memory_map=True).to_pandas()
+    return dfs, session["metadata"]
@@ -0,0 +1,98 @@
+import os
+import os.path
+
+import pandas as pd
+
+
+class IdentityIndex:
+    """
+    Persistent, on-disk index that maps Moodle IDs (the 7-digit IDs contained in the
+    Moodle submission names) to matriculation IDs. Each observed (Moodle ID, full name)
+    combination is stored as a separate entry, i.e., the index also keeps the name
+    history of each student. This way, students can be resolved via their Moodle ID
+    alone, regardless of any name changes that happened in the meantime, and the
+    (expensive and fragile) name matching is only required for Moodle IDs that have
+    never been seen before.
+    """
+    
+    MOODLE_ID_COL = "moodle_id"
+    MATR_ID_COL = "ID number"
+    FULL_NAME_COL = "full_name"
+    COLUMNS = [MOODLE_ID_COL, MATR_ID_COL, FULL_NAME_COL]
+    
+    def __init__(self, file: str = None):
+        """
+        Creates a new identity index. If ``file`` is specified and exists, the index is
+        loaded from this file.
+
+        :param file: The path of the CSV file where the index is stored. If None, the index
+            only exists in memory and cannot be saved. Default: None
+        """
+        self.file = file
+        if file is not None and os.path.isfile(file):
+            self._df = pd.read_csv(file, dtype=str, keep_default_na=False)[IdentityIndex.COLUMNS]
+        else:
+            self._df = pd.DataFrame(columns=IdentityIndex.COLUMNS, dtype=str)
+        self._rebuild()
+    
+    def _rebuild(self):
+        # Most recent entry (last one) wins in case the same Moodle ID was (wrongly) associated with different
+        # matriculation IDs over time
+        latest = self._df.drop_duplicates(subset=IdentityIndex.MOODLE_ID_COL, keep="last")
+        self._matr_ids = pd.Series(
+            latest[IdentityIndex.MATR_ID_COL].values,
+            index=pd.Index(latest[IdentityIndex.MOODLE_ID_COL].values, name=IdentityIndex.MOODLE_ID_COL),
+            name=IdentityIndex.MATR_ID_COL
+        )
+    
+    def __len__(self):
+        return len(self._matr_ids)
+    
+    def contains(self, moodle_ids: pd.Series) -> pd.Series:
+        """
+        Returns a boolean pd.Series that indicates which of the specified Moodle IDs are
+        already part of this index.
+        """
+        return moodle_ids.isin(self._matr_ids.index)
+    
+    def lookup(self, moodle_ids: pd.Series) -> pd.Series:
+        """
+        Returns the matriculation IDs of the specified Moodle IDs (NaN for Moodle IDs that
+        are not part of this index). The returned pd.Series has the same index as
+        ``moodle_ids``.
+        """
+        return moodle_ids.map(self._matr_ids)
+    
+    def get_name_history(self, moodle_id: str) -> list[str]:
+        """
+        Returns all full names that were ever observed for the specified Moodle ID (oldest
+        first).
+        """
+        entries = self._df[self._df[IdentityIndex.MOODLE_ID_COL] == moodle_id]
+        return entries[IdentityIndex.FULL_NAME_COL].tolist()
+    
+    def update(self, moodle_ids: pd.Series, matr_ids: pd.Series, full_names: pd.Series) -> int:
+        """
+        Adds all (Moodle ID, matriculation ID, full name) combinations that are not yet part
+        of this index. The three pd.Series objects must be aligned, i.e., have the same
+        length and order.
+
+        :return: The number of newly added entries.
+        """
+        new_df = pd.DataFrame({
+            IdentityIndex.MOODLE_ID_COL: moodle_ids.to_numpy(dtype=object),
+            IdentityIndex.MATR_ID_COL: matr_ids.to_numpy(dtype=object),
+            IdentityIndex.FULL_NAME_COL: full_names.to_numpy(dtype=object),
+        }).astype(str)
+        merged = new_df.merge(self._df, how="left", indicator=True)
+        new_df = merged[merged["_merge"] == "left_only"][IdentityIndex.COLUMNS].drop_duplicates()
+        if len(new_df) > 0:
+            self._df = pd.concat([self._df, new_df], ignore_index=True)
+            self._rebuild()
+        return len(new_df)
+    
+    def save(self):
+        if self.file is None:
+            raise ValueError("identity index has no file to save to")
+        os.makedirs(os.path.dirname(os.path.abspath(self.file)), exist_ok=True)
+        self._df.to_csv(self.file, index=False)
@@ -1,4 +1,5 @@
 # TODO: copy from "moodle-submission-splitter" project
+import hashlib
 import itertools
 import math
 import os
@@ -12,13 +13,22 @@ from glob import glob
 
 import numpy as np
 import pandas as pd
-from PySide6.QtCore import Signal
+
+from diagnostics import annotate, span, traced
+from tasks import ProgressReporter, CancellationToken
+from util import RowIndex
+from .identity import IdentityIndex
 
 
 # TODO: many hard-coded default values and assumptions
 # TODO: handle empty tutors and submissions
 
 
+# Regex pattern to extract the full student name and the 7-digit Moodle ID from a submission name (see
+# "split_submissions"). Must contain the named groups "full_name" and "moodle_id".
+SUBMISSION_PATTERN = r"^(?P<full_name>.+)_(?P<moodle_id>\d{7})(?!\d)"
+
+
 def extract_exercise_number(submissions_file: str, exercise_names: Iterable[str]):
     for ex_name in exercise_names:
         match = re.search(rf"{ex_name}[\s\-_]*(\d+)", os.path.basename(submissions_file))
@@ -60,15 +70,23 @@ def handle_duplicate_names(tutors_df: pd.DataFrame):
     tutors_df.loc[dup, "name"] = [f"{dn} ({update_and_get_count(dn)})" for dn in dup_names]
 
 
-def get_submissions_df(submissions: Iterable[str], regex_cols: dict[str, str]):
-    data = defaultdict(list)
-    for s in submissions:
-        for name, regex in regex_cols.items():
-            match = re.search(regex, s)
-            if match is None:
-                raise ValueError(f"submission '{s}' does not contain regex pattern '{regex}' for column '{name}'")
-            data[name].append(match.group())
-    return pd.DataFrame(data)
+@traced(category="split")
+def get_submissions_df(submissions: Iterable[str], pattern: str, group_cols: dict[str, str] = None,
+                       submission_col: str = None):
+    # All columns are extracted with a single regex (one named group per column) that is applied to all submission
+    # names at once (vectorized), instead of searching each column pattern in each name separately.
+    names = pd.Series(list(submissions), dtype=object)
+    df = names.str.extract(pattern, expand=True)
+    invalid = df.isna().any(axis=1)
+    if invalid.any():
+        invalid_names = "\n".join(names[invalid])
+        raise ValueError(f"the following {invalid.sum()} submissions do not match the regex pattern '{pattern}':\n"
+                         f"{invalid_names}")
+    if group_cols:
+        df.rename(columns=group_cols, inplace=True)
+    if submission_col is not None:
+        df[submission_col] = names
+    return df
 
 
 def match_full_names(full_names: pd.Series, info_df: pd.DataFrame):
@@ -96,9 +114,37 @@ def match_full_names(full_names: pd.Series, info_df: pd.DataFrame):
                      f"'{closest_mismatch.col1}' and '{closest_mismatch.col2}':\n{closest_mismatch.df}")
 
 
-def weighted_chunks(df: pd.DataFrame, weights: Iterable):
+def merge_by_full_names(submissions_df: pd.DataFrame, info_df: pd.DataFrame, full_name_col: str,
+                        first_name_col: str = None, last_name_col: str = None):
+    if first_name_col is None:
+        first_name_col, last_name_col = match_full_names(submissions_df[full_name_col], info_df)
+        print(f"identified '{first_name_col}' as first name column and '{last_name_col}' as last name column")
+    info_df = info_df.copy()
+    info_df[full_name_col] = info_df[first_name_col] + " " + info_df[last_name_col]
+    merged_df = pd.merge(submissions_df, info_df, on=full_name_col, how="inner")
+    if len(submissions_df) != len(merged_df):
+        no_duplicates = merged_df.drop_duplicates(subset=full_name_col, keep=False)
+        duplicates = merged_df.loc[~merged_df.index.isin(no_duplicates.index)]
+        if len(duplicates) > 0:
+            raise ValueError(f"duplicate names detected:\n{duplicates}")
+        else:
+            not_in_info = submissions_df[~submissions_df[full_name_col].isin(info_df[full_name_col])]
+            raise ValueError("the following entries were part of the submissions but not the info_df (wrong "
+                             f"course? submissions and info inconsistent (check download date)?):\n{not_in_info}")
+    return merged_df
+
+
+def weighted_chunks(df: pd.DataFrame, weights: Iterable, offsets: Iterable = None):
     # Scale weights to sum = 1.
     weights = np.array(weights, dtype=float) / sum(weights)
+    if offsets is not None:
+        # Some elements were already distributed beforehand (the number per chunk is given by "offsets"), so only
+        # distribute the new elements in a way that the overall chunk sizes (offsets + new chunk sizes) match the
+        # weights as closely as possible, i.e., fill up the chunks that are furthest below their target size.
+        offsets = np.array(offsets, dtype=float)
+        deficits = np.maximum(0, (len(df) + offsets.sum()) * weights - offsets)
+        if deficits.sum() > 0:
+            weights = deficits / deficits.sum()
     chunk_sizes = [math.floor(len(df) * w) for w in weights]
     # Distribute the remaining elements evenly. Just repeatedly increase each chunk size by 1 until we distributed all
     # remaining elements.
@@ -119,10 +165,240 @@ def weighted_chunks(df: pd.DataFrame, weights: Iterable):
     return chunks
 
 
+@traced(category="split")
+def resolve_students(
+        submissions_df: pd.DataFrame,
+        info_df: pd.DataFrame,
+        full_name_col: str,
+        moodle_id_col: str,
+        info_df_id_col: str,
+        info_df_first_name_col: str = None,
+        info_df_last_name_col: str = None,
+        identity_index_file: str = None,
+        print_abs_paths: bool = False,
+        info_index: RowIndex = None,
+        cancellation_token: CancellationToken = None
+) -> pd.DataFrame:
+    # "info_index" is a RowIndex of "info_df" on "info_df_id_col" (e.g., the one maintained by the students model),
+    # which is used to look up the students that are resolved via the identity index (built if None)
+    if cancellation_token is not None:
+        cancellation_token.raise_if_cancelled()
+    if identity_index_file is not None:
+        # Resolve all students whose Moodle ID is already known with a single join on the Moodle ID (and then on the
+        # matriculation ID), which also works if the names changed in the meantime. Only the remaining, unknown Moodle
+        # IDs must be resolved via the full names.
+        identity_index = IdentityIndex(identity_index_file)
+        known = identity_index.contains(submissions_df[moodle_id_col])
+        known_df = submissions_df[known].copy()
+        known_df[info_df_id_col] = identity_index.lookup(known_df[moodle_id_col])
+        if info_index is None:
+            info_index = RowIndex(info_df, info_df_id_col)
+        info_index.check(info_df)
+        positions = info_index.get_positions(known_df[info_df_id_col])
+        found = positions >= 0
+        info_cols = [c for c in info_df.columns if c not in (info_df_id_col, full_name_col)]
+        known_merged_df = pd.concat([known_df[found].reset_index(drop=True),
+                                     info_df[info_cols].iloc[positions[found]].reset_index(drop=True)], axis=1)
+        if not found.all():
+            not_in_info = known_df[~found]
+            raise ValueError("the following entries were part of the submissions but not the info_df (wrong "
+                             f"course? submissions and info inconsistent (check download date)?):\n{not_in_info}")
+        unknown_df = submissions_df[~known]
+        print(f"resolved {len(known_df)} submissions via the identity index, {len(unknown_df)} remaining")
+    else:
+        identity_index = None
+        known_merged_df = None
+        unknown_df = submissions_df
+    
+    if cancellation_token is not None:
+        cancellation_token.raise_if_cancelled()
+    merged_dfs = [] if known_merged_df is None else [known_merged_df]
+    if len(unknown_df) > 0 or not merged_dfs:
+        merged_dfs.append(merge_by_full_names(unknown_df, info_df, full_name_col, info_df_first_name_col,
+                                              info_df_last_name_col))
+    merged_df = pd.concat(merged_dfs, ignore_index=True)
+    if cancellation_token is not None:
+        cancellation_token.raise_if_cancelled()
+    
+    if identity_index is not None:
+        n_new = identity_index.update(merged_df[moodle_id_col], merged_df[info_df_id_col], merged_df[full_name_col])
+        if n_new > 0:
+            identity_index.save()
+            print(f"added {n_new} entries to the identity index "
+                  f"'{get_file_path(identity_index_file, print_abs_paths)}'")
+    return merged_df
+
+
+@traced(category="split")
+def write_tutor_file(
+        chunk_file: str,
+        chunk_df: pd.DataFrame,
+        unzip_dir: str,
+        submission_col: str,
+        submission_renaming_keys: Sequence[str],
+        submission_renaming_separator: str,
+        progress_callback: ProgressReporter = None,
+        cancellation_token: CancellationToken = None,
+        mode: str = "w"
+) -> list[str]:
+    new_names = []
+    n_bytes = 0
+    with zipfile.ZipFile(chunk_file, mode) as f:
+        # Write all files from the submission directory to the tutors ZIP file. Must exclude directories, since glob
+        # includes them. Also specify the relative path as name in the ZIP file (arcname), as otherwise, the full
+        # absolute path would be stored in the ZIP file.
+        for _, entry in chunk_df.iterrows():
+            if submission_renaming_keys:
+                name = submission_renaming_separator.join(entry[k] for k in submission_renaming_keys)
+            else:
+                name = entry[submission_col]
+            new_names.append(name)
+            for file in glob(os.path.join(unzip_dir, entry[submission_col], "**"), recursive=True):
+                if cancellation_token is not None:
+                    cancellation_token.raise_if_cancelled()
+                if os.path.isfile(file):
+                    if submission_renaming_keys:
+                        arcname = os.path.join(name, os.path.basename(file))
+                    else:
+                        arcname = file[len(unzip_dir) + 1:]
+                    f.write(file, arcname=arcname)
+                    size = os.path.getsize(file)
+                    n_bytes += size
+                    if progress_callback is not None:
+                        progress_callback.advance(size)
+    annotate(file=os.path.basename(chunk_file), bytes=n_bytes)
+    return new_names
+
+
+@traced(category="split")
+def get_submission_infos(zip_file: zipfile.ZipFile) -> pd.DataFrame:
+    # Collect the total (uncompressed) size, the number of files and a content hash of each submission, i.e., of each
+    # top-level directory, solely based on the metadata of the ZIP file (no decompression required). The hash is
+    # calculated from the relative file paths within the submission (the submission directory itself contains the
+    # student name which might change), the file sizes and the CRC-32 checksums.
+    infos = defaultdict(lambda: [0, 0, hashlib.sha1()])
+    for info in sorted(zip_file.infolist(), key=lambda i: i.filename):
+        if info.is_dir():
+            continue
+        submission, _, path = info.filename.partition("/")
+        entry = infos[submission]
+        entry[0] += info.file_size
+        entry[1] += 1
+        entry[2].update(f"{path}:{info.file_size}:{info.CRC}\n".encode())
+    return pd.DataFrame(
+        [[size, n_files, h.hexdigest()] for size, n_files, h in infos.values()],
+        index=pd.Index(list(infos.keys())),
+        columns=["Submission bytes", "Submission files", "Content hash"]
+    )
+
+
+def balanced_chunks(df: pd.DataFrame, weights: Iterable, workloads: Iterable, offsets: Iterable = None):
+    # Greedy longest-processing-time-first scheduling: Go through all elements from the largest to the smallest workload
+    # and always assign the current element to the chunk whose (weight-relative) total workload would be the smallest
+    # after the assignment. Chunks with larger weights thus receive proportionally more workload. "offsets" specifies
+    # the workload that was already assigned to each chunk beforehand (default: 0).
+    weights = np.array(weights, dtype=float)
+    workloads = np.array(workloads, dtype=float)
+    assert len(workloads) == len(df)
+    loads = np.zeros(len(weights)) if offsets is None else np.array(offsets, dtype=float)
+    assignment = np.empty(len(df), dtype=int)
+    positive = weights > 0
+    if not positive.any():
+        raise ValueError("at least one chunk must have a positive weight")
+    # Chunks with weight 0 never receive any elements (also not elements with workload 0, where the relative workload
+    # would be 0 / 0)
+    inverse_weights = np.divide(1, weights, out=np.zeros(len(weights)), where=positive)
+    for pos in np.argsort(-workloads, kind="stable"):
+        idx = np.argmin(np.where(positive, (loads + workloads[pos]) * inverse_weights, np.inf))
+        loads[idx] += workloads[pos]
+        assignment[pos] = idx
+    # Keep the original order within each chunk
+    chunks = [df.iloc[np.flatnonzero(assignment == i)].copy() for i in range(len(weights))]
+    assert sum([len(c) for c in chunks]) == len(df)
+    return chunks
+
+
+def estimate_workloads(sizes: pd.Series, n_files: pd.Series, size_share: float = 0.5) -> pd.Series:
+    # The workload of a submission is estimated via its size (bytes) and its number of files, where both are normalized
+    # such that an average submission has a workload of 1. "size_share" determines how much the size contributes to
+    # the estimated workload (the rest is contributed by the number of files).
+    def normalize(s: pd.Series):
+        mean = s.mean()
+        return s / mean if mean > 0 else s * 0.0
+    
+    return size_share * normalize(sizes.astype(float)) + (1 - size_share) * normalize(n_files.astype(float))
+
+
+def get_tutor_file(submissions_file: str, tutor_name: str):
+    return f"{submissions_file[:-4]}_{tutor_name}.zip"
+
+
+@traced(category="split")
+def assign_tutors(submissions_df: pd.DataFrame, tutors_df: pd.DataFrame, submissions_file: str,
+                  existing: pd.Series = None, workloads: pd.Series = None, group_col: str = None) -> pd.DataFrame:
+    # "existing" contains the number of already assigned submissions per tutor name (or their total workload if
+    # "workloads" is specified, in which case the submissions are distributed according to their workloads).
+    # Submissions with the same "group_col" value (e.g., the submissions of a student for different submission
+    # plugins) are assigned to the same tutor.
+    if group_col is not None:
+        groups = submissions_df[group_col]
+        group_df = submissions_df.drop_duplicates(group_col)[[group_col]]
+        group_workloads = None if workloads is None else workloads.groupby(groups).sum()[group_df[group_col]].to_numpy()
+        group_df = assign_tutors(group_df, tutors_df, submissions_file, existing, group_workloads).set_index(group_col)
+        assigned_df = submissions_df.copy()
+        for col in ["Tutor name", "Tutor weight", "Tutor file"]:
+            assigned_df[col] = groups.map(group_df[col])
+        # Same order as without groups (by tutor), where the submissions of a group are next to each other
+        ranks = groups.map(pd.Series(np.arange(len(group_df)), index=group_df.index))
+        return assigned_df.iloc[np.argsort(ranks.to_numpy(), kind="stable")]
+    offsets = None if existing is None else tutors_df["name"].map(existing).fillna(0)
+    if workloads is None:
+        chunks = weighted_chunks(submissions_df, tutors_df["weight"], offsets)
+    else:
+        chunks = balanced_chunks(submissions_df, tutors_df["weight"], workloads, offsets)
+    chunk_dfs = []
+    for i, chunk_df in enumerate(chunks):
+        chunk_df["Tutor name"] = tutors_df["name"].iloc[i]
+        chunk_df["Tutor weight"] = tutors_df["weight"].iloc[i]
+        chunk_df["Tutor file"] = get_tutor_file(submissions_file, tutors_df["name"].iloc[i])
+        chunk_dfs.append(chunk_df)
+    return pd.concat(chunk_dfs)
+
+
+def get_delta_file(tutor_file: str):
+    # Find the next free delta file name, i.e., "<tutor file>_delta<n>.zip"
+    n = 1
+    while os.path.exists(f"{tutor_file[:-4]}_delta{n}.zip"):
+        n += 1
+    return f"{tutor_file[:-4]}_delta{n}.zip"
+
+
+def prepare_append_file(tutor_file: str, append_file: str, stale_prefixes: Iterable[str]):
+    # Creates a copy of the existing tutor file (if any) to which new submissions can be appended without touching the
+    # original tutor file (in case of an error or cancellation). Outdated versions of changed submissions, i.e., all
+    # entries that start with one of the stale prefixes, are not copied.
+    stale_prefixes = tuple(f"{p}/" for p in stale_prefixes)
+    if not os.path.isfile(tutor_file):
+        zipfile.ZipFile(append_file, "w").close()
+    elif not stale_prefixes:
+        shutil.copyfile(tutor_file, append_file)
+    else:
+        with zipfile.ZipFile(tutor_file, "r") as src, zipfile.ZipFile(append_file, "w") as dst:
+            for info in src.infolist():
+                if not info.filename.startswith(stale_prefixes):
+                    dst.writestr(info, src.read(info))
+
+
+def format_tutors(tutors_df: pd.DataFrame) -> str:
+    # Compact single-line representation (instead of rendering the entire DataFrame)
+    return ", ".join(f"{name} ({weight:g})" for name, weight in zip(tutors_df["name"], tutors_df["weight"]))
+
+
 def get_file_path(path: str, absolute: bool):
     return os.path.abspath(path) if absolute else os.path.basename(path)
 
 
+@traced(category="split")
 def split_submissions(
         submissions_file: str,
         tutors_df: pd.DataFrame,
@@ -131,6 +407,7 @@ def split_submissions(
         full_name_col: str = "full_name",
         moodle_id_col: str = "moodle_id",
         submission_col: str = "Submission file",
+        submission_pattern: str = SUBMISSION_PATTERN,
         print_abs_paths: bool = False,
         info_df: pd.DataFrame = None,
         sorting_keys: Sequence[str] = ("Surname", "First name"),
@@ -139,13 +416,24 @@ def split_submissions(
         info_df_first_name_col: str = "First name",
         info_df_last_name_col: str = "Surname",
         drop_columns: list[str] = None,
-        progress_callback: Signal = None,
+        info_df_id_col: str = "ID number",
+        identity_index_file: str = None,
+        info_index: RowIndex = None,
+        incremental: bool = False,
+        manifest_file: str = None,
+        delta_archives: bool = False,
+        balance_workload: bool = False,
+        workload_size_share: float = 0.5,
+        progress_callback: ProgressReporter = None,
+        cancellation_token: CancellationToken = None,
 ) -> pd.DataFrame:
     # If the number of the exercise is specified, use it. Otherwise, try to extract/infer it from the submission
     # filename.
     exercise_num = number if number is not None else extract_exercise_number(submissions_file, exercise_names)
     
     assert len(tutors_df.columns) == 1 or len(tutors_df.columns) == 2
+    # The tutors are modified below, which must not affect the caller (e.g., the tutors table)
+    tutors_df = tutors_df.copy()
     # Assign equal default weights if only tutor names were specified to ensure we have a weight column.
     if len(tutors_df.columns) == 1:
         tutors_df[1] = 1
@@ -156,89 +444,195 @@ def split_submissions(
     handle_duplicate_names(tutors_df)
     
     unzip_dir = submissions_file + "_UNZIPPED"
-    print(f"extracting submissions ZIP file to '{get_file_path(unzip_dir, print_abs_paths)}'")
-    with zipfile.ZipFile(submissions_file, "r") as f:
-        f.extractall(unzip_dir)
-    # To extract data, the following format is assumed for each submission (correct at the time of writing this code):
-    # <full student name>_<7-digit moodle ID>_<rest of submission string>
-    # where <full student name> is a space-separated list of strings that holds the full student name, i.e., all first
-    # names and all last names (however, we do not know which parts belong to first names and which to last names),
-    # <7-digit moodle ID> is an ID with 7 digits generated by Moodle, and <rest of submission string> can be an
-    # arbitrary string (at the time of writing this code, this is the string "assignsubmission_file_").
-    # TODO: create params for all these columns and regex patterns in case the Moodle format changes (currently, this
-    #  would require code modification right here)
-    submissions_df = get_submissions_df(os.listdir(unzip_dir), regex_cols={
-        full_name_col: r".+(?=_\d{7})",  # Extract the full name according to the above format.
-        moodle_id_col: r"\d{7}",  # Extract the 7-digit Moodle ID according to the above format.
-        submission_col: r".+",  # This is simply the entire submission (no specific extraction of a pattern).
-    })
-    if info_df is not None:
-        first_name_col = info_df_first_name_col
-        last_name_col = info_df_last_name_col
-        if first_name_col is None:
-            first_name_col, last_name_col = match_full_names(submissions_df[full_name_col], info_df)
-            print(f"identified '{first_name_col}' as first name column and '{last_name_col}' as last name column")
-        info_df[full_name_col] = info_df[first_name_col] + " " + info_df[last_name_col]
-        merged_df = pd.merge(submissions_df, info_df, on=full_name_col, how="inner")
-        if len(submissions_df) != len(merged_df):
-            no_duplicates = merged_df.drop_duplicates(subset=full_name_col, keep=False)
-            duplicates = merged_df.loc[~merged_df.index.isin(no_duplicates.index)]
-            if len(duplicates) > 0:
-                raise ValueError(f"duplicate names detected:\n{duplicates}")
+    # All tutor ZIP files that were (partially) written, so they can be removed again if an error occurs or if the
+    # splitting is cancelled.
+    chunk_files = []
+    try:
+        print(f"extracting submissions ZIP file to '{get_file_path(unzip_dir, print_abs_paths)}'")
+        with span("extract submissions", "split", bytes=os.path.getsize(submissions_file)) as s:
+            with zipfile.ZipFile(submissions_file, "r") as f:
+                submission_infos = get_submission_infos(f)
+                # Extract entry by entry (instead of "extractall"), so large archives can be cancelled in between
+                for info in f.infolist():
+                    if cancellation_token is not None:
+                        cancellation_token.raise_if_cancelled()
+                    f.extract(info, unzip_dir)
+            s.set(rows=len(submission_infos), uncompressed_bytes=int(submission_infos["Submission bytes"].sum()))
+        # Extract the full name and Moodle ID from each submission via "submission_pattern". By default, the following
+        # format is assumed for each submission (correct at the time of writing this code):
+        # <full student name>_<7-digit moodle ID>_<rest of submission string>
+        # where <full student name> is a space-separated list of strings that holds the full student name, i.e., all
+        # first names and all last names (however, we do not know which parts belong to first names and which to last
+        # names), <7-digit moodle ID> is an ID with 7 digits generated by Moodle, and <rest of submission string> can
+        # be an arbitrary string (at the time of writing this code, this is the string "assignsubmission_file_").
+        # The submission column is simply the entire submission (no specific extraction of a pattern).
+        submissions_df = get_submissions_df(
+            os.listdir(unzip_dir),
+            pattern=submission_pattern,
+            group_cols={"full_name": full_name_col, "moodle_id": moodle_id_col},
+            submission_col=submission_col
+        )
+        if info_df is not None:
+            submissions_df = resolve_students(submissions_df, info_df, full_name_col, moodle_id_col, info_df_id_col,
+                                              info_df_first_name_col, info_df_last_name_col, identity_index_file,
+                                              print_abs_paths, info_index, cancellation_token)
+            if sorting_keys:
+                print(f"sorting submissions according to: {', '.join(sorting_keys)}")
+                submissions_df.sort_values(by=list(sorting_keys), inplace=True)
+        else:
+            submissions_df.sort_values(submission_col, inplace=True)
+        
+        if submission_renaming_keys:
+            name_format = submission_renaming_separator.join(f"<{k}>" for k in submission_renaming_keys)
+            print(f"renaming submissions according to the following format: {name_format}")
+        
+        # Submission sizes and number of files (read from the archive metadata), e.g., to balance the workload
+        for col in ["Submission bytes", "Submission files"]:
+            submissions_df[col] = submissions_df[submission_col].map(submission_infos[col])
+        workloads = None
+        if balance_workload:
+            print("balancing the estimated workload (based on submission sizes and number of files) among tutors")
+            workloads = estimate_workloads(submissions_df["Submission bytes"], submissions_df["Submission files"],
+                                           workload_size_share)
+        
+        new_name_col = f"New {submission_col.lower()}"
+        tutor_cols = ["Tutor name", "Tutor weight", "Tutor file"]
+        manifest_cols = [moodle_id_col, submission_col, "Content hash"] + tutor_cols + [new_name_col]
+        # Contains an entry for each submission that was already distributed, i.e., which submission (with which
+        # content) was written to which tutor file. Can be specified per exercise via the placeholder "{number}". It is
+        # only written in incremental mode or if it was explicitly specified.
+        write_manifest = incremental or manifest_file is not None
+        if manifest_file is None:
+            manifest_file = f"{submissions_file[:-4]}_manifest.csv"
+        manifest_file = manifest_file.format(number=exercise_num)
+        manifest_df = None
+        if incremental and os.path.isfile(manifest_file):
+            manifest_df = pd.read_csv(manifest_file, dtype=str, keep_default_na=False)
+            manifest_df["Tutor weight"] = manifest_df["Tutor weight"].astype(float)
+            print(f"loaded manifest '{get_file_path(manifest_file, print_abs_paths)}' with {len(manifest_df)} "
+                  f"already distributed submissions")
+        content_hashes = submissions_df[submission_col].map(submission_infos["Content hash"])
+        
+        if manifest_df is None:
+            status = pd.Series("new", index=submissions_df.index)
+            print(f"distributing {len(submissions_df)} submissions among the following {len(tutors_df)} tutors: "
+                  f"{format_tutors(tutors_df)}")
+            submissions_df = assign_tutors(submissions_df, tutors_df, submissions_file, workloads=workloads,
+                                           group_col=moodle_id_col)
+            submissions_df[new_name_col] = ""
+            # Always (re)create all tutor files, even the ones without any submissions
+            tutor_files = [get_tutor_file(submissions_file, name) for name in tutors_df["name"]]
+        else:
+            # Already distributed submissions stay with their tutors (unchanged ones are not written at all, changed
+            # ones are written to the same tutor again), only new submissions are distributed among the tutors. The
+            # manifest is keyed by the submission (directory), since Moodle creates one submission per student and
+            # submission plugin (e.g., "..._assignsubmission_file_" and "..._assignsubmission_onlinetext_").
+            previous_df = manifest_df.set_index(submission_col)
+            previous_hashes = submissions_df[submission_col].map(previous_df["Content hash"])
+            known = previous_hashes.notna()
+            status = pd.Series(np.where(known, np.where(previous_hashes == content_hashes, "unchanged", "changed"),
+                                        "new"), index=submissions_df.index)
+            # All submissions of a student share the same new name (see write_tutor_file), so replacing a changed
+            # submission also removes the other ones of the same student, which must thus be written again as well
+            changed_students = submissions_df.loc[status == "changed", moodle_id_col]
+            status[(status == "unchanged") & submissions_df[moodle_id_col].isin(changed_students)] = "changed"
+            known_df = submissions_df[known].copy()
+            for col in tutor_cols + [new_name_col]:
+                known_df[col] = known_df[submission_col].map(previous_df[col])
+            new_df = submissions_df[~known].copy()
+            # New submissions of already distributed students (e.g., of another submission plugin) go to the same tutor
+            student_df = manifest_df.drop_duplicates(moodle_id_col, keep="last").set_index(moodle_id_col)
+            same_tutor = new_df[moodle_id_col].isin(student_df.index)
+            same_tutor_df = new_df[same_tutor].copy()
+            for col in tutor_cols:
+                same_tutor_df[col] = same_tutor_df[moodle_id_col].map(student_df[col])
+            assigned_df = pd.concat([known_df, same_tutor_df])
+            new_df = new_df[~same_tutor]
+            print(f"distributing {len(new_df)} new submissions among the following {len(tutors_df)} tutors "
+                  f"({same_tutor.sum()} new of known students, {(status == 'changed').sum()} changed, "
+                  f"{(status == 'unchanged').sum()} unchanged): {format_tutors(tutors_df)}")
+            if workloads is None:
+                n_assigned = assigned_df.drop_duplicates(moodle_id_col)["Tutor name"].value_counts()
+                new_df = assign_tutors(new_df, tutors_df, submissions_file, n_assigned, group_col=moodle_id_col)
             else:
-                not_in_info = submissions_df[~submissions_df[full_name_col].isin(info_df[full_name_col])]
-                raise ValueError("the following entries were part of the submissions but not the info_df (wrong "
-                                 f"course? submissions and info inconsistent (check download date)?):\n{not_in_info}")
-        if sorting_keys:
-            print(f"sorting submissions according to: {', '.join(sorting_keys)}")
-            merged_df.sort_values(by=list(sorting_keys), inplace=True)
-        submissions_df = merged_df
-    else:
-        submissions_df.sort_values(submission_col, inplace=True)
-    
-    if submission_renaming_keys:
-        name_format = submission_renaming_separator.join(f"<{k}>" for k in submission_renaming_keys)
-        print(f"renaming submissions according to the following format: {name_format}")
-    
-    print(f"distributing {len(submissions_df)} submissions among the following {len(tutors_df)} tutors:")
-    print(tutors_df)
-    chunk_dfs = []
-    submission_counter = 0
-    for i, chunk_df in enumerate(weighted_chunks(submissions_df, tutors_df["weight"])):
-        new_names = []
-        chunk_file = f"{submissions_file[:-4]}_{tutors_df['name'][i]}.zip"
-        with zipfile.ZipFile(chunk_file, "w") as f:
-            # Write all files from the submission directory to the tutors ZIP file. Must exclude directories, since glob
-            # includes them. Also specify the relative path as name in the ZIP file (arcname), as otherwise, the full
-            # absolute path would be stored in the ZIP file.
-            for _, entry in chunk_df.iterrows():
-                name = submission_renaming_separator.join(entry[k] for k in submission_renaming_keys)
-                new_names.append(name)
-                for file in glob(os.path.join(unzip_dir, entry[submission_col], "**"), recursive=True):
-                    if os.path.isfile(file):
-                        if submission_renaming_keys:
-                            name = os.path.join(name, os.path.basename(file))
-                        else:
-                            name = file[len(unzip_dir) + 1:]
-                        f.write(file, arcname=name)
-                if progress_callback is not None:
-                    submission_counter += 1
-                    progress_callback.emit(int(100 * submission_counter / len(submissions_df)))
+                new_df = assign_tutors(new_df, tutors_df, submissions_file,
+                                       workloads[assigned_df.index].groupby(assigned_df["Tutor name"]).sum(),
+                                       workloads[new_df.index], moodle_id_col)
+            # New submissions are added to the tutor files recorded in the manifest, which do not depend on the name of
+            # the current submissions file (e.g., if a re-downloaded archive got a different name)
+            recorded_files = manifest_df.drop_duplicates("Tutor name").set_index("Tutor name")["Tutor file"]
+            new_df["Tutor file"] = new_df["Tutor name"].map(recorded_files).fillna(new_df["Tutor file"])
+            new_df = pd.concat([same_tutor_df, new_df])
+            new_df[new_name_col] = ""
+            submissions_df = pd.concat([known_df, new_df]).loc[submissions_df.index]
+            tutor_files = submissions_df.loc[status != "unchanged", "Tutor file"].unique().tolist()
         
-        chunk_df[["Tutor name", "Tutor weight"]] = tutors_df[["name", "weight"]].iloc[i]
-        chunk_df["Tutor file"] = chunk_file
-        chunk_df[f"New {submission_col.lower()}"] = new_names
-        chunk_dfs.append(chunk_df)
+        status = status[submissions_df.index]
+        tutor_file_assignments = submissions_df["Tutor file"].copy()
+        to_write = status != "unchanged"
+        if progress_callback is not None:
+            total_size = submissions_df.loc[to_write, "Submission bytes"].sum()
+            progress_callback.start(total=total_size, unit="B")
+        # Temporary append files that replace the corresponding tutor files once everything was written successfully
+        replacements = []
+        for i, tutor_file in enumerate(tutor_files):
+            chunk_df = submissions_df[to_write & (submissions_df["Tutor file"] == tutor_file)]
+            mode = "w"
+            if manifest_df is None:
+                chunk_file = tutor_file
+            elif delta_archives:
+                chunk_file = get_delta_file(tutor_file)
+                submissions_df.loc[chunk_df.index, "Tutor file"] = chunk_file
+            else:
+                chunk_file = f"{tutor_file}.tmp"
+                stale_prefixes = chunk_df.loc[status[chunk_df.index] == "changed", new_name_col]
+                prepare_append_file(tutor_file, chunk_file, stale_prefixes)
+                replacements.append((chunk_file, tutor_file))
+                mode = "a"
+            chunk_files.append(chunk_file)
+            new_names = write_tutor_file(chunk_file, chunk_df, unzip_dir, submission_col, submission_renaming_keys,
+                                         submission_renaming_separator, progress_callback, cancellation_token, mode)
+            submissions_df.loc[chunk_df.index, new_name_col] = new_names
+            print(f"[{i + 1}/{len(tutor_files)}] {len(chunk_df):3d} submissions ---> "
+                  f"{get_file_path(chunk_file if mode == 'w' else tutor_file, print_abs_paths)}")
+        for append_file, tutor_file in replacements:
+            os.replace(append_file, tutor_file)
         
-        print(f"[{i + 1}/{len(tutors_df)}] {len(chunk_df):3d} submissions ---> "
-              f"{get_file_path(chunk_file, print_abs_paths)}")
-    
-    print(f"deleting extracted submissions directory '{get_file_path(unzip_dir, print_abs_paths)}'")
-    shutil.rmtree(unzip_dir, ignore_errors=True)  # TODO: should be done in try-finally
+        # Store the new manifest (also keep previous entries whose submissions are no longer part of this archive)
+        current_manifest_df = submissions_df.assign(**{
+            "Content hash": content_hashes,
+            # The manifest always refers to the actual tutor files (delta files are only additions)
+            "Tutor file": tutor_file_assignments
+        })[manifest_cols]
+        if manifest_df is not None:
+            manifest_df = manifest_df[~manifest_df[submission_col].isin(current_manifest_df[submission_col])]
+            current_manifest_df = pd.concat([manifest_df[manifest_cols], current_manifest_df], ignore_index=True)
+        if write_manifest:
+            os.makedirs(os.path.dirname(os.path.abspath(manifest_file)), exist_ok=True)
+            current_manifest_df.to_csv(manifest_file, index=False)
+            print(f"manifest written to '{get_file_path(manifest_file, print_abs_paths)}'")
+        
+        if progress_callback is not None:
+            progress_callback.finish()
+    except BaseException:
+        # Do not leave incomplete tutor ZIP files behind (also includes cancellation via CancelledError)
+        for chunk_file in chunk_files:
+            if os.path.isfile(chunk_file):
+                print(f"deleting partial tutor file '{get_file_path(chunk_file, print_abs_paths)}'")
+                os.remove(chunk_file)
+        raise
+    finally:
+        print(f"deleting extracted submissions directory '{get_file_path(unzip_dir, print_abs_paths)}'")
+        shutil.rmtree(unzip_dir, ignore_errors=True)
     
-    df = pd.concat(chunk_dfs)
+    df = submissions_df
+    # Report the total (estimated) workload per tutor
+    df["Tutor total bytes"] = df.groupby("Tutor name")["Submission bytes"].transform("sum")
+    df["Tutor total files"] = df.groupby("Tutor name")["Submission files"].transform("sum")
+    if manifest_df is not None:
+        df["Split status"] = status
     if drop_columns is None:
         drop_columns = [full_name_col, moodle_id_col]
     df.drop(columns=drop_columns, inplace=True)
-    df.insert(len(df.columns) - 2, submission_col, df.pop(submission_col))
+    df.insert(df.columns.get_loc("Tutor file"), submission_col, df.pop(submission_col))
     return df
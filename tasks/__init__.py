@@ -0,0 +1,2 @@
+from .cancellation import CancellationToken, CancelledError
+from .progress import ProgressReporter
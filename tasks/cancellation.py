@@ -0,0 +1,28 @@
+import threading
+
+
+class CancelledError(Exception):
+    """Raised by long-running functions when they stop because of a cancellation request."""
+    pass
+
+
+class CancellationToken:
+    """
+    Thread-safe token for cooperative cancellation. The requesting side (e.g., the GUI)
+    calls ``cancel``, while the long-running function regularly calls ``raise_if_cancelled``
+    (e.g., once per processed file) to stop as soon as possible. The function is responsible
+    for cleaning up any partial output before the ``CancelledError`` propagates.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self):
+        self._event.set()
+    
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+    
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError("operation was cancelled")
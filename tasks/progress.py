@@ -0,0 +1,115 @@
+import time
+from typing import Callable
+
+
+def format_size(size: float, unit: str = "B"):
+    """Returns a human-readable representation of ``size`` (e.g., "12.3 MB" for 12300000 bytes)"""
+    for prefix in ["", "k", "M", "G"]:
+        if abs(size) < 1000:
+            return f"{size:.1f} {prefix}{unit}" if prefix else f"{size:.0f} {unit}"
+        size /= 1000
+    return f"{size:.1f} T{unit}"
+
+
+def format_duration(seconds: float):
+    """Returns a "[h:]mm:ss" representation of the specified ``seconds``"""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressReporter:
+    """
+    Rate-limited progress reporting for long-running functions. Progress is weighted by
+    an arbitrary amount (typically the number of processed bytes), so a single large work
+    item does not stall the progress while many small ones rush it. In addition to the
+    progress in percent, a status text with the current throughput and the estimated
+    remaining time is reported. Both are only forwarded if at least ``min_interval``
+    seconds have passed since the last report (or if the work is done), so calling
+    ``advance`` for every single item is cheap, even if the reporting functions are
+    cross-thread Qt signals.
+    
+    Usage::
+    
+        progress.start(total=sum(sizes), unit="B")
+        for item, size in zip(items, sizes):
+            process(item)
+            progress.advance(size)
+    """
+    
+    def __init__(self, progress_func: Callable[[int], None], status_func: Callable[[str], None] = None,
+                 min_interval: float = 0.1, clock: Callable[[], float] = time.monotonic):
+        """
+        :param progress_func: The function that is called with the progress in percent (int).
+        :param status_func: If not None, the function that is called with the status text
+            (throughput and estimated remaining time). Default: None
+        :param min_interval: The minimum time in seconds between two reports. Default: 0.1
+        :param clock: The function that returns the current time in seconds. Default: time.monotonic
+        """
+        self.progress_func = progress_func
+        self.status_func = status_func
+        self.min_interval = min_interval
+        self.clock = clock
+        self.start()
+    
+    def start(self, total: float = 100, unit: str = ""):
+        """
+        (Re)starts the progress reporting with ``total`` as the amount that corresponds
+        to 100%. The ``unit`` is only used for the status text (e.g., "B" for bytes).
+        """
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.start_time = self.clock()
+        self._last_report_time = None
+        self._last_percent = None
+    
+    def advance(self, amount: float = 1):
+        """Advances the progress by the specified ``amount`` (same unit as ``total`` in ``start``)."""
+        self.done += amount
+        self._report()
+    
+    def emit(self, percent: int):
+        """
+        Sets the progress directly to ``percent``. This method exists for compatibility with
+        functions that expect a progress signal, i.e., ``progress_callback.emit(percent)``.
+        """
+        self.done = self.total * percent / 100
+        self._report()
+    
+    def finish(self):
+        """Sets the progress to 100% and reports it (regardless of ``min_interval``)."""
+        self.done = self.total
+        self._report(force=True)
+    
+    def get_percent(self) -> int:
+        if self.total <= 0:
+            return 100
+        return min(100, int(100 * self.done / self.total))
+    
+    def get_status(self) -> str:
+        elapsed = self.clock() - self.start_time
+        if elapsed <= 0 or self.done <= 0:
+            return ""
+        throughput = self.done / elapsed
+        status = f"{format_size(throughput, self.unit)}/s"
+        remaining = max(0, self.total - self.done)
+        if remaining > 0:
+            status += f", ETA {format_duration(remaining / throughput)}"
+        return status
+    
+    def _report(self, force: bool = False):
+        now = self.clock()
+        percent = self.get_percent()
+        if not force:
+            # Nothing visible changed, or the last report was too recent (always report 100% though)
+            if percent == self._last_percent:
+                return
+            if (percent < 100 and self._last_report_time is not None and
+                    now - self._last_report_time < self.min_interval):
+                return
+        self._last_report_time = now
+        self._last_percent = percent
+        self.progress_func(percent)
+        if self.status_func is not None:
+            self.status_func(self.get_status())
@@ -0,0 +1 @@
+from .index import RowIndex
@@ -0,0 +1,56 @@
+from collections.abc import Hashable, Iterable
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+
+class RowIndex:
+    """
+    Hash index that maps the values of a key column (e.g., the matriculation IDs) to the row positions of a DataFrame,
+    so rows can be looked up in constant time instead of comparing the entire column for every lookup. Missing keys
+    are not indexed, and duplicate keys map to their first row (see ``duplicated``). The index is only valid for the
+    DataFrame it was built for (see ``df``), which must not be modified in place afterward.
+    """
+    
+    def __init__(self, df: pd.DataFrame, col: str):
+        """
+        :param df: The DataFrame to index.
+        :param col: The key column.
+        """
+        self.df = df
+        self.col = col
+        values = df[col]
+        valid = values.notna().to_numpy()
+        self.duplicated = pd.Index(values[values.duplicated(keep=False).to_numpy() & valid].unique())
+        self._positions = np.flatnonzero(valid & ~values.duplicated().to_numpy())
+        self._index = pd.Index(values.to_numpy()[self._positions])
+    
+    def __len__(self):
+        return len(self._positions)
+    
+    def __contains__(self, key: Hashable):
+        return key in self._index
+    
+    def check(self, df: pd.DataFrame):
+        """Raises a ValueError if this index was not built for ``df``."""
+        if df is not self.df:
+            raise ValueError(f"the '{self.col}' index was built for a different DataFrame")
+    
+    def get_position(self, key: Hashable) -> Union[int, None]:
+        """Returns the row position of ``key`` (None if it is not part of the index)."""
+        try:
+            return int(self._positions[self._index.get_loc(key)])
+        except (KeyError, TypeError):
+            return None
+    
+    def get_positions(self, keys: Iterable) -> np.ndarray:
+        """Returns the row positions of all ``keys`` (-1 for keys that are not part of the index)."""
+        indexer = self._index.get_indexer(pd.Index(keys))
+        if len(self._positions) == 0:
+            return indexer
+        return np.where(indexer >= 0, self._positions[indexer], -1)
+    
+    def is_duplicated(self, keys: Iterable) -> np.ndarray:
+        """Returns a boolean mask of all ``keys`` that occur more than once in the key column."""
+        return pd.Index(keys).isin(self.duplicated)
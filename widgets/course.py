@@ -0,0 +1,277 @@
+import time
+
+import os.path
+
+import PySide6.QtWidgets as qw
+from PySide6.QtCore import QTimer
+
+
+class CourseTab(qw.QWidget):
+    """
+    Tab that contains everything of a single course (students, submissions, grading). To keep the startup fast, the
+    actual sub-tabs (and all heavy modules they depend on, e.g., pandas) are only created once they are shown for the
+    first time. Until then, only lightweight placeholder widgets exist. The stored session of the course is also only
+    loaded at this point.
+    """
+    
+    SUB_TABS = ["Students", "Submissions", "Grading"]
+    
+    def __init__(self, name: str, students_df=None, tutors_df=None):  # TODO: temp
+        """
+        :param name: The name of the course (also used for the course data directory).
+        :param students_df: Optional initial students. Can be a pd.DataFrame or anything that can be converted to one
+            (e.g., a dictionary of columns), so callers do not have to import pandas. Default: None
+        :param tutors_df: Optional initial tutors (same types as ``students_df``). Default: None
+        """
+        super().__init__()
+        self.name = name
+        self.students_tab = None
+        self.submissions_tab = None
+        self.grading_tab = None
+        # DataFrames and metadata that still have to be applied to the (not yet built) sub-tabs
+        self._session_dfs = {"students": students_df, "tutors": tutors_df}
+        self._session_metadata = {}
+        self._session_loaded = False
+        
+        self.tabs = qw.QTabWidget()
+        for title in CourseTab.SUB_TABS:
+            self.tabs.addTab(qw.QWidget(), title)
+        self.tabs.currentChanged.connect(self.build_sub_tab)
+        # Optionally ingest new Moodle/KUSSS exports of this course from the downloads folder
+        self.watcher = None
+        self.watch_timer = QTimer(self)
+        self.watch_timer.timeout.connect(self.poll_downloads)
+        self.watch_check_box = qw.QCheckBox("Watch downloads")
+        self.watch_check_box.setToolTip("Automatically load new Moodle and KUSSS exports of this course from the "
+                                        "downloads folder and update the changed entries")
+        self.watch_check_box.toggled.connect(self.watch_check_box_toggled)
+        self.tabs.setCornerWidget(self.watch_check_box)
+        layout = qw.QVBoxLayout()
+        layout.addWidget(self.tabs)
+        self.setLayout(layout)
+    
+    def is_built(self) -> bool:
+        return self.students_tab is not None
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.is_built():
+            # Build after the event loop had the chance to paint the (empty) window
+            QTimer.singleShot(0, lambda: self.build_sub_tab(self.tabs.currentIndex()))
+    
+    def build_sub_tab(self, index: int):
+        """
+        Creates the sub-tab at the specified index (if it was not already created). The students tab is always created
+        first, since the other sub-tabs depend on its students model.
+        """
+        from .util import get_course_data_path, import_pandas
+        import_pandas()
+        from .tabs import StudentsTab, SubmissionsTab, GradingTab
+        
+        if not self._session_loaded:
+            self._load_session()
+        if self.students_tab is None:
+            self.students_tab = StudentsTab(None, course_name=self.name)
+            self._replace_placeholder(0, self.students_tab, "students")
+        model = self.students_tab.students_table.model
+        if index == 1 and self.submissions_tab is None:
+            # TODO: submissions tab should be optional if the specific course does not have submissions (e.g.,
+            #  lectures); maybe include a toggle button somewhere that removes/deactivates/disables the submissions tab
+            identity_index_file = get_course_data_path(self.name, "identity_index.csv")
+            manifest_file = get_course_data_path(self.name, "manifest_{number}.csv")
+            self.submissions_tab = SubmissionsTab(None, model, identity_index_file, manifest_file, self.name)
+            self._replace_placeholder(1, self.submissions_tab, "submissions")
+        elif index == 2 and self.grading_tab is None:
+            self.grading_tab = GradingTab(model, self.name)
+            self._replace_placeholder(2, self.grading_tab, "grading")
+    
+    def _replace_placeholder(self, index: int, tab: qw.QWidget, key: str):
+        tab.restore_session(self._session_dfs, self._session_metadata.get(key, {}))
+        current_index = self.tabs.currentIndex()
+        placeholder = self.tabs.widget(index)
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, tab, CourseTab.SUB_TABS[index])
+        self.tabs.setCurrentIndex(current_index)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+    
+    def _load_session(self):
+        from .util import get_course_data_path, import_pandas
+        pd = import_pandas()
+        from models.session import load_session
+        
+        self._session_loaded = True
+        self._session_dfs = {key: df if df is None or isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+                             for key, df in self._session_dfs.items()}
+        start = time.perf_counter()
+        try:
+            dfs, metadata = load_session(get_course_data_path(self.name, "session"))
+        except ImportError as ex:
+            print(f"cannot restore session (optional dependency missing): {ex}")
+            return
+        except Exception as ex:
+            print(f"could not restore session of course '{self.name}': {type(ex).__name__}: {ex}")
+            return
+        if dfs or metadata:
+            self._session_dfs.update(dfs)
+            self._session_metadata = metadata
+            print(f"restored the session of course '{self.name}' in {time.perf_counter() - start:.3f}s")
+    
+    def watch_check_box_toggled(self, checked: bool):
+        if checked:
+            self.start_watching()
+        else:
+            self.stop_watching()
+    
+    def start_watching(self, interval: int = 2000):
+        """
+        Starts polling the downloads folder (every ``interval`` milliseconds) for new exports of the files that were
+        loaded into this course (see ``loaders.DownloadsWatcher``). Exports that already exist are ignored.
+        """
+        from .util import get_download_path, import_pandas
+        import_pandas()
+        from loaders import DownloadsWatcher
+        
+        if not self.is_built():
+            self.build_sub_tab(self.tabs.currentIndex())
+        self.watcher = DownloadsWatcher(get_download_path())
+        self.watch_timer.start(interval)
+    
+    def stop_watching(self):
+        self.watch_timer.stop()
+        self.watcher = None
+    
+    def get_watched_exports(self) -> tuple[set[str], dict[str, set[str]]]:
+        """
+        Returns the KUSSS course IDs and Moodle export base names of all files that were loaded into this course
+        (i.e., new exports of these files are ingested when watching the downloads folder). The Moodle export base
+        names are mapped to the sub-tabs they were loaded into (``"students"`` and/or ``"grading"``).
+        """
+        from loaders import get_export_base_name, get_kusss_course_id
+        
+        course_ids = {get_kusss_course_id(f) for f in self.students_tab.kusss_files} - {None}
+        df = self.students_tab.students_table.model.get_df(copy=False)
+        if "Course ID" in df.columns:
+            course_ids.update(df["Course ID"].dropna().astype(str))
+        moodle_files = [("students", self.students_tab.moodle_file)]
+        if self.grading_tab is not None:
+            moodle_files.append(("grading", self.grading_tab.moodle_grading_file))
+        moodle_targets = {}
+        for target, f in moodle_files:
+            if f is not None:
+                moodle_targets.setdefault(get_export_base_name(f), set()).add(target)
+        return course_ids, moodle_targets
+    
+    def poll_downloads(self):
+        course_ids, moodle_targets = self.get_watched_exports()
+        self.watcher.kusss_course_ids, self.watcher.moodle_base_names = course_ids, set(moodle_targets)
+        for kind, file in self.watcher.poll():
+            self.ingest_export(kind, file)
+    
+    def ingest_export(self, kind: str, file: str):
+        """
+        Loads a new Moodle or KUSSS export in the background and only updates the changed entries (see
+        ``DataFrameModel.update_df``). A Moodle export only updates the sub-tab(s) whose Moodle file it is a newer
+        export of (the students table and/or the grading data, which is graded again afterwards), a KUSSS export
+        updates both.
+        """
+        from diagnostics import Diagnostics
+        from loaders import (DownloadsWatcher, get_export_base_name, get_kusss_df, get_moodle_df, update_changed_rows,
+                             update_kusss_rows)
+        from .scheduler import Priority, Scheduler, get_scheduler
+        from .tabs import open_error_dialog
+        from .workers import Worker
+        
+        if kind == DownloadsWatcher.MOODLE:
+            targets = self.get_watched_exports()[1].get(get_export_base_name(file), set())
+        else:
+            targets = {"students", "grading"}
+        students_version, students_df = self.students_tab.students_table.model.get_snapshot()
+        if "students" not in targets:
+            students_df = None
+        grading_data_df = None if self.grading_tab is None or "grading" not in targets else self.grading_tab.merged_df
+        if students_df is None and grading_data_df is None:
+            return
+        
+        def ingest():
+            diagnostics = Diagnostics()
+            if kind == DownloadsWatcher.MOODLE:
+                moodle_df = get_moodle_df(file, diagnostics=diagnostics)
+                # The students table only keeps its columns, the grading data also gets new ones (e.g., assignments)
+                students = None if students_df is None else update_changed_rows(students_df, moodle_df,
+                                                                                add_columns=False)
+                grading_data = None if grading_data_df is None else update_changed_rows(grading_data_df, moodle_df)
+            else:
+                kusss_df = get_kusss_df(file, diagnostics=diagnostics)
+                students = None if students_df is None else update_kusss_rows(students_df, kusss_df,
+                                                                              diagnostics=diagnostics)
+                grading_data = None if grading_data_df is None else update_kusss_rows(grading_data_df, kusss_df)
+            return students, grading_data, diagnostics
+        
+        def ingested(result):
+            students, grading_data, diagnostics = result
+            status_bar: qw.QStatusBar = self.window().statusBar()
+            if students is not None:
+                if self.students_tab.students_table.model.version != students_version:
+                    # The table changed in the meantime (e.g., it was manually loaded), so the update is outdated
+                    status_bar.showMessage(f"{self.name}: ignored outdated update from '{os.path.basename(file)}' "
+                                           f"(the students table was changed in the meantime)", 10000)
+                    return
+                self.students_tab.students_table.update_df(students[0])
+                if kind == DownloadsWatcher.MOODLE:
+                    self.students_tab.moodle_file = file
+                elif file not in self.students_tab.kusss_files:
+                    self.students_tab.kusss_files.append(file)
+            if len(diagnostics) > 0:
+                self.students_tab.issues_button.set_diagnostics(diagnostics)
+            if grading_data is not None and self.grading_tab.merged_df is grading_data_df:
+                self.grading_tab.merged_df = grading_data[0]
+                if kind == DownloadsWatcher.MOODLE:
+                    self.grading_tab.moodle_grading_file = file
+                self.grading_tab.regrade()
+            counts = (students if students is not None else grading_data)[1]
+            status_bar.showMessage(
+                f"{self.name}: ingested '{os.path.basename(file)}' ({counts['changed']} changed, {counts['added']} "
+                f"added, {counts['removed']} removed)", 10000)
+        
+        def failed(ex: Exception):
+            self.window().statusBar().showMessage(f"{self.name}: could not ingest '{os.path.basename(file)}'", 10000)
+            open_error_dialog(self, ex)
+        
+        worker = Worker(func=ingest, use_progress_callback=False)
+        worker.result.connect(ingested)
+        worker.error.connect(failed)
+        get_scheduler().submit(worker, Scheduler.IO, Priority.NORMAL, self.name, f"ingest '{os.path.basename(file)}'")
+    
+    def get_grading_df(self):
+        """
+        Returns the grading table of this course (None if no grades were created yet). If the grading tab was never
+        shown, the grading table of the stored session is returned (without building any sub-tab).
+        """
+        if self.grading_tab is not None:
+            return self.grading_tab.get_grading_df()
+        if not self._session_loaded:
+            self._load_session()
+        df = self._session_dfs.get("grading")
+        return df if df is not None and "grade" in df.columns else None
+    
+    def save_session(self):
+        """
+        Stores all tables (and which files they were loaded from) in the session directory of this course. If the
+        course tab was never shown, nothing could have changed, so the stored session is left untouched. Tables of
+        sub-tabs that were never shown are stored as they were loaded.
+        """
+        if not self.is_built():
+            return
+        from models.session import save_session
+        from .util import get_course_data_path
+        
+        dfs = dict(self._session_dfs)
+        metadata = dict(self._session_metadata)
+        for key, tab in [("students", self.students_tab), ("submissions", self.submissions_tab),
+                         ("grading", self.grading_tab)]:
+            if tab is not None:
+                tab_dfs, metadata[key] = tab.get_session()
+                dfs.update(tab_dfs)
+        save_session(get_course_data_path(self.name, "session"), dfs, metadata)
@@ -0,0 +1,136 @@
+import PySide6.QtWidgets as qw
+from PySide6.QtCore import QObject, Qt, Signal
+
+from diagnostics import Diagnostics, Span, get_tracer
+
+
+class SpanBridge(QObject):
+    """
+    Forwards finished spans from arbitrary (worker) threads to the GUI thread (the signal is
+    automatically queued if it is emitted in another thread).
+    """
+    span_finished = Signal(object)
+    
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        tracer = get_tracer()
+        listener = self.span_finished.emit
+        tracer.add_listener(listener)
+        # The global tracer must not call into this object after it was deleted (the lambda does not reference "self")
+        self.destroyed.connect(lambda: tracer.remove_listener(listener))
+
+
+class DiagnosticsPanel(qw.QDockWidget):
+    """Dock widget that lists the timings of the most recent pipeline stages and exports them as Chrome trace."""
+    
+    COLUMNS = ["Stage", "Duration (ms)", "Rows", "Bytes", "Thread", "Details"]
+    
+    def __init__(self, parent: qw.QWidget = None, max_rows: int = 500):
+        super().__init__("Diagnostics", parent)
+        self.max_rows = max_rows
+        self.bridge = SpanBridge(self)
+        self.bridge.span_finished.connect(self.add_span)
+        
+        self.table = qw.QTableWidget(0, len(DiagnosticsPanel.COLUMNS))
+        self.table.setHorizontalHeaderLabels(DiagnosticsPanel.COLUMNS)
+        self.table.setEditTriggers(qw.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        export_button = qw.QPushButton("Export Chrome trace...")
+        export_button.clicked.connect(self.export_button_clicked)
+        clear_button = qw.QPushButton("Clear")
+        clear_button.clicked.connect(self.clear_button_clicked)
+        button_layout = qw.QHBoxLayout()
+        button_layout.addWidget(export_button)
+        button_layout.addWidget(clear_button)
+        button_layout.addStretch()
+        layout = qw.QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        widget = qw.QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+        
+        # Also show spans that were finished before the panel was created
+        for span in get_tracer().get_spans()[-max_rows:]:
+            self.add_span(span)
+    
+    def add_span(self, span: Span):
+        # Spans are finished innermost first, so the top-level span of a pipeline stage is the last one. Newest
+        # entries are shown at the top.
+        args = dict(span.args)
+        values = [
+            "    " * span.depth + span.name,
+            f"{span.duration * 1000:.1f}",
+            "" if args.get("rows") is None else str(args.pop("rows")),
+            "" if args.get("bytes") is None else str(args.pop("bytes")),
+            span.thread_name,
+            ", ".join(f"{k}={v}" for k, v in args.items()),
+        ]
+        self.table.insertRow(0)
+        for col, value in enumerate(values):
+            item = qw.QTableWidgetItem(value)
+            if col in (1, 2, 3):
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(0, col, item)
+        if self.table.rowCount() > self.max_rows:
+            self.table.removeRow(self.table.rowCount() - 1)
+    
+    def export_button_clicked(self):
+        file = qw.QFileDialog.getSaveFileName(self, caption="Export Chrome trace", dir="trace.json",
+                                              filter="JSON files (*.json)")[0]
+        if file:
+            get_tracer().export_chrome_trace(file)
+    
+    def clear_button_clicked(self):
+        get_tracer().clear()
+        self.table.setRowCount(0)
+
+
+class IssuesDialog(qw.QDialog):
+    """Lists the issues of a diagnostics object. The affected rows are only rendered when an issue is selected."""
+    
+    def __init__(self, diagnostics: Diagnostics, parent: qw.QWidget = None):
+        super().__init__(parent)
+        # Imported here, since the views depend on pandas (which should not be loaded at startup)
+        from .views import DataFrameTableView
+        
+        self.diagnostics = diagnostics
+        self.setWindowTitle("Issues")
+        self.issues_list = qw.QListWidget()
+        for issue in diagnostics:
+            self.issues_list.addItem(f"[{issue.stage}] {issue.message} ({len(issue)} rows)")
+        self.rows_table = DataFrameTableView()
+        self.issues_list.currentRowChanged.connect(self.issues_list_current_row_changed)
+        splitter = qw.QSplitter(Qt.Vertical)
+        splitter.addWidget(self.issues_list)
+        splitter.addWidget(self.rows_table)
+        layout = qw.QVBoxLayout()
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+        self.resize(800, 500)
+        if len(diagnostics) > 0:
+            self.issues_list.setCurrentRow(0)
+    
+    def issues_list_current_row_changed(self, row: int):
+        issue = self.diagnostics.issues[row]
+        if issue.rows is not None:
+            self.rows_table.set_df(issue.rows.reset_index())
+
+
+class IssuesButton(qw.QPushButton):
+    """Button that shows the number of issues of a diagnostics object (hidden if there are none) and opens them."""
+    
+    def __init__(self, parent: qw.QWidget = None):
+        super().__init__(parent)
+        self.diagnostics = Diagnostics()
+        self.clicked.connect(self.open_issues_dialog)
+        self.set_diagnostics(self.diagnostics)
+    
+    def set_diagnostics(self, diagnostics: Diagnostics):
+        self.diagnostics = diagnostics
+        self.setText(f"{len(diagnostics)} issue{'' if len(diagnostics) == 1 else 's'}...")
+        self.setVisible(len(diagnostics) > 0)
+    
+    def open_issues_dialog(self):
+        IssuesDialog(self.diagnostics, self).exec()
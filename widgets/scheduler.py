@@ -0,0 +1,164 @@
+import os
+from enum import IntEnum
+
+import PySide6.QtWidgets as qw
+from PySide6.QtCore import QObject, QThreadPool, Signal, Slot
+
+from .workers import Worker
+
+
+class Priority(IntEnum):
+    """Priorities of scheduled jobs. Queued jobs with a higher priority are started first."""
+    BULK = 0  # Long-running jobs nobody is actively waiting for (e.g., splitting submissions)
+    NORMAL = 1
+    INTERACTIVE = 2  # Short jobs the user is waiting for (e.g., loading a file)
+
+
+class Job(QObject):
+    """
+    Bookkeeping of a single scheduled worker. The state changes are received via the signals of the worker, i.e.,
+    they are always handled in the GUI thread.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    
+    def __init__(self, worker: Worker, name: str, owner: str, kind: str, priority: Priority, scheduler: "Scheduler"):
+        super().__init__(scheduler)
+        self.worker = worker
+        self.name = name
+        self.owner = owner
+        self.kind = kind
+        self.priority = priority
+        self.state = Job.QUEUED
+        self.scheduler = scheduler
+        worker.started.connect(self._started)
+        worker.finished.connect(self._finished)
+    
+    @Slot()
+    def _started(self):
+        self.state = Job.RUNNING
+        self.scheduler.jobs_changed.emit()
+    
+    @Slot()
+    def _finished(self):
+        self.state = Job.FINISHED
+        self.scheduler._remove(self)
+    
+    def __repr__(self):
+        return f"Job({self.name!r}, owner={self.owner!r}, kind={self.kind!r}, state={self.state!r})"
+
+
+class Scheduler(QObject):
+    """
+    Runs workers on two separate, bounded thread pools: one for I/O-heavy jobs (e.g., reading files or extracting
+    ZIP archives) and one for CPU-heavy jobs (e.g., grading). This way, CPU-bound pandas work does not compete with
+    I/O without limit, and a long-running bulk job cannot occupy all threads. Within each pool, queued jobs are
+    started according to their priority (see ``Priority``), so interactive jobs overtake queued bulk jobs.
+    """
+    IO = "io"
+    CPU = "cpu"
+    
+    # Emitted whenever a job is submitted, started or finished
+    jobs_changed = Signal()
+    
+    def __init__(self, io_threads: int = 2, cpu_threads: int = None, parent: QObject = None):
+        """
+        :param io_threads: The maximum number of concurrently running I/O jobs. Default: 2
+        :param cpu_threads: The maximum number of concurrently running CPU jobs. Default: None = number of CPUs - 1
+            (at least 1), so the GUI thread always has a core left
+        """
+        super().__init__(parent)
+        if cpu_threads is None:
+            cpu_threads = max(1, (os.cpu_count() or 1) - 1)
+        self.pools = {Scheduler.IO: QThreadPool(self), Scheduler.CPU: QThreadPool(self)}
+        self.pools[Scheduler.IO].setMaxThreadCount(io_threads)
+        self.pools[Scheduler.CPU].setMaxThreadCount(cpu_threads)
+        self.jobs = []
+    
+    def submit(self, worker: Worker, kind: str = CPU, priority: Priority = Priority.NORMAL, owner: str = None,
+               name: str = None) -> Job:
+        """
+        Schedules the specified worker.
+
+        :param worker: The worker to run.
+        :param kind: The pool the worker is run on (``Scheduler.IO`` or ``Scheduler.CPU``). Default: ``Scheduler.CPU``
+        :param priority: The priority of the worker. Default: ``Priority.NORMAL``
+        :param owner: The name of whoever submitted the worker (e.g., the course name), which is used to group the
+            jobs (e.g., in ``JobsStatusWidget``). Default: None
+        :param name: A short description of the job. Default: None = the name of the worker function
+        :return: The job that tracks the state of the worker.
+        """
+        if kind not in self.pools:
+            raise ValueError(f"kind must be one of {list(self.pools)}, not '{kind}'")
+        if name is None:
+            name = getattr(worker.func, "__name__", str(worker.func))
+        job = Job(worker, name, owner, kind, Priority(priority), self)
+        self.jobs.append(job)
+        self.pools[kind].start(worker, int(priority))
+        self.jobs_changed.emit()
+        return job
+    
+    def get_jobs(self, owner: str = None) -> list[Job]:
+        """Returns all queued and running jobs (only those of ``owner`` if not None)."""
+        return [job for job in self.jobs if owner is None or job.owner == owner]
+    
+    def get_counts(self) -> dict[str, tuple[int, int]]:
+        """Returns the number of queued and running jobs for each owner (in the order the owners submitted jobs)."""
+        counts = {}
+        for job in self.jobs:
+            queued, running = counts.get(job.owner, (0, 0))
+            counts[job.owner] = (queued + (job.state == Job.QUEUED), running + (job.state == Job.RUNNING))
+        return counts
+    
+    def cancel(self, owner: str = None):
+        """
+        Requests the cancellation of all queued and running jobs (only those of ``owner`` if not None). See
+        ``Worker.cancel``.
+        """
+        for job in self.get_jobs(owner):
+            job.worker.cancel()
+    
+    def shutdown(self, msecs: int = -1) -> bool:
+        """
+        Cancels all jobs and waits until they are finished (at most ``msecs`` milliseconds per pool, -1 = no limit).
+
+        :return: True if all jobs finished in time, False otherwise.
+        """
+        self.cancel()
+        return all([pool.waitForDone(msecs) for pool in self.pools.values()])
+    
+    def _remove(self, job: Job):
+        self.jobs.remove(job)
+        job.deleteLater()
+        self.jobs_changed.emit()
+
+
+_scheduler = None
+
+
+def get_scheduler() -> Scheduler:
+    """Returns the global scheduler that is used for all background jobs (created on first use)."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
+
+
+class JobsStatusWidget(qw.QLabel):
+    """Status bar widget that shows the number of queued and running jobs per course (hidden if there are none)."""
+    
+    def __init__(self, scheduler: Scheduler = None, parent: qw.QWidget = None):
+        super().__init__(parent)
+        self.scheduler = get_scheduler() if scheduler is None else scheduler
+        self.scheduler.jobs_changed.connect(self.update_text)
+        self.update_text()
+    
+    def update_text(self):
+        parts = []
+        for owner, (queued, running) in self.scheduler.get_counts().items():
+            parts.append(f"{'Other' if owner is None else owner}: {running} running, {queued} queued")
+        self.setText(" | ".join(parts))
+        self.setToolTip("\n".join(f"[{job.state}] {job.owner}: {job.name} ({job.kind}, {job.priority.name.lower()})"
+                                  for job in self.scheduler.get_jobs()))
+        self.setVisible(len(parts) > 0)
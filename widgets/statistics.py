@@ -0,0 +1,85 @@
+import PySide6.QtWidgets as qw
+import pandas as pd
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QColor
+
+from graders.statistics import GradeStatistics
+
+
+class HistogramWidget(qw.QWidget):
+    """Minimal bar chart of labeled counts (e.g., the number of students per grade)."""
+    
+    def __init__(self, parent: qw.QWidget = None):
+        super().__init__(parent)
+        self.counts = []
+        self.setMinimumSize(200, 120)
+    
+    def set_counts(self, counts: list[tuple[str, int]]):
+        self.counts = counts
+        self.update()
+    
+    def paintEvent(self, event):
+        if not self.counts:
+            return
+        painter = QPainter(self)
+        metrics = painter.fontMetrics()
+        text_height = metrics.height()
+        width = self.width() / len(self.counts)
+        bar_height = self.height() - 2 * text_height - 4
+        max_count = max(max(count for _, count in self.counts), 1)
+        for i, (label, count) in enumerate(self.counts):
+            x = i * width
+            h = bar_height * count / max_count
+            painter.fillRect(QRectF(x + width * 0.15, text_height + 2 + bar_height - h, width * 0.7, h),
+                             QColor(70, 130, 180))
+            painter.drawText(QRectF(x, bar_height + text_height + 2, width, text_height), Qt.AlignCenter, label)
+            painter.drawText(QRectF(x, bar_height - h, width, text_height), Qt.AlignCenter, str(count))
+        painter.end()
+
+
+class GradeStatisticsPanel(qw.QWidget):
+    """Shows the grade distribution, participation counts and per-item statistics of a ``GradeStatistics`` object."""
+    
+    COLUMNS = ["Item", "Participants", "Average points", "Threshold", "Passed", "Pass rate"]
+    
+    def __init__(self, parent: qw.QWidget = None):
+        super().__init__(parent)
+        self.participation_label = qw.QLabel()
+        self.histogram = HistogramWidget()
+        self.items_table = qw.QTableWidget(0, len(GradeStatisticsPanel.COLUMNS))
+        self.items_table.setHorizontalHeaderLabels(GradeStatisticsPanel.COLUMNS)
+        self.items_table.setEditTriggers(qw.QAbstractItemView.NoEditTriggers)
+        self.items_table.horizontalHeader().setStretchLastSection(True)
+        self.items_table.verticalHeader().setVisible(False)
+        self.items_table.setWordWrap(False)
+        layout = qw.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.participation_label)
+        layout.addWidget(qw.QLabel("Grades"))
+        layout.addWidget(self.histogram)
+        layout.addWidget(self.items_table)
+        self.setLayout(layout)
+        self.set_statistics(GradeStatistics())
+    
+    def set_statistics(self, statistics: GradeStatistics):
+        participation = statistics.get_participation()
+        self.participation_label.setText(f"{participation['students']} students, {participation['participants']} "
+                                         f"participated, {participation['graded']} graded")
+        self.histogram.set_counts([(str(grade), int(count)) for grade, count in
+                                   statistics.get_grade_counts().items()])
+        items_df = statistics.get_items_df()
+        self.items_table.setRowCount(len(items_df))
+        for row, values in enumerate(items_df.itertuples(index=False)):
+            for col, value in enumerate(values):
+                if pd.isna(value):
+                    text = ""
+                elif col == 5:
+                    text = f"{value:.1%}"
+                elif col in (1, 4):
+                    text = str(int(value))
+                else:
+                    text = str(value)
+                item = qw.QTableWidgetItem(text)
+                if col > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.items_table.setItem(row, col, item)
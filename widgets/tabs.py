@@ -1,16 +1,21 @@
+import copy
 import inspect
+import os
+import sys
 import textwrap
 
 import PySide6.QtWidgets as qw  # TODO: maybe just import everything individually (good for auto-completion, though)
 import pandas as pd
-from PySide6.QtCore import Qt, QThreadPool
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor, QFontDatabase, QTextCursor, QTextFormat
 
-from graders.grader import Grader
-from graders.python2exercisegrader import Python2ExerciseGrader
-from graders.python2lecturegrader import Python2LectureGrader
-from splitting.split import split_submissions
-from .util import get_moodle_df, get_kusss_df, merge_moodle_and_kusss_dfs, get_download_path
+from diagnostics import Diagnostics
+from loaders import get_moodle_df, get_kusss_df, merge_moodle_and_kusss_dfs
+from .diagnostics import IssuesButton
+from .scheduler import Priority, Scheduler, get_scheduler
+from .util import get_download_path
 from .views import (
+    DataFrameTableView,
     StudentsTableView,
     TutorsTableView,
     SubmissionsTableView,
@@ -20,29 +25,47 @@ from .views import (
 from .workers import Worker
 
 
-class CourseTab(qw.QWidget):
+def parse_sweep_values(text: str) -> list[float]:
+    """
+    Parses the values of a threshold sweep parameter (see ``graders.sweep.sweep_thresholds``): either
+    comma-separated values (e.g., "0.4, 0.5") or an inclusive range "start:stop:step" (e.g., "0.4:0.6:0.05").
+    """
+    text = text.strip()
+    if text.count(":") == 2:
+        start, stop, step = [float(x) for x in text.split(":")]
+        if step <= 0:
+            raise ValueError(f"the step of '{text}' must be positive")
+        n = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(max(n, 0))]
+    return [float(x) for x in text.split(",") if x.strip()]
+
+
+def open_error_dialog(parent: qw.QWidget, ex: Exception):
+    dialog = qw.QDialog(parent)
+    dialog.setWindowTitle("An error occurred")
     
-    def __init__(self, students_df: pd.DataFrame = None, tutors_df: pd.DataFrame = None):  # TODO: temp
-        super().__init__()
-        tabs = qw.QTabWidget()
-        students_tab = StudentsTab(students_df)
-        # TODO: submissions tab should be optional if the specific course does not have submissions (e.g., lectures)
-        #  maybe include a toggle button somewhere that removes/deactivates/disables the submissions tab
-        submissions_tab = SubmissionsTab(tutors_df, students_tab.students_table.model)
-        grading_tab = GradingTab(students_tab.students_table.model)
-        tabs.addTab(students_tab, "Students")
-        tabs.addTab(submissions_tab, "Submissions")
-        tabs.addTab(grading_tab, "Grading")
-        layout = qw.QVBoxLayout()
-        layout.addWidget(tabs)
-        self.setLayout(layout)
+    button_box = qw.QDialogButtonBox(qw.QDialogButtonBox.StandardButton.Ok)
+    button_box.accepted.connect(dialog.accept)
+    button_box.rejected.connect(dialog.reject)
+    
+    layout = qw.QVBoxLayout()
+    message = qw.QLabel(str(ex))  # TODO: very basic
+    layout.addWidget(message)
+    layout.addWidget(button_box)
+    dialog.setLayout(layout)
+    dialog.exec()
 
 
 class StudentsTab(qw.QWidget):
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, course_name: str = None):
         super().__init__()
+        # Only used to group the background jobs of this tab (see scheduler.JobsStatusWidget)
+        self.course_name = course_name
         self.students_table = StudentsTableView(df)
+        # The files the students were loaded from (only informative, e.g., for restoring sessions)
+        self.moodle_file = None
+        self.kusss_files = []
         layout = qw.QVBoxLayout()
         layout.addWidget(FilterableDataFrameTableView(self.students_table))
         
@@ -61,10 +84,32 @@ class StudentsTab(qw.QWidget):
         button_layout = qw.QHBoxLayout()
         button_layout.addWidget(self.add_moodle_participants_button)
         button_layout.addWidget(self.merge_kusss_participants_button)
+        # Dropped or unmatched entries of the most recent load/merge
+        self.issues_button = IssuesButton()
+        button_layout.addWidget(self.issues_button)
+        button_layout.addStretch()
+        button_layout.addWidget(qw.QLabel("Go to student:"))
+        self.go_to_student_edit = qw.QLineEdit()
+        self.go_to_student_edit.setPlaceholderText("matriculation ID")
+        self.go_to_student_edit.setMaximumWidth(180)
+        self.go_to_student_edit.returnPressed.connect(
+            lambda: self.go_to_student(self.go_to_student_edit.text()))
+        button_layout.addWidget(self.go_to_student_edit)
         layout.addLayout(button_layout)
         
         self.setLayout(layout)
     
+    def go_to_student(self, student_id: str) -> bool:
+        """
+        Selects the student with the specified matriculation ID (see ``StudentsModel.find_student``).
+        
+        :return: True if the student was found (and is not filtered out), False otherwise.
+        """
+        row = self.students_table.model.find_student(student_id)
+        found = row is not None and self.students_table.go_to_row(row)
+        self.go_to_student_edit.setStyleSheet("" if found or not student_id else "color: red;")
+        return found
+    
     def add_moodle_participants_button_clicked(self):
         # Returns tuple of [0] = selected file [1] = matching filter
         file = qw.QFileDialog.getOpenFileName(
@@ -76,10 +121,19 @@ class StudentsTab(qw.QWidget):
         if file:
             # TODO: copy from "grading" project
             # TODO: hard-coded (default) parameters should be from config file
-            df = get_moodle_df(file)
-            self.students_table.set_df(df)
-            self.add_moodle_participants_button.setText("Replace Moodle participants...")
-            self.merge_kusss_participants_button.setEnabled(True)
+            def load():
+                diagnostics = Diagnostics()
+                return get_moodle_df(file, diagnostics=diagnostics), diagnostics
+            
+            def loaded(result):
+                df, diagnostics = result
+                self.issues_button.set_diagnostics(diagnostics)
+                self.students_table.set_df(df)
+                self.moodle_file = file
+                self.kusss_files = []
+                self.add_moodle_participants_button.setText("Replace Moodle participants...")
+            
+            self.submit_load(load, loaded, "load Moodle participants")
     
     # TODO: code duplication
     def merge_kusss_participants_button_clicked(self):
@@ -92,18 +146,71 @@ class StudentsTab(qw.QWidget):
         )[0]
         if files:
             # TODO: hard-coded parameters/arguments and values should be from config file
-            kusss_df = get_kusss_df(files)
-            moodle_df = self.students_table.get_df()
-            df = merge_moodle_and_kusss_dfs(moodle_df, kusss_df)
-            self.students_table.set_df(df)
+            # The students are matched via the matriculation ID index of the model (the indexed DataFrame is never
+            # modified in place, so it can be used by the background job without copying it)
+            moodle_index = self.students_table.model.get_index()
+            moodle_df = self.students_table.model.get_df(copy=False)
+            
+            def load():
+                diagnostics = Diagnostics()
+                kusss_df = get_kusss_df(files, diagnostics=diagnostics)
+                return merge_moodle_and_kusss_dfs(moodle_df, kusss_df, moodle_index=moodle_index,
+                                                  diagnostics=diagnostics), diagnostics
+            
+            def loaded(result):
+                df, diagnostics = result
+                self.issues_button.set_diagnostics(diagnostics)
+                # Usually, only the study and course IDs of some students change
+                self.students_table.update_df(df)
+                self.kusss_files.extend(files)
+            
+            self.submit_load(load, loaded, "merge KUSSS participants")
+    
+    def submit_load(self, func, on_result, name: str):
+        """
+        Runs the specified load function as interactive job on the I/O pool (so it is not delayed by, e.g., splitting
+        submissions of other courses). Loading is disabled until the job is finished.
+        """
+        self.add_moodle_participants_button.setEnabled(False)
+        self.merge_kusss_participants_button.setEnabled(False)
+        
+        def enable_buttons():
+            self.add_moodle_participants_button.setEnabled(True)
+            self.merge_kusss_participants_button.setEnabled(self.moodle_file is not None)
+        
+        worker = Worker(func=func, use_progress_callback=False)
+        worker.result.connect(on_result)
+        worker.error.connect(lambda ex: open_error_dialog(self, ex))
+        worker.finished.connect(enable_buttons)
+        get_scheduler().submit(worker, Scheduler.IO, Priority.INTERACTIVE, self.course_name, name)
+    
+    def get_session(self) -> tuple[dict[str, pd.DataFrame], dict]:
+        dfs = {"students": self.students_table.model.get_df(copy=False)}
+        return dfs, {"moodle_file": self.moodle_file, "kusss_files": self.kusss_files}
+    
+    def restore_session(self, dfs: dict[str, pd.DataFrame], metadata: dict):
+        if dfs.get("students") is not None:
+            self.students_table.set_df(dfs["students"])
+        self.moodle_file = metadata.get("moodle_file")
+        self.kusss_files = metadata.get("kusss_files", [])
+        if self.moodle_file is not None:
+            self.add_moodle_participants_button.setText("Replace Moodle participants...")
+            self.merge_kusss_participants_button.setEnabled(True)
 
 
 class SubmissionsTab(qw.QWidget):
     
-    def __init__(self, tutors_df, students_model):
+    def __init__(self, tutors_df, students_model, identity_index_file: str = None, manifest_file: str = None,
+                 course_name: str = None):
         super().__init__()
+        # Only used to group the background jobs of this tab (see scheduler.JobsStatusWidget)
+        self.course_name = course_name
         # TODO: model vs tableView vs df? (currently: model, but it is not consistent)
         self.students_model = students_model
+        # Persistent Moodle ID -> matriculation ID index, so submissions can still be matched after name changes
+        self.identity_index_file = identity_index_file
+        # Records which submissions were already distributed to which tutors (one manifest per exercise)
+        self.manifest_file = manifest_file
         self.tutors_table = TutorsTableView(tutors_df)
         self.submissions_table = SubmissionsTableView()
         
@@ -131,8 +238,17 @@ class SubmissionsTab(qw.QWidget):
         self.split_submissions_button = qw.QPushButton("Split submissions...")
         self.split_submissions_button.setMaximumWidth(150)
         self.split_submissions_button.clicked.connect(self.split_submissions_button_clicked)
+        self.incremental_check_box = qw.QCheckBox("Only add new/changed submissions")
+        self.incremental_check_box.setToolTip("Keep already distributed submissions with their tutors and only add new "
+                                              "or changed submissions to the existing tutor files")
+        self.incremental_check_box.setChecked(True)
+        self.balance_workload_check_box = qw.QCheckBox("Balance workload")
+        self.balance_workload_check_box.setToolTip("Distribute submissions according to their size and number of "
+                                                   "files instead of only their count (respects the tutor weights)")
         button_layout = qw.QHBoxLayout()
         button_layout.addWidget(self.split_submissions_button)
+        button_layout.addWidget(self.incremental_check_box)
+        button_layout.addWidget(self.balance_workload_check_box)
         layout.addLayout(button_layout)
         
         self.setLayout(layout)
@@ -146,9 +262,11 @@ class SubmissionsTab(qw.QWidget):
             filter="ZIP files (*.zip)"
         )[0]
         if file:
+            # Imported here, since it is only required once submissions are actually split (faster startup)
+            from splitting.split import split_submissions
+            
             # TODO: copy from "moodle-submission-splitter" project
             # TODO: hard-coded (default) parameters should be from config file
-            # TODO: long-running operation (should not be run on GUI thread)
             # df = split_submissions(
             #     submissions_file=file,
             #     # TODO: inconsistent: table.get_df vs model.get_df
@@ -167,54 +285,96 @@ class SubmissionsTab(qw.QWidget):
             #  maybe with some sort of status events, and then, the status bar just accepts the events (not useful here)
             status_bar: qw.QStatusBar = self.window().statusBar()
             status_bar.addPermanentWidget(progress_bar)
+            cancel_button = qw.QPushButton("Cancel")
+            cancel_button.setMaximumHeight(20)
+            status_bar.addPermanentWidget(cancel_button)
             
             worker = Worker(
                 func=split_submissions,
                 use_progress_callback=True,
+                use_cancellation_token=True,
                 submissions_file=file,
                 tutors_df=self.tutors_table.get_df(),
-                info_df=self.students_model.get_df()
+                info_df=self.students_model.get_df(copy=False),
+                info_index=self.students_model.get_index(),
+                identity_index_file=self.identity_index_file,
+                incremental=self.incremental_check_box.isChecked(),
+                manifest_file=self.manifest_file,
+                balance_workload=self.balance_workload_check_box.isChecked()
             )
             worker.result.connect(self.submissions_table.set_df)
-            worker.error.connect(self.open_error_dialog)
+            worker.error.connect(lambda ex: open_error_dialog(self, ex))
+            worker.cancelled.connect(lambda: status_bar.showMessage("Splitting submissions cancelled", 5000))
             worker.progress.connect(progress_bar.setValue)
+            worker.status.connect(status_bar.showMessage)
+            
+            def cancel_button_clicked():
+                cancel_button.setEnabled(False)
+                worker.cancel()
+            
+            cancel_button.clicked.connect(cancel_button_clicked)
             
             def remove_progress_bar():
+                if not worker.cancellation_token.is_cancelled():
+                    status_bar.clearMessage()
                 status_bar.removeWidget(progress_bar)
+                status_bar.removeWidget(cancel_button)
                 progress_bar.deleteLater()
+                cancel_button.deleteLater()
                 self.split_submissions_button.setEnabled(True)
             
             worker.finished.connect(remove_progress_bar)
-            QThreadPool.globalInstance().start(worker)
+            # Bulk job (mostly ZIP I/O), so interactive loads of other courses are started first
+            get_scheduler().submit(worker, Scheduler.IO, Priority.BULK, self.course_name, "split submissions")
     
-    def open_error_dialog(self, ex: Exception):
-        dialog = qw.QDialog(self)
-        dialog.setWindowTitle("An error occurred")
-        
-        button_box = qw.QDialogButtonBox(qw.QDialogButtonBox.StandardButton.Ok)
-        button_box.accepted.connect(dialog.accept)
-        button_box.rejected.connect(dialog.reject)
-        
-        layout = qw.QVBoxLayout()
-        message = qw.QLabel(str(ex))  # TODO: very basic
-        layout.addWidget(message)
-        layout.addWidget(button_box)
-        dialog.setLayout(layout)
-        dialog.exec()
+    def get_session(self) -> tuple[dict[str, pd.DataFrame], dict]:
+        dfs = {
+            "tutors": self.tutors_table.model.get_df(copy=False),
+            "submissions": self.submissions_table.model.get_df(copy=False),
+        }
+        return dfs, {}
+    
+    def restore_session(self, dfs: dict[str, pd.DataFrame], metadata: dict):
+        if dfs.get("tutors") is not None:
+            self.tutors_table.set_df(dfs["tutors"])
+        if dfs.get("submissions") is not None:
+            self.submissions_table.set_df(dfs["submissions"])
 
 
 class GradingTab(qw.QWidget):
+    # Time without further edits after which the edited grader source is compiled (see manage_graders_button_clicked)
+    GRADER_COMPILE_DELAY_MS = 500
     
-    def __init__(self, students_model):
+    def __init__(self, students_model, course_name: str = None):
         super().__init__()
+        # Only used to group the background jobs of this tab (see scheduler.JobsStatusWidget)
+        self.course_name = course_name
         # TODO: model vs tableView vs df? (currently: model, but it is not consistent)
         self.students_model = students_model
         self.grading_table = GradingTableView()
+        # Imported here, since the graders are only required once the grading tab is actually shown (faster startup)
+        from graders.statistics import GradeStatistics
+        from .statistics import GradeStatisticsPanel
+        from graders.python2exercisegrader import Python2ExerciseGrader
+        from graders.python2lecturegrader import Python2LectureGrader
+        from graders.library import GraderLibrary
+        from .util import get_app_data_path
         self.graders = {  # TODO: temp
             "Python 2 Exercise Grader": Python2ExerciseGrader(),
             "Python 2 Lecture Grader": Python2LectureGrader(),
         }
+        # User-defined (or edited built-in) graders, which are loaded from their cached code objects
+        self.grader_library = GraderLibrary(get_app_data_path("graders"))
+        self.graders.update(self.grader_library.load_all())
+        # Edited, but not yet saved grader sources
+        self.grader_sources = {}
         self.merged_df = None
+        self.moodle_grading_file = None
+        self._grading_worker = None
+        # Statistics of the current grading table (only updated for the changed rows, see GradeStatistics.update)
+        self.statistics = GradeStatistics()
+        self.statistics_panel = GradeStatisticsPanel()
+        self._statistics_worker = None
         
         actions_layout = qw.QHBoxLayout()
         actions_layout.addWidget(qw.QLabel("Grader:"))
@@ -225,6 +385,18 @@ class GradingTab(qw.QWidget):
         manage_graders_button = qw.QPushButton("Manage graders...")
         manage_graders_button.clicked.connect(self.manage_graders_button_clicked)
         actions_layout.addWidget(manage_graders_button)
+        actions_layout.addWidget(qw.QLabel("Processes:"))
+        # Number of worker processes that create the grades (see graders.parallel)
+        self.processes_spin_box = qw.QSpinBox()
+        self.processes_spin_box.setRange(1, os.cpu_count() or 1)
+        self.processes_spin_box.setToolTip("Number of processes that create the grades in parallel (only worthwhile "
+                                           "for expensive graders on large courses)")
+        actions_layout.addWidget(self.processes_spin_box)
+        threshold_sweep_button = qw.QPushButton("Threshold sweep...")
+        threshold_sweep_button.clicked.connect(self.threshold_sweep_button_clicked)
+        actions_layout.addWidget(threshold_sweep_button)
+        self.issues_button = IssuesButton()
+        actions_layout.addWidget(self.issues_button)
         # Add (arbitrary) stretch as last element to place all previous widgets from left to right regardless of
         # resizing the window
         actions_layout.addStretch()
@@ -233,84 +405,277 @@ class GradingTab(qw.QWidget):
         add_moodle_grading_data_button.setMaximumWidth(160)
         add_moodle_grading_data_button.clicked.connect(self.add_moodle_grading_data_button_clicked)
         
+        splitter = qw.QSplitter(Qt.Horizontal)
+        splitter.addWidget(FilterableDataFrameTableView(self.grading_table))
+        splitter.addWidget(self.statistics_panel)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        
         layout = qw.QVBoxLayout()
         layout.addLayout(actions_layout)
-        layout.addWidget(FilterableDataFrameTableView(self.grading_table))
+        layout.addWidget(splitter)
         layout.addWidget(add_moodle_grading_data_button)
         self.setLayout(layout)
     
+    def regrade(self):
+        """Grades the current grading data again (e.g., after it was updated) with the selected grader."""
+        self.grader_combo_box_text_changed(self.grader_combo_box.currentText())
+    
     def grader_combo_box_text_changed(self, text):
         if self.merged_df is not None:
-            grader = self.graders[text]
-            grader.set_df(self.merged_df)
-            grading_df = grader.create_grading_file()
-            self.grading_table.set_df(grading_df)
+            # Shallow copy, so a still running job of the same grader is not affected
+            grader = copy.copy(self.graders[text])
+            merged_df = self.merged_df
+            processes = self.processes_spin_box.value()
+            
+            def grade():
+                grader.set_df(merged_df)
+                return grader.create_grading_file(processes=processes)
+            
+            def graded(grading_df):
+                # Ignore the results of outdated jobs (e.g., if the grader was changed again in the meantime)
+                if worker is self._grading_worker:
+                    self.grading_table.update_df(grading_df)
+                    self.update_statistics()
+            
+            worker = Worker(func=grade, use_progress_callback=False)
+            worker.result.connect(graded)
+            worker.error.connect(lambda ex: open_error_dialog(self, ex))
+            self._grading_worker = worker
+            get_scheduler().submit(worker, Scheduler.CPU, Priority.INTERACTIVE, self.course_name, f"grade ({text})")
+    
+    def update_statistics(self):
+        """Updates the statistics of the current grading table in the background (see ``GradeStatistics.update``)."""
+        df = self.get_grading_df()
+        if df is None:
+            return
+        thresholds = self.graders[self.grader_combo_box.currentText()].get_item_thresholds(df.columns)
+        statistics = self.statistics
+        
+        def updated(result):
+            # Ignore the results of outdated jobs (e.g., if the table was graded again in the meantime)
+            if worker is self._statistics_worker:
+                self.statistics = result
+                self.statistics_panel.set_statistics(result)
+        
+        worker = Worker(func=statistics.update, use_progress_callback=False, df=df, thresholds=thresholds)
+        worker.result.connect(updated)
+        worker.error.connect(lambda ex: open_error_dialog(self, ex))
+        self._statistics_worker = worker
+        get_scheduler().submit(worker, Scheduler.CPU, Priority.NORMAL, self.course_name, "grade statistics")
+    
+    def get_grader_source(self, name: str) -> str:
+        """Returns the (possibly edited) source code of the specified grader (see ``manage_graders_button_clicked``)."""
+        if name in self.grader_sources:
+            return self.grader_sources[name]
+        if name in self.grader_library.get_names():
+            return self.grader_library.get_source(name)
+        # Built-in graders: the source of their entire module (so it can be compiled on its own)
+        return inspect.getsource(sys.modules[type(self.graders[name]).__module__])
     
     def manage_graders_button_clicked(self):
+        from graders.library import GraderSourceError, NEW_GRADER_TEMPLATE, build_grader
+        
         dialog = qw.QDialog(self)
         dialog.setWindowTitle("Graders")
-        dialog.accepted.connect(lambda: print("ACC"))
-        dialog.rejected.connect(lambda: print("REJ"))
-        
-        # button_box = qw.QDialogButtonBox(qw.QDialogButtonBox.StandardButton.Ok)
-        # button_box.accepted.connect(dialog.accept)
-        # button_box.rejected.connect(dialog.reject)
         
         dialog_grader_combo_box = qw.QComboBox()
-        dialog_grader_text_edit = qw.QTextEdit()
+        dialog_grader_text_edit = qw.QPlainTextEdit()
+        dialog_grader_text_edit.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        dialog_grader_text_edit.setLineWrapMode(qw.QPlainTextEdit.NoWrap)
+        status_label = qw.QLabel()
+        status_label.setWordWrap(True)
+        # Edits are only compiled once there was no further edit for a short time (instead of on every keystroke)
+        compile_timer = QTimer(dialog)
+        compile_timer.setSingleShot(True)
+        compile_timer.setInterval(GradingTab.GRADER_COMPILE_DELAY_MS)
+        # The most recently submitted compile job (the results of outdated jobs are ignored)
+        workers = []
+        
+        def set_status(text: str, error: Exception = None):
+            status_label.setText(text)
+            status_label.setStyleSheet("color: red" if error is not None else "")
+            selections = []
+            if isinstance(error, GraderSourceError) and error.line is not None:
+                # Highlight the line of the error and move the cursor to its location
+                selection = qw.QTextEdit.ExtraSelection()
+                selection.format.setBackground(QColor(255, 200, 200))
+                selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+                block = dialog_grader_text_edit.document().findBlockByNumber(error.line - 1)
+                selection.cursor = QTextCursor(block)
+                selections.append(selection)
+                if not dialog_grader_text_edit.hasFocus():
+                    cursor = QTextCursor(block)
+                    cursor.movePosition(QTextCursor.Right, n=max(min((error.column or 1) - 1, block.length() - 1), 0))
+                    dialog_grader_text_edit.setTextCursor(cursor)
+            dialog_grader_text_edit.setExtraSelections(selections)
         
         def dialog_grader_combo_box_text_changed(text):
-            # grader = self.graders[text]
-            # TODO: get source code for the grader "text
-            source_code = f"TODO: source code for grader {text}"
-            dialog_grader_text_edit.setText(source_code)
+            compile_timer.stop()
+            workers.clear()
+            try:
+                source = self.get_grader_source(text)
+            except (OSError, TypeError) as ex:
+                source = f"# source code not available: {ex}"
+            # Not an edit, so it must not be compiled
+            dialog_grader_text_edit.blockSignals(True)
+            dialog_grader_text_edit.setPlainText(source)
+            dialog_grader_text_edit.blockSignals(False)
+            in_library = text in self.grader_library.get_names()
+            set_status("stored in the grader library" if in_library else "built-in grader (not stored in the library)")
         
         def dialog_grader_text_edit_text_changed():
-            grader = self.graders[dialog_grader_combo_box.currentText()]
+            status_label.setText("editing...")
+            compile_timer.start()
+        
+        def compile_source():
+            name = dialog_grader_combo_box.currentText()
+            source = dialog_grader_text_edit.toPlainText()
+            self.grader_sources[name] = source
             
-            # TODO: extremely hacky
-            try:
-                # method _create_grade_row(self, row: pd.Series) -> pd.Series must be created
-                # TODO: actually, it does not necessarily have to be "_create_grade_row" (could be any valid method
-                #  name, but we would need to extract this somehow (maybe parse new locals for callables...))
-                source_code = dialog_grader_text_edit.toPlainText()
-                # TODO: save source code to file
-                exec(source_code)
-                # after exec, should be part of locals
-                if "_create_grade_row" in locals():
-                    _create_grade_row_method = locals()["_create_grade_row"]
-                    grader._create_grade_row = _create_grade_row_method.__get__(grader, Grader)
-            except Exception as ex:
-                print(type(ex), ex)  # TODO
+            def compiled(grader):
+                if workers and worker is workers[-1]:
+                    self.graders[name] = grader
+                    set_status(f"compiled {type(grader).__name__} (not yet saved)")
+            
+            def failed(ex):
+                if workers and worker is workers[-1]:
+                    if isinstance(ex, GraderSourceError):
+                        set_status(str(ex), ex)
+                    else:
+                        open_error_dialog(dialog, ex)
+            
+            # Compiled in the background (code objects are cached by the source hash, see compile_grader_source)
+            worker = Worker(func=build_grader, use_progress_callback=False, source=source, name=name)
+            worker.result.connect(compiled)
+            worker.error.connect(failed)
+            workers.append(worker)
+            get_scheduler().submit(worker, Scheduler.CPU, Priority.INTERACTIVE, self.course_name,
+                                   f"compile grader ({name})")
         
+        compile_timer.timeout.connect(compile_source)
         dialog_grader_text_edit.textChanged.connect(dialog_grader_text_edit_text_changed)
         
         dialog_grader_combo_box.addItems(list(self.graders.keys()))
         dialog_grader_combo_box.currentTextChanged.connect(dialog_grader_combo_box_text_changed)
+        dialog_grader_combo_box_text_changed(dialog_grader_combo_box.currentText())
         
         def add_new_grader_button_clicked():
-            grader_name = "debug"  # TODO: get name from dialog or QLineEdit
+            grader_name, ok = qw.QInputDialog.getText(dialog, "Add new grader", "Name:")
+            grader_name = grader_name.strip()
+            if not ok or not grader_name:
+                return
             if grader_name in self.graders:
-                print("already exists")  # TODO: error dialog or something like that
+                message = f"a grader with the name '{grader_name}' already exists"
+                set_status(message, ValueError(message))
             else:
-                grader = Grader()  # Abstract, must set abstract methods!
-                self.graders[grader_name] = grader
+                self.graders[grader_name] = build_grader(NEW_GRADER_TEMPLATE, grader_name)
+                self.grader_sources[grader_name] = NEW_GRADER_TEMPLATE
                 dialog_grader_combo_box.addItems([grader_name])
                 dialog_grader_combo_box.setCurrentText(grader_name)
                 self.grader_combo_box.addItems([grader_name])
         
+        def save_button_clicked():
+            compile_timer.stop()
+            name = dialog_grader_combo_box.currentText()
+            try:
+                self.graders[name] = self.grader_library.save(name, dialog_grader_text_edit.toPlainText())
+            except GraderSourceError as ex:
+                set_status(str(ex), ex)
+            except (OSError, ValueError) as ex:
+                open_error_dialog(dialog, ex)
+            else:
+                self.grader_sources.pop(name, None)
+                set_status(f"saved to {self.grader_library.directory}")
+        
+        def remove_button_clicked():
+            name = dialog_grader_combo_box.currentText()
+            try:
+                self.grader_library.remove(name)
+            except (OSError, ValueError) as ex:
+                open_error_dialog(dialog, ex)
+            else:
+                set_status("removed from the grader library (still available until restart)")
+        
         add_new_grader_button = qw.QPushButton("Add new grader...")
         add_new_grader_button.clicked.connect(add_new_grader_button_clicked)
+        save_button = qw.QPushButton("Save to library")
+        save_button.clicked.connect(save_button_clicked)
+        remove_button = qw.QPushButton("Remove from library")
+        remove_button.clicked.connect(remove_button_clicked)
         button_layout = qw.QHBoxLayout()
         button_layout.addWidget(add_new_grader_button)
+        button_layout.addWidget(save_button)
+        button_layout.addWidget(remove_button)
         
         layout = qw.QVBoxLayout()
         layout.addWidget(dialog_grader_combo_box)
         layout.addWidget(dialog_grader_text_edit)
+        layout.addWidget(status_label)
         layout.addLayout(button_layout)
-        # layout.addWidget(message)
-        # layout.addWidget(button_box)
         dialog.setLayout(layout)
+        dialog.resize(800, 700)
+        dialog.exec()
+    
+    def threshold_sweep_button_clicked(self):
+        """Opens a dialog to compare the grade distributions of different grading thresholds (what-if analysis)."""
+        from graders.sweep import sweep_thresholds
+        
+        text = self.grader_combo_box.currentText()
+        grader = copy.copy(self.graders[text])
+        parameters = grader.get_sweep_parameters()
+        if self.merged_df is None or not parameters:
+            qw.QMessageBox.information(self, "Threshold sweep", "There is no grading data or the selected grader "
+                                                                "does not support threshold sweeps.")
+            return
+        merged_df = self.merged_df
+        
+        dialog = qw.QDialog(self)
+        dialog.setWindowTitle(f"Threshold sweep ({text})")
+        form_layout = qw.QFormLayout()
+        edits = {}
+        for name, value in parameters.items():
+            edits[name] = qw.QLineEdit(str(value))
+            edits[name].setToolTip('Comma-separated values (e.g., "0.4, 0.5") or a range "start:stop:step"')
+            form_layout.addRow(f"{name}:", edits[name])
+        run_button = qw.QPushButton("Run")
+        results_table = DataFrameTableView()
+        status_label = qw.QLabel()
+        # The most recently submitted job (the results of previous runs are ignored)
+        workers = []
+        
+        def run_button_clicked():
+            try:
+                grid = {name: parse_sweep_values(edit.text()) for name, edit in edits.items()}
+            except ValueError as ex:
+                open_error_dialog(dialog, ex)
+                return
+            n = 1
+            for values in grid.values():
+                n *= len(values)
+            status_label.setText(f"evaluating {n} combinations...")
+            
+            def swept(result_df):
+                if worker is workers[-1]:
+                    results_table.model.set_df(result_df)
+                    status_label.setText(f"{len(result_df)} combinations")
+            
+            worker = Worker(func=sweep_thresholds, use_progress_callback=False, grader=grader, grid=grid,
+                            df=merged_df)
+            worker.result.connect(swept)
+            worker.error.connect(lambda ex: open_error_dialog(dialog, ex))
+            workers.append(worker)
+            get_scheduler().submit(worker, Scheduler.CPU, Priority.INTERACTIVE, self.course_name,
+                                   f"threshold sweep ({text})")
+        
+        run_button.clicked.connect(run_button_clicked)
+        layout = qw.QVBoxLayout()
+        layout.addLayout(form_layout)
+        layout.addWidget(run_button)
+        layout.addWidget(status_label)
+        layout.addWidget(results_table)
+        dialog.setLayout(layout)
+        dialog.resize(900, 600)
         dialog.exec()
     
     # TODO: code duplication
@@ -326,7 +691,43 @@ class GradingTab(qw.QWidget):
             # TODO: hard-coded (default) parameters should be from config file
             # TODO: inconsistent handling and naming of students_model.get_df (one time "info_df", another time
             #  "kusss_df" --> choose best fitting, common name)
-            moodle_df = get_moodle_df(file)
             kusss_df = self.students_model.get_df(copy=False)
-            self.merged_df = merge_moodle_and_kusss_dfs(moodle_df, kusss_df)
-            self.grading_table.set_df(self.merged_df)
+            
+            def load():
+                diagnostics = Diagnostics()
+                moodle_df = get_moodle_df(file, diagnostics=diagnostics)
+                return merge_moodle_and_kusss_dfs(moodle_df, kusss_df, diagnostics=diagnostics), diagnostics
+            
+            def loaded(result):
+                self.merged_df, diagnostics = result
+                self.issues_button.set_diagnostics(diagnostics)
+                self.moodle_grading_file = file
+                self.grading_table.set_df(self.merged_df)
+            
+            worker = Worker(func=load, use_progress_callback=False)
+            worker.result.connect(loaded)
+            worker.error.connect(lambda ex: open_error_dialog(self, ex))
+            get_scheduler().submit(worker, Scheduler.IO, Priority.INTERACTIVE, self.course_name,
+                                   "load Moodle grading data")
+    
+    def get_grading_df(self) -> pd.DataFrame:
+        """Returns the current grading table (None if no grades were created yet)."""
+        df = self.grading_table.model.get_df(copy=False)
+        return df if df is not None and "grade" in df.columns else None
+    
+    def get_session(self) -> tuple[dict[str, pd.DataFrame], dict]:
+        dfs = {"grading_data": self.merged_df, "grading": self.grading_table.model.get_df(copy=False)}
+        return dfs, {"moodle_file": self.moodle_grading_file, "grader": self.grader_combo_box.currentText()}
+    
+    def restore_session(self, dfs: dict[str, pd.DataFrame], metadata: dict):
+        self.merged_df = dfs.get("grading_data")
+        if dfs.get("grading") is not None:
+            self.grading_table.set_df(dfs["grading"])
+        self.moodle_grading_file = metadata.get("moodle_file")
+        grader = metadata.get("grader")
+        if grader in self.graders:
+            # The restored grading table already contains the grades, so do not grade again
+            self.grader_combo_box.blockSignals(True)
+            self.grader_combo_box.setCurrentText(grader)
+            self.grader_combo_box.blockSignals(False)
+        self.update_statistics()
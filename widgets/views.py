@@ -1,17 +1,94 @@
 import os.path
+import re
 import subprocess
 from typing import Union
 
 import pandas as pd
-from PySide6.QtCore import Qt, QModelIndex, QSortFilterProxyModel
+from PySide6.QtCore import Qt, QModelIndex, QRegularExpression, QSortFilterProxyModel
 from PySide6.QtGui import QKeySequence, QShortcut
 from PySide6.QtWidgets import QTableView, QApplication, QWidget, QVBoxLayout, QLineEdit, QLabel, QHBoxLayout
 
-from models import DataFrameModel
+from models import (DataFrameModel, StudentsModel, ArrowTableModel, QueryError, compile_query, is_query, match_regex,
+                    strip_query_prefix)
 from widgets.util import get_rectangular_selection
 
+# Marks that a filter cannot be evaluated vectorized (see DataFrameFilterProxyModel)
+_QT_FILTER = object()
+
+
+class DataFrameFilterProxyModel(QSortFilterProxyModel):
+    """
+    Proxy model of a ``DataFrameModel`` that can filter the rows with a query (see ``models.query``) instead of the
+    regular expression filter of QSortFilterProxyModel. Both filters are evaluated (vectorized) once per DataFrame of
+    the model and filter setting (see ``models.match_regex``), so the per-row filter check is just a lookup instead of
+    matching the text of every cell.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.query_text = None
+        # The accepted rows for the DataFrame "_mask_df" and the current filter settings (None = all rows, e.g., if
+        # the query does not match the columns of the DataFrame anymore, or _QT_FILTER = filter row by row)
+        self._mask = None
+        self._mask_df = None
+    
+    # The setters of the filter settings that are used by the views (the mask must be reset before the filter is
+    # applied again, which the setters of QSortFilterProxyModel do immediately)
+    
+    def setFilterRegularExpression(self, pattern):
+        self._mask_df = None
+        super().setFilterRegularExpression(pattern)
+    
+    def setFilterKeyColumn(self, column: int):
+        self._mask_df = None
+        super().setFilterKeyColumn(column)
+    
+    def setFilterCaseSensitivity(self, cs: Qt.CaseSensitivity):
+        self._mask_df = None
+        super().setFilterCaseSensitivity(cs)
+    
+    def set_query(self, text: Union[str, None]):
+        """
+        Filters the rows with the specified query (None = no query). The query is checked against the current data
+        first, so a QueryError is raised (and the filter is not changed) if it is invalid.
+        """
+        if text is not None:
+            compile_query(text, self.sourceModel().get_df(copy=False))
+        self.query_text = text
+        self._mask_df = None
+        self.invalidateRowsFilter()
+    
+    def _compute_mask(self, df: pd.DataFrame) -> Union[list, None, object]:
+        if self.query_text is not None:
+            try:
+                return compile_query(self.query_text, df).evaluate(df).tolist()
+            except QueryError:
+                return None
+        regex = self.filterRegularExpression()
+        if not regex.pattern():
+            return None
+        ignore_case = bool(regex.patternOptions() & QRegularExpression.PatternOption.CaseInsensitiveOption)
+        try:
+            return match_regex(df, regex.pattern(), self.filterKeyColumn(), ignore_case).tolist()
+        except re.error:
+            # Syntax that only Qt supports (or an invalid pattern, which Qt handles itself)
+            return _QT_FILTER
+    
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        # The model never modifies its DataFrame in place, so a new DataFrame means new data
+        df = self.sourceModel().get_df(copy=False)
+        if self._mask_df is not df:
+            self._mask = self._compute_mask(df)
+            self._mask_df = df
+        mask = self._mask
+        if mask is _QT_FILTER:
+            return super().filterAcceptsRow(source_row, source_parent)
+        return mask is None or source_row < len(mask) and mask[source_row]
+
 
 class DataFrameTableView(QTableView):
+    # The model that is created for the data (subclasses can use more specific models)
+    model_class = DataFrameModel
     
     def __init__(self, df: pd.DataFrame = None, sort_by: Union[str, int] = 0, parent: QWidget = None):
         super().__init__(parent)
@@ -22,8 +99,8 @@ class DataFrameTableView(QTableView):
         # TODO: (global remark) move all models outside the view classes?
         if len(df) > 0:
             df = df.sort_values(by=df.columns[self.sort_col_index], ignore_index=True)
-        self.model = DataFrameModel(df)
-        self.proxy_model = QSortFilterProxyModel()
+        self.model = self.model_class(df)
+        self.proxy_model = DataFrameFilterProxyModel()
         self.proxy_model.setFilterKeyColumn(-1)  # Search all columns.
         self.proxy_model.setSourceModel(self.model)
         # TODO: extremely hacky and probably wrong, but otherwise, (proxy) sorting is very slow
@@ -56,8 +133,21 @@ class DataFrameTableView(QTableView):
                     results = [str(self.model.get_raw_data(index.row(), index.column())) for index in indexes]
                     cb.setText(",".join(results))
     
-    # TODO: check where this is needed (and in turn, if a copy is required)
+    def go_to_row(self, row: int) -> bool:
+        """
+        Selects the specified row of the model and scrolls to it.
+        
+        :return: True if the row was selected, False if it is currently not shown (e.g., filtered out).
+        """
+        index = self.proxy_model.mapFromSource(self.model.index(row, 0))
+        if not index.isValid():
+            return False
+        self.selectRow(index.row())
+        self.scrollTo(index, QTableView.PositionAtCenter)
+        return True
+    
     def get_df(self):
+        """Returns a snapshot of the data (see ``DataFrameModel.get_df``)."""
         return self.model.get_df()
     
     def set_df(self, df: pd.DataFrame, sort_by: Union[str, int] = 0):
@@ -67,6 +157,39 @@ class DataFrameTableView(QTableView):
         self.model.set_df(df)
         # Trigger sorting to adjust for new model data TODO: slight code duplication (maybe extract to helper method)
         self.sortByColumn(self.sort_col_index, Qt.AscendingOrder)
+    
+    def update_df(self, df: pd.DataFrame, key: str = "ID number"):
+        """
+        Like ``set_df``, but if ``df`` is a newer version of the current data (same columns and ``key`` column), only
+        the changed rows and cells are updated (see ``DataFrameModel.update_df``), so the selection and scroll
+        position are kept. Otherwise (see ``DataFrameModel.update_df``), the data is replaced via ``set_df``.
+        """
+        if not self.model.update_df(df, key):
+            self.set_df(df)
+
+
+class ArrowTableView(QTableView):
+    """
+    Read-only view of a (potentially very large) ``ArrowTableModel``. In contrast to ``DataFrameTableView``, there is
+    no proxy model, since filtering would have to convert every cell of the table to a Python object.
+    """
+    
+    def __init__(self, model: ArrowTableModel, parent: QWidget = None):
+        super().__init__(parent)
+        self.model = model
+        self.setModel(self.model)
+        self.setAlternatingRowColors(True)
+        self.horizontalHeader().setStretchLastSection(True)
+        self.setSortingEnabled(True)
+        self.copy_shortcut = QShortcut(QKeySequence.Copy, self)
+        self.copy_shortcut.setContext(Qt.ShortcutContext.WidgetShortcut)
+        self.copy_shortcut.activated.connect(self.handle_copy_shortcut)
+    
+    # Same as in DataFrameTableView, since ArrowTableModel.get_raw_data returns the same types as DataFrameModel
+    handle_copy_shortcut = DataFrameTableView.handle_copy_shortcut
+    
+    def get_df(self):
+        return self.model.get_df()
 
 
 class FilterableDataFrameTableView(QWidget):
@@ -79,7 +202,7 @@ class FilterableDataFrameTableView(QWidget):
         filter_label = QLabel("Filter:")
         self.search_edit = QLineEdit()
         self.search_edit.setStatusTip("This tip is shown on the/a statusbar")  # TODO
-        self.search_edit.setPlaceholderText("[column name:]regex")
+        self.search_edit.setPlaceholderText("[column name:]regex or ?query (e.g., ? grade == 5 and `Course ID` = 1234)")
         self.search_edit_original_style_sheet = self.search_edit.styleSheet()
         # Boolean flag to avoid having to constantly change the style sheet
         self.search_edit_has_error = False
@@ -91,31 +214,51 @@ class FilterableDataFrameTableView(QWidget):
         self.search_edit.textChanged.connect(self.search_edit_text_changed)
         self.setLayout(layout)
     
+    def set_search_edit_error(self, error: Union[str, None]):
+        # Marks the filter text as invalid (red, with the error as tooltip) or valid (error = None)
+        if error is not None and not self.search_edit_has_error:
+            self.search_edit.setStyleSheet("color: red;")
+        elif error is None and self.search_edit_has_error:
+            self.search_edit.setStyleSheet(self.search_edit_original_style_sheet)
+        self.search_edit_has_error = error is not None
+        self.search_edit.setToolTip(error or "")
+    
     def search_edit_text_changed(self, text: str):
+        proxy_model = self.data_frame_table_view.proxy_model
+        if is_query(text):
+            # Typed query (see models.query), which replaces the regex filter
+            try:
+                proxy_model.set_query(strip_query_prefix(text))
+            except QueryError as ex:
+                self.set_search_edit_error(str(ex))
+            else:
+                self.set_search_edit_error(None)
+                if proxy_model.filterRegularExpression().pattern():
+                    proxy_model.setFilterRegularExpression("")
+            return
+        if proxy_model.query_text is not None:
+            proxy_model.set_query(None)
         parts = text.split(":", maxsplit=1)  # TODO: columns might contain ":" themselves
         if len(parts) == 2:
             filter_col, text = parts
             df = self.data_frame_table_view.model.get_df(copy=False)  # Read-only access, so no copy required
             if filter_col not in df.columns:
-                if not self.search_edit_has_error:
-                    self.search_edit.setStyleSheet("color: red;")
-                self.search_edit_has_error = True
+                self.set_search_edit_error(f"unknown column '{filter_col}'")
             else:
-                if self.search_edit_has_error:
-                    self.search_edit.setStyleSheet(self.search_edit_original_style_sheet)
-                    self.search_edit_has_error = False
+                self.set_search_edit_error(None)
                 filter_col_index = df.columns.get_loc(filter_col)
-                self.data_frame_table_view.proxy_model.setFilterKeyColumn(filter_col_index)
-                self.data_frame_table_view.proxy_model.setFilterRegularExpression(text)
+                proxy_model.setFilterKeyColumn(filter_col_index)
+                proxy_model.setFilterRegularExpression(text)
         else:
-            if self.search_edit_has_error:
-                self.search_edit.setStyleSheet(self.search_edit_original_style_sheet)
-                self.data_frame_table_view.proxy_model.setFilterKeyColumn(-1)
-                self.search_edit_has_error = False
-            self.data_frame_table_view.proxy_model.setFilterRegularExpression(text)
+            self.set_search_edit_error(None)
+            # Also reset the column of a previous "column name:regex" filter
+            if proxy_model.filterKeyColumn() != -1:
+                proxy_model.setFilterKeyColumn(-1)
+            proxy_model.setFilterRegularExpression(text)
 
 
 class StudentsTableView(DataFrameTableView):
+    model_class = StudentsModel
     
     def __init__(self, df: pd.DataFrame = None, sort_by: Union[str, int] = 0, parent: QWidget = None):
         super().__init__(df, sort_by, parent)
@@ -140,12 +283,10 @@ class TutorsTableView(DataFrameTableView):
         super().__init__(df, sort_by, parent)
 
 
-# TODO: there can be name changes where the (initially added) student names then no longer match with the Moodle
-#  submissions. Possible work-around options: 1) store multiple student names with the same matriculation ID. This would
-#  however complicate things, since many things are currently based solely on the student ID. 2) Use the Moodle ID from
-#  the submission, and with this Moodle ID, somehow obtain the students matriculation ID. Name changes, however, would
-#  then not be reflected at all. 3) Just always use the most recent student names. However, splitting old submissions
-#  (containing the old names) then no longer works
+# Note: there can be name changes where the (initially added) student names then no longer match with the Moodle
+#  submissions. This is handled by the persistent identity index (see splitting.identity.IdentityIndex), which maps the
+#  Moodle ID from the submission to the student's matriculation ID and stores the name history. Only submissions with
+#  previously unseen Moodle IDs are still matched via the student names
 class SubmissionsTableView(DataFrameTableView):
     
     def __init__(self, df: pd.DataFrame = None, sort_by: Union[str, int] = 0, parent: QWidget = None):
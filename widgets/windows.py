@@ -1,9 +1,13 @@
+import os
+
 import PySide6.QtWidgets as qw
-import pandas as pd
+from PySide6.QtCore import Qt
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QMainWindow
 
-from widgets.tabs import CourseTab
+from widgets.course import CourseTab
+from widgets.diagnostics import DiagnosticsPanel
+from widgets.scheduler import JobsStatusWidget, get_scheduler
 
 
 # Subclass QMainWindow to customize your application's main window
@@ -12,11 +16,11 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         
-        # TODO: temp
-        tutors_df = pd.DataFrame({
+        # TODO: temp (plain dictionary of columns, so pandas is only imported once a course tab is shown)
+        tutors_df = {
             "Name": ["Example Name", "Hello Test", "Gabe the Dog"],
             "Weight": [2, 3, 2],
-        })
+        }
         
         self.tabs = qw.QTabWidget()
         # layout = QGridLayout()
@@ -24,15 +28,28 @@ class MainWindow(QMainWindow):
         # layout.addWidget(QPushButton("hello"), 1, 1)
         # layout.setContentsMargins(0, 0, 0, 0)
         # layout.setSpacing(0)
-        python1_tab = CourseTab(tutors_df=tutors_df)
-        handson2_tab = CourseTab(tutors_df=tutors_df)
+        python1_tab = CourseTab("Python 1", tutors_df=tutors_df)
+        handson2_tab = CourseTab("Hands-on AI II", tutors_df=tutors_df)
         self.tabs.addTab(python1_tab, "Python 1")
         self.tabs.addTab(handson2_tab, "Hands-on AI II")
+        self.course_tabs = [python1_tab, handson2_tab]
         
         self.setWindowTitle("JKU Students Manager")
         self.setCentralWidget(self.tabs)
         self.resize(800, 500)
-        self.statusBar()  # Currently empty, but will be filled later
+        # Duration of the last top-level pipeline stage (a separate widget, so it does not replace the temporary status
+        # bar messages, e.g., the progress of splitting submissions)
+        self.last_span_label = qw.QLabel()
+        self.statusBar().addPermanentWidget(self.last_span_label)
+        # Queued and running background jobs per course
+        self.statusBar().addPermanentWidget(JobsStatusWidget())
+        
+        # Timings of the most recent pipeline stages (hidden by default, the last top-level stage is also shown in the
+        # status bar)
+        self.diagnostics_panel = DiagnosticsPanel(self)
+        self.diagnostics_panel.bridge.span_finished.connect(self.span_finished)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.diagnostics_panel)
+        self.diagnostics_panel.hide()
         
         menu = self.menuBar()
         file_menu = menu.addMenu("&File")
@@ -42,12 +59,92 @@ class MainWindow(QMainWindow):
         action = QAction("Add tab", file_menu)
         action.triggered.connect(self.add_tab)
         file_menu.addAction(action)
+        action = QAction("Open table file...", file_menu)
+        action.triggered.connect(self.open_table_file)
+        file_menu.addAction(action)
+        action = QAction("Export KUSSS gradings...", file_menu)
+        action.triggered.connect(self.export_gradings)
+        file_menu.addAction(action)
         action = QAction("Exit", file_menu)
         action.triggered.connect(self.close)
         file_menu.addAction(action)
+        view_menu = menu.addMenu("&View")
+        view_menu.addAction(self.diagnostics_panel.toggleViewAction())
         
         self.tab_count = 0
     
     def add_tab(self):
         self.tab_count += 1
         self.tabs.addTab(qw.QLabel("some label"), f"dynamic tab {self.tab_count}")
+    
+    def span_finished(self, span):
+        if span.depth == 0:
+            rows = f" ({span.args['rows']} rows)" if span.args.get("rows") is not None else ""
+            self.last_span_label.setText(f"{span.name}: {span.duration:.3f}s{rows}")
+    
+    def open_table_file(self):
+        """
+        Opens a (potentially very large) Feather/Arrow file in a new read-only tab. The file is memory-mapped, so only
+        the displayed parts are read (see ``ArrowTableModel``).
+        """
+        file, _ = qw.QFileDialog.getOpenFileName(self, caption="Open table file",
+                                                 filter="Arrow/Feather files (*.feather *.arrow *.ipc)")
+        if not file:
+            return
+        # Imported here, since the view depends on pandas (which should not be loaded at startup)
+        from widgets.util import import_pandas
+        import_pandas()
+        from models import ArrowTableModel
+        from widgets.views import ArrowTableView
+        
+        try:
+            model = ArrowTableModel.from_file(file)
+        except (ImportError, OSError, ValueError) as ex:
+            qw.QMessageBox.critical(self, "Open table file", f"Cannot open {file}:\n{ex}")
+            return
+        index = self.tabs.addTab(ArrowTableView(model), os.path.basename(file))
+        self.tabs.setCurrentIndex(index)
+    
+    def export_gradings(self):
+        """Writes the KUSSS grading files of all courses (one file per KUSSS course ID) into a selected directory."""
+        directory = qw.QFileDialog.getExistingDirectory(self, caption="Export KUSSS gradings")
+        if not directory:
+            return
+        # Imported here, since the export depends on pandas (which should not be loaded at startup)
+        from widgets.util import import_pandas
+        import_pandas()
+        from diagnostics import Diagnostics
+        from graders.export import write_kusss_gradings
+        
+        diagnostics = Diagnostics()
+        results = []
+        for course_tab in self.course_tabs:
+            grading_df = course_tab.get_grading_df()
+            if grading_df is None:
+                results.append(f"{course_tab.name}: no grades")
+                continue
+            try:
+                files = write_kusss_gradings(grading_df, directory, course_tab.name, diagnostics=diagnostics)
+                results.append(f"{course_tab.name}: {len(files)} file{'' if len(files) == 1 else 's'}")
+            except ValueError as ex:
+                results.append(f"{course_tab.name}: failed ({ex})")
+        if len(diagnostics) > 0:
+            results.append(f"\n{diagnostics.summary()}")
+        qw.QMessageBox.information(self, "Export KUSSS gradings", "\n".join(results))
+    
+    def save_sessions(self):
+        for course_tab in self.course_tabs:
+            try:
+                course_tab.save_session()
+            except ImportError as ex:
+                print(f"cannot save sessions (optional dependency missing): {ex}")
+                return
+            except Exception as ex:
+                # The window is closing, so just report the error and still save the sessions of the other courses
+                print(f"cannot save session of course '{course_tab.name}': {type(ex).__name__}: {ex}")
+    
+    def closeEvent(self, event):
+        # Cancel running jobs (e.g., splitting submissions) before their results would be stored
+        get_scheduler().shutdown()
+        self.save_sessions()
+        super().closeEvent(event)
@@ -1,5 +1,7 @@
 from PySide6.QtCore import QRunnable, Slot, Signal, QObject
 
+from tasks import ProgressReporter, CancellationToken, CancelledError
+
 
 class Worker(QRunnable):
     # Custom signals only work on QObjects (QRunnable is not derived from QObject)
@@ -7,8 +9,12 @@ class Worker(QRunnable):
         """
         Defines the signals available from a running worker thread. Supported signals are:
 
+        `started`
+            Emitted when the function is actually started (i.e., the worker got a thread from the pool and was not
+            cancelled before).
+
         `finished`
-            Emitted when the worker is done (either normally or because of an error).
+            Emitted when the worker is done (either normally, because of an error or because it was cancelled).
 
         `error(Exception)`
             Emitted in case of an error. Data is the occurred exception.
@@ -18,25 +24,45 @@ class Worker(QRunnable):
 
         `progress(int)`
             Emitted when progress changes. Data is the integer indicating the progress in percent (%).
+
+        `status(str)`
+            Emitted together with `progress`. Data is the status text (throughput and estimated remaining time).
+
+        `cancelled`
+            Emitted when the function stopped because of a cancellation request (see `Worker.cancel`).
         """
+        started = Signal()
         finished = Signal()
         error = Signal(Exception)
         result = Signal(object)
         progress = Signal(int)
+        status = Signal(str)
+        cancelled = Signal()
     
-    def __init__(self, func, use_progress_callback: bool = True, *args, **kwargs):
+    def __init__(self, func, *args, use_progress_callback: bool = True, progress_interval: float = 0.1,
+                 use_cancellation_token: bool = False, **kwargs):
         """
-        Creates a new worker thread that runs the specified function. The `finished`, `error`, `result` and `progress`
-        attributes can be used to set up the various callbacks that should be run (see `workers.Worker.WorkerSignals`).
+        Creates a new worker thread that runs the specified function. The `started`, `finished`, `error`, `result`,
+        `progress` and `status` attributes can be used to set up the various callbacks that should be run (see
+        `workers.Worker.WorkerSignals`).
 
         :param func: The function to run on this worker thread. The specified `args` and `kwargs` will be passed to this
             function when called by the worker.
         :param use_progress_callback: If True, then an additional keyword argument "progress_callback", which contains
-            the `WorkerSignals.progress` signal, will be passed to the function in order for the function to emit
-            progress feedback. In this case, `kwargs` must not already contain "progress_callback".
+            a `tasks.ProgressReporter` that forwards to the `WorkerSignals.progress` and `WorkerSignals.status` signals,
+            will be passed to the function in order for the function to emit progress feedback (either via
+            `progress_callback.emit(percent)` or, preferably, via `progress_callback.start(total)` followed by
+            `progress_callback.advance(amount)`). In this case, `kwargs` must not already contain "progress_callback".
+        :param progress_interval: The minimum time in seconds between two progress signals, which avoids flooding the
+            GUI event loop with cross-thread signals. Default: 0.1
+        :param use_cancellation_token: If True, then an additional keyword argument "cancellation_token", which contains
+            a `tasks.CancellationToken`, will be passed to the function. The function should regularly check this token
+            and raise a `tasks.CancelledError` (after cleaning up) once `Worker.cancel` was called. In this case,
+            `kwargs` must not already contain "cancellation_token". Default: False
         :param args: Arguments to pass to the function.
         :param kwargs: Keyword arguments to pass to the function. Must not contain "progress_callback" if
-            `use_progress_callback` is set to True.
+            `use_progress_callback` is set to True and must not contain "cancellation_token" if
+            `use_cancellation_token` is set to True.
         """
         super().__init__()
         self.func = func
@@ -46,19 +72,43 @@ class Worker(QRunnable):
         # source has been deleted). Could also make "signals" public and then set the callbacks via, e.g.,
         # "worker.signals.error", but "worker.error" is just more convenient
         self._signals = Worker.WorkerSignals()
+        self.started = self._signals.started
         self.finished = self._signals.finished
         self.error = self._signals.error
         self.result = self._signals.result
         self.progress = self._signals.progress
+        self.status = self._signals.status
+        self.cancelled = self._signals.cancelled
         if use_progress_callback:
             if "progress_callback" in self.kwargs:
                 raise ValueError("kwargs must not contain 'progress_callback' when use_progress_callback=True")
-            self.kwargs["progress_callback"] = self._signals.progress
+            self.kwargs["progress_callback"] = ProgressReporter(
+                self._signals.progress.emit,
+                self._signals.status.emit,
+                min_interval=progress_interval
+            )
+        self.cancellation_token = CancellationToken()
+        if use_cancellation_token:
+            if "cancellation_token" in self.kwargs:
+                raise ValueError("kwargs must not contain 'cancellation_token' when use_cancellation_token=True")
+            self.kwargs["cancellation_token"] = self.cancellation_token
+    
+    def cancel(self):
+        """
+        Requests the cancellation of this worker. If the function was not started yet, it is not run at all. Otherwise,
+        it is up to the function to stop (see `use_cancellation_token` in `Worker.__init__`).
+        """
+        self.cancellation_token.cancel()
     
     @Slot()
     def run(self):
         try:
+            # Cancelled before this worker even got a thread from the pool
+            self.cancellation_token.raise_if_cancelled()
+            self.started.emit()
             result = self.func(*self.args, **self.kwargs)
+        except CancelledError:
+            self.cancelled.emit()
         except Exception as e:
             self.error.emit(e)
         else: